@@ -0,0 +1,71 @@
+"""Compares the conversion of MongoDB documents with json.loads(json_util.dumps(...)) and with to_json_safe().
+Measures the throughput and the peak memory allocated for pages of large documents.
+
+Usage: python benchmarks/bson_converter_benchmark.py [--page-size 250] [--repeat 20]"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+from bson import json_util, ObjectId
+from bson.int64 import Int64
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ndr_core.api.mongodb.bson_converter import to_json_safe  # noqa: E402
+
+
+def create_document(number):
+    """Creates a document similar to a transcribed record: metadata, persons and a large transcription. """
+    return {
+        '_id': ObjectId(),
+        'id': f"record_{number}",
+        'date': datetime.datetime(1800 + number % 200, 1 + number % 12, 1 + number % 28),
+        'count': Int64(number),
+        'persons': [{'name': f"Person {i}", 'born': datetime.datetime(1750, 1, 1), 'id': ObjectId()}
+                    for i in range(20)],
+        'transcription': [{'line': i, 'text': "Lorem ipsum dolor sit amet " * 10} for i in range(200)],
+    }
+
+
+def json_util_round_trip(documents):
+    """The former conversion. """
+    return [json.loads(json_util.dumps(document)) for document in documents]
+
+
+def direct_conversion(documents):
+    """The new conversion. """
+    return [to_json_safe(document) for document in documents]
+
+
+def measure(function, documents, repeat):
+    """Returns the documents per second and the peak memory in KiB of a conversion function. """
+    seconds = min(timeit.repeat(lambda: function(documents), number=1, repeat=repeat))
+
+    tracemalloc.start()
+    function(documents)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(documents) / seconds, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page-size', type=int, default=250)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    documents = [create_document(number) for number in range(args.page_size)]
+    assert json_util_round_trip(documents) == direct_conversion(documents)
+
+    print(f"{'conversion':<22}{'documents/s':>14}{'peak KiB':>12}")
+    for name, function in (('json_util round trip', json_util_round_trip), ('to_json_safe', direct_conversion)):
+        throughput, peak = measure(function, documents, args.repeat)
+        print(f"{name:<22}{throughput:>14.0f}{peak:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Compares the former nested value lookups with the compiled paths of ndr_core.utils. Measures lookups per second
+on deep records for the two former implementations which parsed paths on each lookup: the key parsing of template
+variables and the path splitting of the CSV export. As in ndr_core, the paths are compiled once (per template
+variable and per CSV column) and resolved for each record.
+
+Usage: python benchmarks/nested_path_benchmark.py [--records 1000] [--depth 8] [--repeat 20]"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ndr_core.utils import compile_path  # noqa: E402
+
+
+def create_record(number, depth):
+    """Creates a record with values nested depth levels deep: 'data' has a list at every other level, 'meta'
+    only has dictionaries down to a list of persons. """
+    value = {'name': f"Value {number}", 'year': 1800 + number % 200}
+    meta = {'persons': [{'name': f"Person {i}"} for i in range(5)]}
+    for level in range(depth):
+        value = [value, value] if level % 2 else {f"level_{level}": value}
+        meta = {f"level_{level}": meta}
+    return {'id': f"record_{number}", 'data': value, 'meta': meta}
+
+
+def create_paths(depth):
+    """Returns the bracket path to the name in 'data' and the dot path to the person names in 'meta' of a record. """
+    keys = ['data']
+    for level in reversed(range(depth)):
+        keys.append(1 if level % 2 else f"level_{level}")
+    keys.append('name')
+    bracket_path = keys[0] + ''.join(f"[{key}]" for key in keys[1:])
+    dot_path = '.'.join(['meta'] + [f"level_{level}" for level in reversed(range(depth))] + ['persons', 'name'])
+    return bracket_path, dot_path
+
+
+def former_template_lookup(record, bracket_path):
+    """The former TemplateStringVariable lookup: the keys are parsed with regular expressions on each access. """
+    keys = [sub_match for match_item in re.findall(r"(.*?)\[(.*?)\]", bracket_path)
+            for sub_match in match_item if sub_match != '']
+    value = record
+    for key in keys:
+        try:
+            value = value[key]
+        except TypeError:
+            if key.isdigit():
+                value = value[int(key)]
+    return value
+
+
+def former_get_nested_value(record, dot_path):
+    """The former utils.get_nested_value: the path is split for each row. """
+    obj = record
+    for key in dot_path.split("."):
+        if isinstance(obj, list) and len(obj) > 0:
+            obj = ", ".join(item[key] for item in obj)
+        else:
+            obj = obj[key]
+    return obj
+
+
+def measure(function, records, repeat):
+    """Returns the lookups per second of a lookup function. """
+    seconds = min(timeit.repeat(lambda: [function(record) for record in records], number=1, repeat=repeat))
+    return len(records) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    records = [create_record(number, args.depth) for number in range(args.records)]
+    bracket_path, dot_path = create_paths(args.depth)
+    compiled_bracket_path, compiled_dot_path = compile_path(bracket_path), compile_path(dot_path)
+
+    cases = (
+        ('template variable', lambda record: former_template_lookup(record, bracket_path),
+         compiled_bracket_path.resolve),
+        ('csv export', lambda record: former_get_nested_value(record, dot_path),
+         lambda record: compiled_dot_path.resolve(record, join=", ")),
+    )
+
+    print(f"{'lookup':<20}{'former/s':>14}{'compiled/s':>14}{'speedup':>10}")
+    for name, former, compiled in cases:
+        assert [former(record) for record in records] == [compiled(record) for record in records]
+        former_throughput = measure(former, records, args.repeat)
+        compiled_throughput = measure(compiled, records, args.repeat)
+        print(f"{name:<20}{former_throughput:>14.0f}{compiled_throughput:>14.0f}"
+              f"{compiled_throughput / former_throughput:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
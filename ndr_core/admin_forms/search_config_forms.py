@@ -17,10 +17,13 @@ class SearchConfigurationForm(forms.ModelForm):
         fields = ['conf_name', 'conf_label',
                   'api_type', 'api_connection_url',
                   'api_user_name', 'api_password', 'api_auth_key',
-                  'search_id_field', 'sort_field', 'sort_order',
+                  'connection_pool_size', 'connection_min_pool_size', 'connection_keep_alive',
+                  'connection_retries', 'circuit_failure_threshold', 'circuit_cool_down',
+                  'search_id_field', 'sort_field', 'sort_order', 'use_keyset_pagination',
                   'search_has_compact_result', 'compact_result_is_default', 'page_size',
-                  'compact_page_size', 'citation_expression', 'repository_url',
-                  'has_simple_search', 'simple_search_first', 'simple_query_main_field',
+                  'compact_page_size', 'result_cache_ttl', 'citation_expression', 'repository_url',
+                  'count_strategy', 'count_limit', 'count_cache_ttl', 'use_facet_pipeline',
+                  'has_simple_search', 'simple_search_first', 'simple_query_main_field', 'simple_query_mode',
                   'simple_query_label', 'simple_query_help_text', 'simple_search_tab_title',
                   'manifest_relation_expression', 'manifest_page_expression']
 
@@ -80,6 +83,22 @@ class SearchConfigurationForm(forms.ModelForm):
         )
         layout.append(form_row)
 
+        form_row = Row(
+            Column('connection_pool_size', css_class='col-3'),
+            Column('connection_min_pool_size', css_class='col-3'),
+            Column('connection_retries', css_class='col-3'),
+            Column('connection_keep_alive', css_class='col-3'),
+            css_class='form-row'
+        )
+        layout.append(form_row)
+
+        form_row = Row(
+            Column('circuit_failure_threshold', css_class='col-6'),
+            Column('circuit_cool_down', css_class='col-6'),
+            css_class='form-row'
+        )
+        layout.append(form_row)
+
         form_row = Row(
             Column(Div(HTML('''
                             <br/>
@@ -93,9 +112,10 @@ class SearchConfigurationForm(forms.ModelForm):
         layout.append(form_row)
 
         form_row = Row(
-            Column('search_id_field', css_class='col-4'),
-            Column('sort_field', css_class='col-4'),
-            Column('sort_order', css_class='col-4'),
+            Column('search_id_field', css_class='col-3'),
+            Column('sort_field', css_class='col-3'),
+            Column('sort_order', css_class='col-3'),
+            Column('use_keyset_pagination', css_class='col-3'),
             css_class='form-row'
         )
         layout.append(form_row)
@@ -111,7 +131,17 @@ class SearchConfigurationForm(forms.ModelForm):
 
         form_row = Row(
             Column('compact_result_is_default', css_class='col-3'),
-            Column('citation_expression', css_class='col-9'),
+            Column('result_cache_ttl', css_class='col-2'),
+            Column('citation_expression', css_class='col-7'),
+            css_class='form-row'
+        )
+        layout.append(form_row)
+
+        form_row = Row(
+            Column('count_strategy', css_class='col-4'),
+            Column('count_limit', css_class='col-2'),
+            Column('count_cache_ttl', css_class='col-2'),
+            Column('use_facet_pipeline', css_class='col-4'),
             css_class='form-row'
         )
         layout.append(form_row)
@@ -130,9 +160,10 @@ class SearchConfigurationForm(forms.ModelForm):
         layout.append(form_row)
 
         form_row = Row(
-            Column('has_simple_search', css_class='col-4'),
-            Column('simple_search_first', css_class='col-4'),
-            Column('simple_query_main_field', css_class='col-4'),
+            Column('has_simple_search', css_class='col-3'),
+            Column('simple_search_first', css_class='col-3'),
+            Column('simple_query_main_field', css_class='col-3'),
+            Column('simple_query_mode', css_class='col-3'),
             css_class='form-row'
         )
         layout.append(form_row)
@@ -10,6 +10,10 @@ from django_filters import FilterSet
 from django_filters.views import FilterView
 from django_tables2 import SingleTableMixin
 
+from ndr_core.api.circuit_breaker import get_circuit_breaker_states
+from ndr_core.api.result_cache import result_cache
+from ndr_core.api.single_flight import single_flight
+from ndr_core.card_cache import card_cache
 from ndr_core.models import NdrCoreValue, \
     NdrCoreSearchStatisticEntry, NdrCoreUserMessage
 from ndr_core.admin_tables import StatisticsTable
@@ -30,7 +34,11 @@ class NdrCoreDashboard(AdminViewMixin, LoginRequiredMixin, View):
         return render(self.request,
                       template_name='ndr_core/admin_views/overview/dashboard.html',
                       context={'new_messages': NdrCoreUserMessage.objects.filter(message_archived=False).count(),
-                               'total_searches': NdrCoreSearchStatisticEntry.objects.all().count()})
+                               'total_searches': NdrCoreSearchStatisticEntry.objects.all().count(),
+                               'result_cache': result_cache.get_statistics(),
+                               'card_cache': card_cache.get_statistics(),
+                               'coalesced_searches': single_flight.coalesced,
+                               'circuit_breakers': get_circuit_breaker_states()})
 
 
 class HelpView(AdminViewMixin, LoginRequiredMixin, View):
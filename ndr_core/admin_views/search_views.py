@@ -11,6 +11,9 @@ from ndr_core.admin_forms.search_config_forms import (
 )
 from ndr_core.admin_forms.search_form_forms import SearchConfigurationFormEditForm
 from ndr_core.admin_views.admin_views import AdminViewMixin
+from ndr_core.api.base_query import BaseQuery
+from ndr_core.api_factory import ApiFactory
+from ndr_core.forms.forms_search import AdvancedSearchForm
 from ndr_core.models import (
     NdrCoreSearchField,
     NdrCoreSearchConfiguration,
@@ -76,6 +79,65 @@ class SearchConfigurationCopyView(AdminViewMixin, LoginRequiredMixin, View):
         return redirect('ndr_core:configure_search')
 
 
+class SearchConfigurationExplainView(AdminViewMixin, LoginRequiredMixin, View):
+    """ View to explain the searches of a search configuration. Shows the search form of the configuration.
+    A submitted search is not executed: the API returns its query plan instead. """
+
+    def get(self, request, *args, **kwargs):
+        """GET request for this view. """
+
+        search_config = NdrCoreSearchConfiguration.objects.get(pk=self.kwargs['pk'])
+        context = {'search_config': search_config}
+
+        requested_search = None
+        for value in request.GET.keys():
+            if value.startswith('search_button_'):
+                requested_search = value[len('search_button_'):]
+                break
+
+        if requested_search is None:
+            form = AdvancedSearchForm(search_config=search_config)
+        else:
+            form = AdvancedSearchForm(request.GET, search_config=search_config)
+            if form.is_valid():
+                context.update(self.explain(search_config, form, requested_search))
+
+        context['form'] = form
+        return render(self.request, template_name='ndr_core/admin_views/overview/explain_search.html',
+                      context=context)
+
+    def explain(self, search_config, form, requested_search):
+        """Composes the explain query of the submitted search and retrieves the query plan from the API. """
+        api_factory = ApiFactory(search_config)
+        query_obj = api_factory.get_query_instance(page=self.request.GET.get("page", 1))
+
+        if requested_search.endswith('_simple'):
+            query_obj.search_term = self.request.GET.get(f'search_term_{search_config.conf_name}', '')
+            query_obj.and_or = form.cleaned_data.get(f'and_or_field_{search_config.conf_name}') or 'and'
+            search_type = BaseQuery.Q_SIMPLE
+        else:
+            field_names = [form_field.search_field.field_name
+                           for form_field in search_config.search_form_fields.select_related('search_field')]
+            for field in form.fields:
+                if field.startswith(f'{search_config.conf_name}_'):
+                    actual_key = field[len(search_config.conf_name) + 1:]
+                    if actual_key in field_names or actual_key.endswith('condition'):
+                        query_obj.set_value(actual_key, form.cleaned_data[field])
+            search_type = BaseQuery.Q_ADVANCED
+
+        query = query_obj.get_explain_query(search_type)
+        if query is None:
+            return {'explain_error': 'This API does not support explaining searches.'}
+
+        # The plan is always requested from the API: no result cache, no coalescing.
+        result = api_factory.get_result_instance(query, self.request)
+        result.download_result()
+        return {'explain_query': query,
+                'explain_error': result.error,
+                'explanation': result.raw_result,
+                'summary': result.get_explain_summary()}
+
+
 class SearchConfigurationFormEditView(AdminViewMixin, LoginRequiredMixin, FormView):
     """ View to edit the form configuration for a search configuration. """
 
@@ -5,6 +5,8 @@ implementation."""
 from abc import ABC, abstractmethod
 
 from ndr_core.api.ndr_core.field_configuration import FieldConfiguration
+from ndr_core.models import NdrCoreSearchField, NdrCoreSearchConfiguration
+from ndr_core.search_plan import get_search_plan
 
 
 class BaseQuery(ABC):
@@ -24,6 +26,8 @@ class BaseQuery(ABC):
 
         self.values = {}
         self.search_term = ''
+        self.and_or = 'and'
+        self._search_fields = {}
 
     @abstractmethod
     def get_simple_query(self, search_term, add_page_and_size=True, and_or='and'):
@@ -63,11 +67,35 @@ class BaseQuery(ABC):
 
         return set_values
 
+    def get_search_fields(self):
+        """Returns the search fields of the set values as dict of field_name: NdrCoreSearchField (None if no field
+        with this name exists). Fields of the search form are taken from the compiled search plan, the other
+        fields which are not loaded yet are loaded with a single query."""
+        missing_names = [name for name in self.values if name not in self._search_fields]
+        if len(missing_names) > 0 and isinstance(self.search_config, NdrCoreSearchConfiguration):
+            # The fields of the search form are part of the compiled search plan.
+            search_plan = get_search_plan(self.search_config)
+            for name in missing_names:
+                plan_field = search_plan.get_field(name)
+                if plan_field is not None:
+                    self._search_fields[name] = plan_field
+            missing_names = [name for name in missing_names if name not in self._search_fields]
+
+        if len(missing_names) > 0:
+            for field in NdrCoreSearchField.objects.filter(field_name__in=missing_names):
+                self._search_fields[field.field_name] = field
+            for name in missing_names:
+                self._search_fields.setdefault(name, None)
+        return self._search_fields
+
     def get_field_configurations(self):
         """Returns the configuration for a field"""
         field_configs = []
+        search_fields = self.get_search_fields()
         for name in self.get_set_values_names():
-            field_conf = FieldConfiguration(name, self.values[name])
+            if search_fields[name] is None:
+                raise ValueError(f"Field {name} does not exist.")
+            field_conf = FieldConfiguration(name, self.values[name], field=search_fields[name])
             if f"{name}_condition" in self.values:
                 field_conf.user_condition = self.values[f"{name}_condition"]
             field_configs.append(field_conf)
@@ -6,6 +6,10 @@ import requests
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
+from ndr_core.api.circuit_breaker import get_circuit_breaker
+from ndr_core.api.http_session import get_http_session
+from ndr_core.api.result_cache import result_cache, get_result_cache_key
+from ndr_core.api.single_flight import single_flight
 from ndr_core.geo_ip_utils import get_user_ip, get_geolocation
 from ndr_core.models import (NdrCoreValue,
                              NdrCoreSearchStatisticEntry,
@@ -27,6 +31,8 @@ class BaseResult(ABC):
     REQUEST = -101
     LOADED = -102
     SERVER = -103
+    UNAVAILABLE = -104
+    QUERY_TIMEOUT = -105
 
     def __init__(self, search_configuration, query, request):
         if search_configuration is None:
@@ -39,22 +45,27 @@ class BaseResult(ABC):
         self.raw_result = None
         self.error = None
         self.error_code = None
+        self.status_code = None
+        # If True, the API must return complete records (e.g. for downloads), not only the rendered fields.
+        self.full_records = False
 
         self.total = 0
+        self.total_is_approximate = False
         self.page = 1
         self.page_size = self.search_configuration.page_size
         self.num_pages = 0
         self.page_links = {}
         self.form_links = {}
         self.results = []
+        self.facets = []
 
     def load_result(self, transform_result=True):
         """Convenience function to undertake all the necessary steps to have a sanitized search result.
         This function is called by the view and should not be overwritten.
         :param transform_result: If true, the result is transformed to be rendered by the template."""
 
-        # 1.) download the text and save it to self.raw_result
-        self.download_result()
+        # 1.) download the text and save it to self.raw_result (or get it from the result cache)
+        self.load_raw_result()
         if self.raw_result is None:
             # If the download failed, the error is already set.
             # This will return an empty result
@@ -79,13 +90,123 @@ class BaseResult(ABC):
         # 6.) Log search
         self.log_search()
 
+    def load_raw_result(self):
+        """Sets self.raw_result from the result cache or downloads it. If the search configuration has a
+        result cache TTL, successfully downloaded results are cached for identical searches.
+        Identical searches which run at the same time are coalesced: only one of them downloads the result,
+        the others get its result or its error.
+        Without a result cache TTL, searches are only coalesced within the process, so no result is kept in
+        the django cache.
+        If the circuit breaker of the API connection is open, no download is attempted."""
+        ttl = self.search_configuration.result_cache_ttl
+        cache_key = self.get_cache_key()
+
+        if ttl > 0:
+            cached_result = result_cache.get(cache_key)
+            if cached_result is not None:
+                self.raw_result = cached_result
+                return
+
+        breaker = get_circuit_breaker(self.search_configuration)
+        if not breaker.allow_request():
+            self.error = _("The service is currently unavailable. Please try again later.")
+            self.error_code = BaseResult.UNAVAILABLE
+            return
+
+        downloaded = False
+
+        def download():
+            nonlocal downloaded
+            downloaded = True
+            try:
+                self.download_result()
+            except Exception:
+                breaker.record_failure()
+                raise
+            if self.is_connection_failure():
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            if ttl > 0 and self.raw_result is not None and self.error is None:
+                result_cache.set(cache_key, self.raw_result, ttl)
+            return self.raw_result, self.error, self.error_code
+
+        try:
+            self.raw_result, self.error, self.error_code = single_flight.do(
+                cache_key, download, cross_process=None if ttl > 0 else False)
+        finally:
+            if not downloaded:
+                # The outcome was shared by another search. It proves that the backend answers, but this search
+                # must not keep the trial request of a half-open circuit.
+                if self.raw_result is not None and self.error is None:
+                    breaker.record_success()
+                else:
+                    breaker.release_trial()
+
+    def is_connection_failure(self):
+        """Returns True if the last download failed because the API is not reachable or has a server error.
+        These failures count towards opening the circuit breaker. Searches which took too long (QUERY_TIMEOUT)
+        don't: the API answered, the search itself is slow."""
+        if self.error_code in (BaseResult.TIMEOUT, BaseResult.REQUEST):
+            return True
+        return self.error_code == BaseResult.SERVER and self.status_code is not None and self.status_code >= 500
+
+    def get_explain_summary(self):
+        """Returns the key figures of a MongoDB query plan in self.raw_result (as returned by an explain query):
+        the stages of the winning plan, the used indexes, the number of examined and returned documents
+        and the execution time. Returns None if the raw result is not a query plan."""
+        if not isinstance(self.raw_result, dict):
+            return None
+
+        explanation = self.raw_result
+        stages = []
+        if 'queryPlanner' not in explanation and len(explanation.get('stages', [])) > 0:
+            # Explained aggregations list their pipeline stages. The first one ($cursor) is the query
+            # which selects the documents, the following stages are listed before its plan.
+            pipeline_stages = explanation['stages']
+            stages = [next(iter(stage), '?') for stage in reversed(pipeline_stages[1:])]
+            explanation = pipeline_stages[0].get('$cursor', {})
+        if 'queryPlanner' not in explanation:
+            return None
+
+        winning_plan = explanation['queryPlanner'].get('winningPlan', {})
+        # Plans of the slot based engine contain the classic plan as 'queryPlan'
+        winning_plan = winning_plan.get('queryPlan', winning_plan)
+
+        index_names = []
+        plan_stages = [winning_plan]
+        while len(plan_stages) > 0:
+            stage = plan_stages.pop(0)
+            stages.append(stage.get('stage', '?'))
+            if 'indexName' in stage:
+                index_names.append(stage['indexName'])
+            if 'inputStage' in stage:
+                plan_stages.append(stage['inputStage'])
+            plan_stages.extend(stage.get('inputStages', []))
+
+        execution_stats = explanation.get('executionStats', {})
+        return {'winning_plan': ' > '.join(stages),
+                'index_names': index_names,
+                'is_collection_scan': 'COLLSCAN' in stages,
+                'docs_examined': execution_stats.get('totalDocsExamined'),
+                'keys_examined': execution_stats.get('totalKeysExamined'),
+                'docs_returned': execution_stats.get('nReturned'),
+                'execution_time_ms': execution_stats.get('executionTimeMillis')}
+
+    def get_cache_key(self):
+        """Returns the canonical key of this result's query, used to cache the raw result."""
+        return get_result_cache_key(self.search_configuration, self.query, self.page_size)
+
     def download_result(self):
         """Downloads the result by requesting the query.
         The result is saved in self.raw_result or an error is logged. """
 
         try:
+            # The session is shared per API host, so open connections are reused.
             # Timeouts: 2s until connection, 5s until result
-            result = requests.get(self.query, timeout=(2, 5), headers=self.api_request_headers)
+            session = get_http_session(self.search_configuration)
+            result = session.get(self.query, timeout=(2, 5), headers=self.api_request_headers)
         except requests.exceptions.ConnectTimeout:
             self.error = _("The connection timed out")
             self.error_code = BaseResult.TIMEOUT
@@ -96,6 +217,7 @@ class BaseResult(ABC):
             return
 
         # If request was successful: load json object from it
+        self.status_code = result.status_code
         if result.status_code == 200:
             self.save_raw_result(result.text)
         else:
@@ -111,6 +233,7 @@ class BaseResult(ABC):
     def fill_search_result_meta_data(self):
         """Fill the meta-data variables from the raw result. NDR Core excepts the following variables:
         self.total: The total number of results
+        self.total_is_approximate: True if self.total is a lower bound (default: False)
         self.page: The current page
         self.num_pages: The total number of pages
         """
@@ -244,7 +367,7 @@ class BaseResult(ABC):
                 "data": result,
                 "result_meta": {
                     "result_number": hit_number,
-                    "total_results": self.total
+                    "total_results": self.get_display_total()
                 },
                 "options": self.get_result_options(result)
             }
@@ -253,6 +376,12 @@ class BaseResult(ABC):
 
         self.results = transformed_results
 
+    def get_display_total(self):
+        """Returns the total number of results to display. Approximate totals are displayed as 'N+'."""
+        if self.total_is_approximate:
+            return f"{self.total}+"
+        return self.total
+
     def log_search(self):
         """Logs the search to the database if the feature is turned on. """
         if NdrCoreValue.get_or_initialize('statistics_feature').get_value():
@@ -261,10 +390,20 @@ class BaseResult(ABC):
 
             NdrCoreSearchStatisticEntry.objects.create(search_config=self.search_configuration,
                                                        search_term=search_term,
-                                                       search_query=self.query,
+                                                       search_query=self.get_logged_query(),
                                                        search_no_results=self.total,
                                                        search_location=location)
 
+    def get_logged_query(self):
+        """Returns the query as it is logged in the search statistics. """
+        return self.truncate_logged_query(self.query)
+
+    @staticmethod
+    def truncate_logged_query(query):
+        """Returns a query as string, cut to the length of the statistics field. """
+        max_length = NdrCoreSearchStatisticEntry._meta.get_field('search_query').max_length
+        return str(query)[:max_length]
+
     def get_form_links(self):
         """Returns a dict with links to refine the search or start a new one."""
         form_links = {}
@@ -365,16 +504,27 @@ class BaseResult(ABC):
         enriched_page_list = []
         url = self.request.path + "?"
 
+        excluded_params = self.get_pagination_excluded_params()
         for get_param in self.request.GET:
-            if get_param != 'page':
+            if get_param not in excluded_params:
                 url += get_param + "=" + self.request.GET.get(get_param, "") + "&"
 
         for page in page_list:
-            enriched_page_list.append({'page': page, 'url': url + "page=" + page})
+            enriched_page_list.append({'page': page, 'url': url + self.get_page_link_params(page)})
 
         return {'pages': enriched_page_list,
-                'prev': f"{url}page={self.page - 1}",
-                'next': f"{url}page={self.page + 1}"}
+                'prev': url + self.get_page_link_params(str(self.page - 1)),
+                'next': url + self.get_page_link_params(str(self.page + 1))}
+
+    def get_pagination_excluded_params(self):
+        """Returns the GET parameters which are not copied to the pagination links."""
+        return ['page']
+
+    def get_page_link_params(self, page):
+        """Returns the GET parameters which point a pagination link to a page.
+        :param page: The page number as string.
+        :return: URL parameter string."""
+        return f"page={page}"
 
     @staticmethod
     def safe_get(dct, keys):
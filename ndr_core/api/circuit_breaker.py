@@ -0,0 +1,106 @@
+"""Circuit breakers for the API connections. If a backend fails repeatedly, its circuit opens and searches fail
+immediately instead of waiting for the connection timeout. After a cool-down, a single trial request is let
+through (half-open state): if it succeeds, the circuit closes again, otherwise it stays open."""
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Circuit breaker for one API connection URL. """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, cool_down=30):
+        """:param name: Name of the circuit, usually the connection URL.
+        :param failure_threshold: Number of consecutive failures which open the circuit. 0 disables the breaker.
+        :param cool_down: Number of seconds the circuit stays open before a trial request is let through."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cool_down = cool_down
+
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_failure_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Returns True if a request may be sent to the backend."""
+        if self.failure_threshold <= 0:
+            return True
+
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+            if self.state == CircuitBreaker.OPEN and time.monotonic() - self.opened_at >= self.cool_down:
+                self.state = CircuitBreaker.HALF_OPEN
+            if self.state == CircuitBreaker.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        """Closes the circuit after a successful request."""
+        with self._lock:
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Frees the trial request of a half-open circuit without recording an outcome. Used when the request
+        which was let through didn't reach the backend (e.g. its result was shared by another request)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Counts a failed request. Opens the circuit if the threshold is reached or the trial request failed."""
+        with self._lock:
+            self.failures += 1
+            self.last_failure_at = time.time()
+            self._trial_in_flight = False
+            if self.failure_threshold > 0 and \
+                    (self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold):
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.monotonic()
+
+    def get_status(self):
+        """Returns the state of the circuit as dict to display it."""
+        with self._lock:
+            retry_in = None
+            if self.state == CircuitBreaker.OPEN:
+                retry_in = max(0, int(self.cool_down - (time.monotonic() - self.opened_at)))
+            return {'name': self.name,
+                    'state': self.state,
+                    'failures': self.failures,
+                    'failure_threshold': self.failure_threshold,
+                    'last_failure_at': self.last_failure_at,
+                    'retry_in': retry_in}
+
+
+_breakers = {}
+"""The circuit breakers of this process, keyed by connection URL."""
+
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(search_configuration):
+    """Returns the circuit breaker for the api_connection_url of a search configuration. The thresholds are
+    updated from the configuration, so changes take effect without a restart."""
+    url = search_configuration.api_connection_url
+    breaker = _breakers.get(url)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(url, CircuitBreaker(url))
+
+    breaker.failure_threshold = search_configuration.circuit_failure_threshold
+    breaker.cool_down = search_configuration.circuit_cool_down
+    return breaker
+
+
+def get_circuit_breaker_states():
+    """Returns the states of all circuit breakers of this process."""
+    return [breaker.get_status() for breaker in list(_breakers.values())]
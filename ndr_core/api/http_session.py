@@ -0,0 +1,91 @@
+"""Process-wide pool of HTTP sessions used by the API implementations. Sessions are shared per API host, so
+consecutive searches reuse open (keep-alive) connections instead of paying a new TCP and TLS handshake
+for every request. The sessions don't keep cookies, as they are shared by all users."""
+import http.cookiejar
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_sessions = {}
+"""Shared sessions. The key is composed of the host and the pool configuration of a search configuration."""
+
+_sessions_lock = threading.Lock()
+
+
+def get_session_key(search_configuration):
+    """Returns the key under which the session of a search configuration is pooled. Configurations which
+    point to the same host with the same pool settings share a session."""
+    url = urlsplit(search_configuration.api_connection_url)
+    return (url.scheme,
+            url.netloc,
+            search_configuration.connection_pool_size,
+            search_configuration.connection_keep_alive,
+            search_configuration.connection_retries)
+
+
+def create_http_session(pool_size, keep_alive, retries):
+    """Creates a new session with a connection pool of the given size.
+
+    :param pool_size: Maximum number of connections kept open to the host.
+    :param keep_alive: If False, connections are closed after each request.
+    :param retries: Number of retries if the connection to the host can't be established.
+    :return: A configured requests.Session"""
+    pool_size = max(pool_size, 1)
+    retry = Retry(total=retries,
+                  connect=retries,
+                  read=0,
+                  status=0,
+                  other=0,
+                  backoff_factor=0.2,
+                  allowed_methods=['GET'],
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    # Cookies set by the API would be sent with the requests of all other users.
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def get_http_session(search_configuration):
+    """Returns the shared session for the host of a search configuration's api_connection_url.
+    The session is created on first use."""
+    key = get_session_key(search_configuration)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = create_http_session(search_configuration.connection_pool_size,
+                                              search_configuration.connection_keep_alive,
+                                              search_configuration.connection_retries)
+                _sessions[key] = session
+    return session
+
+
+def close_http_sessions():
+    """Closes all pooled sessions and their connections."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _reset_after_fork():
+    """Forked workers must not share sockets with their parent. The inherited sessions are dropped
+    without closing them, so the parent's connections stay intact."""
+    global _sessions_lock   # pylint: disable=global-statement
+    _sessions.clear()
+    _sessions_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
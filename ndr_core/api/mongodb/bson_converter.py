@@ -0,0 +1,40 @@
+"""Conversion of documents returned by pymongo to JSON-safe python objects. The result is the same as
+json.loads(json_util.dumps(document)) in relaxed mode, but the document is walked only once: plain values are
+kept as they are and only BSON types (ObjectId, datetime, Decimal128, ...) are converted with json_util."""
+import math
+
+from bson import json_util
+from bson.int64 import Int64
+
+_PLAIN_TYPES = frozenset((str, int, bool, type(None)))
+"""Types which are JSON-safe and are returned unchanged."""
+
+
+def to_json_safe(value, json_options=json_util.RELAXED_JSON_OPTIONS):
+    """Converts a document (or any value of a document) to a JSON-safe value.
+
+    :param value: The value to convert.
+    :param json_options: The json_util options for BSON types. The default is relaxed extended JSON.
+    :return: The converted value. Dicts and lists are copied."""
+    value_type = type(value)
+    if value_type in _PLAIN_TYPES:
+        return value
+    if value_type is dict:
+        return {key: to_json_safe(item, json_options) for key, item in value.items()}
+    if value_type is list:
+        return [to_json_safe(item, json_options) for item in value]
+    if value_type is float and math.isfinite(value):
+        return value
+    if value_type is Int64:
+        return int(value)
+
+    if hasattr(value, 'items'):
+        return {key: to_json_safe(item, json_options) for key, item in value.items()}
+    if hasattr(value, '__iter__') and not isinstance(value, (str, bytes)):
+        return [to_json_safe(item, json_options) for item in value]
+
+    try:
+        converted = json_util.default(value, json_options)
+    except TypeError:
+        return value
+    return to_json_safe(converted, json_options)
@@ -0,0 +1,92 @@
+"""Process-wide registry of MongoClient objects. A MongoClient holds its own connection pool and monitor threads
+and is meant to be created once and reused. The registry hands out one shared client per connection string.
+The module also holds the bounded thread pool on which the independent queries of a search run concurrently."""
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pymongo
+from django.conf import settings
+
+_clients = {}
+"""Shared clients. The key is composed of the connection string and the pool settings."""
+
+_clients_lock = threading.Lock()
+
+_executor = None
+"""Shared thread pool for concurrent queries. Created on first use."""
+
+
+def get_mongo_client(connection_string, max_pool_size=10, min_pool_size=0):
+    """Returns the shared client for a connection string. The client is created on first use.
+
+    :param connection_string: The MongoDB connection string (without database and collection)
+    :param max_pool_size: Maximum number of connections the client keeps open.
+    :param min_pool_size: Number of connections the client keeps open even if they are idle.
+    :return: A pymongo.MongoClient"""
+    min_pool_size = min(min_pool_size, max_pool_size)
+    key = (connection_string, max_pool_size, min_pool_size)
+
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = pymongo.MongoClient(connection_string,
+                                             serverSelectionTimeoutMS=2000,
+                                             maxPoolSize=max_pool_size,
+                                             minPoolSize=min_pool_size,
+                                             connect=False)
+                _clients[key] = client
+    return client
+
+
+def get_mongo_collection(search_configuration):
+    """Returns the collection a search configuration points to. The api_connection_url has the
+    form mongodb://host:port/database/collection"""
+    connection_string_arr = search_configuration.api_connection_url.split('/')
+    connection_string = '/'.join(connection_string_arr[:-1])
+    client = get_mongo_client(connection_string,
+                              max_pool_size=search_configuration.connection_pool_size,
+                              min_pool_size=search_configuration.connection_min_pool_size)
+    return client[connection_string_arr[-2]][connection_string_arr[-1]]
+
+
+def get_query_executor():
+    """Returns the shared thread pool on which queries run concurrently. The number of threads is bounded by the
+    NDR_CORE_MONGO_QUERY_WORKERS setting (default: 8). The threads use the shared clients and their pools."""
+    global _executor   # pylint: disable=global-statement
+    if _executor is None:
+        with _clients_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'NDR_CORE_MONGO_QUERY_WORKERS', 8),
+                                               thread_name_prefix='ndr_core_mongo')
+    return _executor
+
+
+def close_mongo_clients():
+    """Closes all shared clients, their connections and monitor threads and shuts down the thread pool."""
+    global _executor   # pylint: disable=global-statement
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _reset_after_fork():
+    """A MongoClient is not fork-safe. Forked workers drop the inherited clients (without closing them, as
+    they still belong to the parent) and create their own on first use."""
+    global _clients_lock, _executor   # pylint: disable=global-statement
+    _clients.clear()
+    _clients_lock = threading.Lock()
+    # The threads of the pool don't exist in the child.
+    _executor = None
+
+
+atexit.register(close_mongo_clients)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,194 @@
+"""Index advice for MongoDB search configurations. The advisor derives the indexes which the queries of
+MongoDBQuery need from the search fields and the sort settings of a configuration and compares them with the
+existing indexes of the collection. Compound indexes follow the ESR rule: equality fields first, then the sort
+fields, then range fields. Simple searches in the text index mode need a text index on the main field."""
+import ast
+
+import pymongo
+
+from ndr_core.api.mongodb.mongodb_client import get_mongo_collection
+from ndr_core.models import NdrCoreSearchField, NdrCoreSearchConfiguration
+
+
+class IndexAdvisor:
+    """Recommends indexes for a MongoDB search configuration. """
+
+    EQUALITY_FIELD_TYPES = [NdrCoreSearchField.FieldType.NUMBER,
+                            NdrCoreSearchField.FieldType.LIST,
+                            NdrCoreSearchField.FieldType.MULTI_LIST,
+                            NdrCoreSearchField.FieldType.BOOLEAN]
+    """Field types which are queried with equality (or $in/$all) conditions. """
+
+    RANGE_FIELD_TYPES = [NdrCoreSearchField.FieldType.STRING,
+                         NdrCoreSearchField.FieldType.NUMBER_RANGE]
+    """Field types which are queried with regular expressions or ranges. """
+
+    def __init__(self, search_configuration):
+        self.search_configuration = search_configuration
+        self._collection = None
+
+    @property
+    def collection(self):
+        """The collection of the search configuration. """
+        if self._collection is None:
+            self._collection = get_mongo_collection(self.search_configuration)
+        return self._collection
+
+    def get_sort_keys(self):
+        """Returns the index keys of the sort. With keyset pagination, the id field is the tie-breaker."""
+        direction = -1 if self.search_configuration.sort_order == 'desc' else 1
+        keys = [(self.search_configuration.sort_field, direction)]
+        if self.search_configuration.use_keyset_pagination and \
+                self.search_configuration.search_id_field != self.search_configuration.sort_field:
+            keys.append((self.search_configuration.search_id_field, direction))
+        return keys
+
+    def get_query_fields(self):
+        """Returns a list of (parameter, kind) tuples for the search fields of the configuration. Kind is
+        'equality' or 'range'. Each choice of a boolean list is an equality field of its own."""
+        query_fields = []
+        form_fields = self.search_configuration.search_form_fields.select_related('search_field')
+        for form_field in form_fields:
+            field = form_field.search_field
+            parameter = field.api_parameter if field.api_parameter != '' else field.field_name
+            if field.field_type == NdrCoreSearchField.FieldType.BOOLEAN_LIST:
+                for choice in field.get_choices_list():
+                    query_fields.append((choice['key'], 'equality'))
+            elif field.field_type in self.EQUALITY_FIELD_TYPES:
+                query_fields.append((parameter, 'equality'))
+            elif field.field_type in self.RANGE_FIELD_TYPES:
+                query_fields.append((parameter, 'range'))
+        return query_fields
+
+    def get_simple_query_mode(self):
+        """Returns the simple query mode of the configuration or None if it has no simple search. """
+        if not self.search_configuration.has_simple_search:
+            return None
+        return self.search_configuration.simple_query_mode
+
+    def get_recommended_indexes(self):
+        """Returns the recommended indexes as lists of (field, direction) tuples. The sort index serves searches
+        without filter and range filters. Each equality field gets an index with the sort keys appended, so
+        the filtered results don't need to be sorted in memory. Simple searches in the text index mode need
+        a text index on the main field (a collection can only have one)."""
+        sort_keys = self.get_sort_keys()
+        indexes = [sort_keys]
+        for parameter, kind in self.get_query_fields():
+            if kind == 'equality' and parameter not in [key for key, _direction in sort_keys]:
+                index = [(parameter, 1)] + sort_keys
+                if index not in indexes:
+                    indexes.append(index)
+        if self.get_simple_query_mode() == NdrCoreSearchConfiguration.SimpleQueryMode.TEXT:
+            indexes.append([(self.search_configuration.simple_query_main_field, pymongo.TEXT)])
+        return indexes
+
+    def get_unindexable_fields(self):
+        """Returns the parameters which are queried with unanchored, case-insensitive regular expressions.
+        These queries scan the whole result set, an index does not help. This includes the main field of
+        simple searches in the regular expression mode."""
+        fields = [parameter for parameter, kind in self.get_query_fields() if kind == 'range']
+        main_field = self.search_configuration.simple_query_main_field
+        if self.get_simple_query_mode() == NdrCoreSearchConfiguration.SimpleQueryMode.REGEX and \
+                main_field not in fields:
+            fields.append(main_field)
+        return fields
+
+    def get_existing_indexes(self):
+        """Returns the existing indexes of the collection as dict of name: list of (field, direction) tuples.
+        The internal keys of a text index are replaced by its fields with the direction 'text'."""
+        existing_indexes = {}
+        for name, info in self.collection.index_information().items():
+            index = []
+            for key, direction in info['key']:
+                if key == '_fts':
+                    index.extend((field, pymongo.TEXT) for field in info.get('weights', {}))
+                elif key != '_ftsx':
+                    index.append((key, direction))
+            existing_indexes[name] = index
+        return existing_indexes
+
+    @staticmethod
+    def is_covered_by(index, existing_index):
+        """Returns True if an existing index can be used instead of an index. This is the case if the index is a
+        prefix of the existing index, with the same or all inverted directions. A text index is covered by a
+        text index which contains all its fields, in any order."""
+        text_fields = {key for key, direction in index if direction == pymongo.TEXT}
+        if len(text_fields) > 0:
+            return text_fields <= {key for key, direction in existing_index if direction == pymongo.TEXT}
+        if len(index) > len(existing_index):
+            return False
+        prefix = existing_index[:len(index)]
+        inverted = [(key, -direction if isinstance(direction, int) else direction) for key, direction in index]
+        return prefix == index or prefix == inverted
+
+    def get_missing_indexes(self):
+        """Returns the recommended indexes which are not covered by an existing index. """
+        existing_indexes = list(self.get_existing_indexes().values())
+        return [index for index in self.get_recommended_indexes()
+                if not any(self.is_covered_by(index, existing) for existing in existing_indexes)]
+
+    @staticmethod
+    def get_index_name(index):
+        """Returns the name of an index created by NDR Core. Text indexes are named like the ones of the
+        ndr_create_text_index command."""
+        if index[0][1] == pymongo.TEXT:
+            return "ndr_core_text_" + "_".join(key for key, _direction in index)
+        return "ndr_core_" + "_".join(f"{key}_{direction}" for key, direction in index)
+
+    def create_index(self, index):
+        """Creates an index and returns its name. """
+        return self.collection.create_index(index, name=self.get_index_name(index))
+
+    def get_collection_scans(self, statistic_entries):
+        """Explains the queries logged in the search statistics and returns those which would scan the whole
+        collection. Entries which can't be parsed (e.g. truncated queries) are skipped.
+
+        :param statistic_entries: Iterable of NdrCoreSearchStatisticEntry objects.
+        :return: List of (query, number of searches) tuples."""
+        scans = {}
+        explained = {}
+        for entry in statistic_entries:
+            query = self.parse_statistic_query(entry.search_query)
+            if query is None:
+                continue
+
+            query_key = repr(query['filter'])
+            if query_key not in explained:
+                explained[query_key] = self.is_collection_scan(self.explain(query))
+            if explained[query_key]:
+                scans.setdefault(query_key, [query['filter'], 0])[1] += 1
+
+        return [(query_filter, count) for query_filter, count in scans.values()]
+
+    @staticmethod
+    def parse_statistic_query(search_query):
+        """Returns the query dict of a logged search or None if it can't be parsed. """
+        try:
+            query = ast.literal_eval(search_query)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+        if not isinstance(query, dict) or not isinstance(query.get('filter'), dict) or query.get('type') == 'single':
+            return None
+        return query
+
+    def explain(self, query):
+        """Returns the query plan of a query without executing it. """
+        command = {'find': self.collection.name, 'filter': query['filter']}
+        if 'sort' in query:
+            command['sort'] = dict(query['sort'])
+        return self.collection.database.command('explain', command, verbosity='queryPlanner')
+
+    @staticmethod
+    def is_collection_scan(explanation):
+        """Returns True if the winning plan of an explanation contains a collection scan. """
+        stages = [explanation.get('queryPlanner', {}).get('winningPlan', {})]
+        while len(stages) > 0:
+            stage = stages.pop()
+            if stage.get('stage') == 'COLLSCAN':
+                return True
+            if 'inputStage' in stage:
+                stages.append(stage['inputStage'])
+            stages.extend(stage.get('inputStages', []))
+            if 'queryPlan' in stage:
+                stages.append(stage['queryPlan'])
+        return False
@@ -1,15 +1,25 @@
 """Implementation of the mongo DB API. """
-from ndr_core.models import NdrCoreSearchField
+import re
+
+from ndr_core.models import NdrCoreSearchField, NdrCoreSearchConfiguration
 from ndr_core.api.base_query import BaseQuery
+from ndr_core.search_plan import get_search_plan
 
 
 class MongoDBQuery(BaseQuery):
     """Implementation of the mongo DB API. """
 
     def get_simple_query(self, search_term, add_page_and_size=True, and_or='and'):
-        """ Not Implemented """
+        """Returns a query which searches the main field for the words of the search term. Depending on the
+        simple query mode, a regular expression or the text index of the collection is used."""
+
+        self.search_term = search_term
+        search_words = search_term.split()
+        if self.search_config.simple_query_mode == NdrCoreSearchConfiguration.SimpleQueryMode.TEXT:
+            return self.get_text_query(search_words, and_or)
 
-        search_words = search_term.split(' ')
+        # The words are escaped, so user input can't alter the regular expression.
+        search_words = [re.escape(word) for word in search_words]
         if and_or == 'and':
             regex_string = '^(?=.*' + ')(?=.*'.join(search_words) + ')'
         else:
@@ -22,7 +32,32 @@ class MongoDBQuery(BaseQuery):
                     '$options': 'msi'
                 }
             },
-            'sort': list({self.search_config.sort_field: 1}.items()),
+            'sort': self.get_sort(),
+            'projection': self.get_projection(),
+            'page': int(self.page)
+        }
+        return query
+
+    def get_text_query(self, search_words, and_or='and'):
+        """Returns a query which searches the text index of the collection. Results are sorted by relevance.
+        In 'and' mode, each word is quoted, which makes $text match documents containing all words."""
+
+        # Quotes and leading minus signs have a meaning in $text searches and are removed from the words.
+        search_words = [word.replace('"', '').lstrip('-') for word in search_words]
+        search_words = [word for word in search_words if word != '']
+        if and_or == 'and':
+            text_search = ' '.join(f'"{word}"' for word in search_words)
+        else:
+            text_search = ' '.join(search_words)
+
+        projection = self.get_projection()
+        if projection is not None:
+            projection['score'] = {'$meta': 'textScore'}
+
+        query = {
+            'filter': {'$text': {'$search': text_search}},
+            'sort': [('score', {'$meta': 'textScore'})] + self.get_sort(),
+            'projection': projection,
             'page': int(self.page)
         }
         return query
@@ -30,7 +65,8 @@ class MongoDBQuery(BaseQuery):
     def get_advanced_query(self, *kwargs):
         query = {
             'filter': {},
-            'sort': list({self.search_config.sort_field: 1}.items()),
+            'sort': self.get_sort(),
+            'projection': self.get_projection(),
             'page': int(self.page)
         }
 
@@ -83,6 +119,44 @@ class MongoDBQuery(BaseQuery):
         #print(query)
         return query
 
+    def get_sort(self):
+        """Returns the sort specification of the query. For keyset pagination, the id field is added as a
+        tie-breaker, so the order of the documents is unique."""
+        direction = -1 if self.search_config.sort_order == 'desc' else 1
+        sort = [(self.search_config.sort_field, direction)]
+        if self.search_config.use_keyset_pagination and \
+                self.search_config.search_id_field != self.search_config.sort_field:
+            sort.append((self.search_config.search_id_field, direction))
+        return sort
+
+    def get_projection(self):
+        """Returns a projection which contains the fields rendered in the result list: the variables of the
+        result card fields, the citation and manifest expressions, the id and sort fields.
+        Returns None (all fields) if no result card is configured or an expression can't be parsed."""
+        search_plan = get_search_plan(self.search_config)
+        if not search_plan.has_card_fields or search_plan.expression_variables is None:
+            return None
+
+        paths = {self.search_config.search_id_field, self.search_config.sort_field}
+        if self.search_config.repository_url is not None:
+            paths.add('source.collection')
+
+        for variable_keys in search_plan.expression_variables:
+            # List indexes can't be projected, so the path ends before the first numeric key.
+            keys = []
+            for key in variable_keys:
+                if key.isdigit():
+                    break
+                keys.append(key)
+            paths.add('.'.join(keys))
+
+        # A path and its sub-paths collide in a projection. The parent path contains the sub-paths.
+        projection = {}
+        for path in sorted(paths):
+            if path != '' and not any(path.startswith(f"{parent}.") for parent in projection):
+                projection[path] = 1
+        return projection
+
     def get_list_query(self, list_name, add_page_and_size=True, search_term=None, tags=None):
         """ Not Implemented """
         return None
@@ -93,8 +167,17 @@ class MongoDBQuery(BaseQuery):
         return record_query
 
     def get_explain_query(self, search_type):
-        """ Not Implemented """
-        return None
+        """Returns a simple or advanced query which returns the query plan instead of the documents.
+        List queries are not supported."""
+        if search_type == BaseQuery.Q_SIMPLE:
+            query = self.get_simple_query(self.search_term, and_or=self.and_or)
+        elif search_type == BaseQuery.Q_ADVANCED:
+            query = self.get_advanced_query()
+        elif search_type == BaseQuery.Q_LIST:
+            return None
+        else:
+            raise ValueError('search_type must be one of SIMPLE, ADVANCED, LIST')
+        return dict(query, type='explain')
 
     def set_value(self, field_name, value):
         """Sets a value=key setting to compose a query from"""
@@ -1,32 +1,50 @@
 """Implementation of the MongoDBResult class. """
+import base64
+import binascii
 import json
+from concurrent import futures
 
-import pymongo
 import pymongo.errors
 from bson import json_util
+from bson.errors import BSONError
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 from ndr_core.api.base_result import BaseResult
-from ndr_core.utils import get_nested_value
+from ndr_core.api.mongodb.bson_converter import to_json_safe
+from ndr_core.api.mongodb.mongodb_client import get_mongo_collection, get_query_executor
+from ndr_core.api.result_cache import get_result_cache_key
+from ndr_core.models import NdrCoreSearchConfiguration, NdrCoreSearchField
+from ndr_core.ndr_settings import NdrSettings
+from ndr_core.search_plan import get_search_plan
+from ndr_core.utils import compile_path, get_nested_value
 
 
 class MongoDBResult(BaseResult):
     """Implementation of the mongo DB API. """
 
+    def __init__(self, search_configuration, query, request):
+        super().__init__(search_configuration, query, request)
+
+        # With keyset pagination, the cursor of the requested page is part of the query
+        # (and therefore of the result cache key). Cursors for other pages are ignored.
+        if self.uses_keyset_pagination() and request is not None:
+            cursor = self.decode_cursor(request.GET.get('cursor'))
+            if cursor is not None and cursor['page'] == query.get('page') and \
+                    (cursor['values'] is None or len(cursor['values']) == len(query['sort'])):
+                self.query = dict(query, cursor=cursor)
+
     def download_result(self):
         """Retrieves the result from the MongoDB."""
 
         try:
-            # Get the connection string and collection from the configuration
-            connection_string_arr = self.search_configuration.api_connection_url.split('/')
-            connection_string = '/'.join(connection_string_arr[:-1])
-            db_client = pymongo.MongoClient(connection_string, serverSelectionTimeoutMS=2000)
-            collection = db_client[connection_string_arr[-2]][connection_string_arr[-1]]
+            # Get the collection from the configuration. The client is shared between searches.
+            collection = get_mongo_collection(self.search_configuration)
 
             # If the query is a single document, return the raw result to be downloaded.
             if 'type' in self.query and self.query['type'] == 'single':
                 my_document = collection.find_one(filter=self.query['filter'])
-                self.raw_result = json.loads(json_util.dumps(my_document))
+                self.raw_result = to_json_safe(my_document)
                 return
 
             # Check if the page number is specified, otherwise set it to 0
@@ -35,34 +53,103 @@ class MongoDBResult(BaseResult):
             except KeyError:
                 self.page = 0
 
-            # Calculate the number of documents to skip in order to get the correct list. Size of the list is page_size
-            # and the page number is 1-based.
-            skip = self.page * self.page_size - self.page_size
+            cursor = self.query.get('cursor')
+            if cursor is not None:
+                # Keyset pagination: Select the documents after (or before) the cursor. No documents are skipped.
+                query_filter, sort, limit = self.get_keyset_query(cursor)
+                skip = 0
+            else:
+                # Calculate the number of documents to skip in order to get the correct list.
+                # Size of the list is page_size and the page number is 1-based.
+                query_filter, sort, limit = self.query['filter'], self.query['sort'], self.page_size
+                skip = self.page * self.page_size - self.page_size
+
+            # Only the rendered fields are retrieved, unless the full records are requested.
+            projection = None if self.full_records else self.query.get('projection')
+
+            # Queries running longer than the timeout (in seconds) are stopped by the server.
+            timeout = getattr(settings, 'NDR_CORE_MONGO_QUERY_TIMEOUT', 10)
+            max_time_ms = int(timeout * 1000)
+
+            # If the query is to be explained, return the query plan and execution statistics of the search.
+            if self.query.get('type') == 'explain':
+                self.raw_result = to_json_safe(self.explain(collection, query_filter, sort, skip, limit, projection))
+                return
+
+            if self.search_configuration.use_facet_pipeline and not self.full_records:
+                # Retrieve the documents, the total and the facet counts with one aggregation
+                hits, total_count, total_is_approximate, facets = self.aggregate_with_facets(
+                    collection, query_filter, sort, skip, limit, projection, max_time_ms)
+            else:
+                def find():
+                    # Retrieve the documents from the collection and convert them to JSON-safe dictionaries
+                    my_document = collection.find(filter=query_filter,
+                                                  projection=projection,
+                                                  sort=sort,
+                                                  skip=skip,
+                                                  limit=limit,
+                                                  max_time_ms=max_time_ms)
+                    return [to_json_safe(hit) for hit in my_document]
 
-            # Retrieve the documents from the collection
-            my_document = collection.find(filter=self.query['filter'],
-                                          sort=self.query['sort'],
-                                          skip=skip,
-                                          limit=self.page_size)
+                # The documents and the total number of documents are retrieved concurrently
+                executor = get_query_executor()
+                find_future = executor.submit(find)
+                count_future = executor.submit(self.count_documents, collection, max_time_ms)
+                _done, not_done = futures.wait([find_future, count_future], timeout=timeout)
+                if len(not_done) > 0:
+                    for future in not_done:
+                        future.cancel()
+                    self.error = _("The search took too long")
+                    self.error_code = BaseResult.QUERY_TIMEOUT
+                    return
 
-            # Convert the documents to a list of dictionaries
-            hits = []
-            for hit in my_document:
-                hit = json.loads(json_util.dumps(hit))
-                hits.append(hit)
+                hits = find_future.result()
+                total_count, total_is_approximate = count_future.result()
+                facets = []
 
-            # Get the total number of documents in the result
-            total_count = collection.count_documents(self.query['filter'])
+            # Documents before the cursor are retrieved in reverse order.
+            if cursor is not None and cursor['direction'] == 'before':
+                hits.reverse()
 
             # Create the raw result
             self.raw_result = {
                 "total": total_count,
+                "total_is_approximate": total_is_approximate,
                 "page": self.page,
-                "hits": hits
+                "hits": hits,
+                "facets": facets
             }
 
         except pymongo.errors.ServerSelectionTimeoutError:
             self.error = _("Timed out")
+            self.error_code = BaseResult.TIMEOUT
+        except pymongo.errors.ConnectionFailure:
+            # The connection to the server was lost or a network operation timed out.
+            self.error = _("Query could not be requested")
+            self.error_code = BaseResult.REQUEST
+        except pymongo.errors.ExecutionTimeout:
+            # The server stopped the query after max_time_ms.
+            self.error = _("The search took too long")
+            self.error_code = BaseResult.QUERY_TIMEOUT
+        except pymongo.errors.OperationFailure:
+            # The server rejected the query (e.g. a resource limit was exceeded).
+            self.error = _("The search could not be executed")
+            self.error_code = BaseResult.SERVER
+
+    def explain(self, collection, query_filter, sort, skip, limit, projection):
+        """Returns the query plan and execution statistics of the search. If the search runs as an aggregation
+        with facets, the aggregation pipeline is explained, otherwise the find."""
+        if self.search_configuration.use_facet_pipeline and not self.full_records:
+            pipeline = self.get_facet_pipeline(query_filter, sort, skip, limit, projection, self.get_facet_fields())
+            # pymongo doesn't accept the explain option for aggregate(), the explain command is used instead.
+            return collection.database.command('explain',
+                                               {'aggregate': collection.name,
+                                                'pipeline': pipeline,
+                                                'cursor': {},
+                                                'allowDiskUse': True},
+                                               verbosity='executionStats')
+        return collection.find(filter=query_filter, projection=projection, sort=sort,
+                               skip=skip, limit=limit).explain()
 
     def save_raw_result(self, text):
         """ Normally this would save the raw result to a json object.
@@ -78,6 +165,7 @@ class MongoDBResult(BaseResult):
             self.total = 0
         if "page" in self.raw_result:
             self.page = self.raw_result["page"]
+        self.total_is_approximate = self.raw_result.get("total_is_approximate", False)
 
         self.num_pages = self.total // self.page_size
         if self.total % self.page_size > 0:
@@ -86,6 +174,315 @@ class MongoDBResult(BaseResult):
     def fill_results(self):
         if "hits" in self.raw_result:
             self.results = self.raw_result['hits']
+        if len(self.raw_result.get("facets", [])) > 0:
+            self.facets = self.create_facet_links(self.raw_result["facets"])
+
+    def count_documents(self, collection, max_time_ms=None):
+        """Counts the documents matching the filter according to the count strategy of the search configuration.
+
+        :param collection: The collection to count the documents in.
+        :param max_time_ms: Maximum execution time of the count on the server. No limit if None.
+        :return: Tuple of (total, total_is_approximate)"""
+        strategy = self.search_configuration.count_strategy
+        query_filter = self.query['filter']
+        options = {} if max_time_ms is None else {'maxTimeMS': max_time_ms}
+
+        if strategy == NdrCoreSearchConfiguration.CountStrategy.CAPPED:
+            limit = self.get_count_limit()
+            total = collection.count_documents(query_filter, limit=limit + 1, **options)
+            if total > limit:
+                return limit, True
+            return total, False
+
+        total = self.get_precounted_total(collection, max_time_ms)
+        if total is None:
+            total = collection.count_documents(query_filter, **options)
+            self.set_cached_total(total)
+        return total, False
+
+    def get_precounted_total(self, collection, max_time_ms=None):
+        """Returns the total if the count strategy provides it without counting the matching documents: the
+        cached count ('cached') or the estimated count of a search without filter ('estimated').
+        Returns None otherwise."""
+        strategy = self.search_configuration.count_strategy
+        if strategy == NdrCoreSearchConfiguration.CountStrategy.CACHED:
+            return NdrSettings.get_cache().get(self.get_count_cache_key())
+        if strategy == NdrCoreSearchConfiguration.CountStrategy.ESTIMATED and len(self.query['filter']) == 0:
+            options = {} if max_time_ms is None else {'maxTimeMS': max_time_ms}
+            return collection.estimated_document_count(**options)
+        return None
+
+    def set_cached_total(self, total):
+        """Caches an exact total if the count strategy is 'cached'. """
+        if self.search_configuration.count_strategy == NdrCoreSearchConfiguration.CountStrategy.CACHED:
+            NdrSettings.get_cache().set(self.get_count_cache_key(), total,
+                                        timeout=self.search_configuration.count_cache_ttl)
+
+    def get_count_cache_key(self):
+        """Returns the key of the cached total of the filter. """
+        return get_result_cache_key(self.search_configuration, {'count': self.query['filter']}, None)
+
+    def get_count_limit(self):
+        """Returns the number up to which documents are counted with the 'capped' count strategy, None otherwise.
+        Documents are counted at least up to the page after the current one, so a further page is always
+        detected and the next page link stays available."""
+        if self.search_configuration.count_strategy != NdrCoreSearchConfiguration.CountStrategy.CAPPED:
+            return None
+        return max(self.search_configuration.count_limit, (self.page + 1) * self.page_size)
+
+    def get_facet_fields(self):
+        """Returns the search fields of the configuration which get facet counts: lists, multi lists and
+        boolean lists."""
+        return [form_field for form_field in get_search_plan(self.search_configuration).form_fields
+                if form_field.is_choice_field()]
+
+    def get_facet_pipeline(self, query_filter, sort, skip, limit, projection, facet_fields, count_total=True):
+        """Returns an aggregation pipeline which retrieves the page of documents, the total and the number of
+        documents per choice of each facet field in a single $facet stage. The total is left out if
+        count_total is False."""
+        hits_pipeline = []
+        if query_filter is not self.query['filter']:
+            hits_pipeline.append({'$match': query_filter})
+        hits_pipeline += [{'$sort': dict(sort)}, {'$skip': skip}, {'$limit': limit}]
+        if projection is not None:
+            hits_pipeline.append({'$project': projection})
+
+        facets = {'hits': hits_pipeline}
+        if count_total:
+            total_pipeline = [{'$count': 'count'}]
+            count_limit = self.get_count_limit()
+            if count_limit is not None:
+                total_pipeline.insert(0, {'$limit': count_limit + 1})
+            facets['total'] = total_pipeline
+
+        for number, field in enumerate(facet_fields):
+            choices = field.get_choices_list()
+            if field.field_type == NdrCoreSearchField.FieldType.BOOLEAN_LIST:
+                # Each choice is a field of its own. The documents with the value of the choice's condition are counted.
+                counts = {}
+                for choice_number, choice in enumerate(choices):
+                    condition = str(choice['condition']).lower() == 'true'
+                    counts[f"c{choice_number}"] = {'$sum': {'$cond': [{'$eq': [f"${choice['key']}", condition]}, 1, 0]}}
+                facets[f"facet_{number}"] = [{'$group': {'_id': None, **counts}}]
+            else:
+                parameter = field.api_parameter if field.api_parameter != '' else field.field_name
+                keys = [self.get_facet_key(field, choice['key']) for choice in choices]
+                facets[f"facet_{number}"] = [{'$unwind': f"${parameter}"},
+                                             {'$match': {parameter: {'$in': keys}}},
+                                             {'$sortByCount': f"${parameter}"}]
+
+        return [{'$match': self.query['filter']}, {'$facet': facets}]
+
+    @staticmethod
+    def get_facet_key(field, key):
+        """Returns a choice key with the type it has in the documents."""
+        if field.data_field_type == 'int':
+            try:
+                return int(key)
+            except ValueError:
+                return key
+        return key
+
+    def aggregate_with_facets(self, collection, query_filter, sort, skip, limit, projection, max_time_ms=None):
+        """Retrieves the page of documents, the total and the facet counts with one aggregation.
+        The documents are sorted within the $facet stage, which can't use an index. The sort may therefore
+        exceed the memory limit of the server on large result sets and is allowed to use the disk.
+        The total is counted in the aggregation, unless the count strategy provides it otherwise
+        (see get_precounted_total).
+
+        :return: Tuple of (hits, total, total_is_approximate, facets)"""
+        facet_fields = self.get_facet_fields()
+        precounted_total = self.get_precounted_total(collection, max_time_ms)
+        pipeline = self.get_facet_pipeline(query_filter, sort, skip, limit, projection, facet_fields,
+                                           count_total=precounted_total is None)
+        options = {'allowDiskUse': True}
+        if max_time_ms is not None:
+            options['maxTimeMS'] = max_time_ms
+        output = next(collection.aggregate(pipeline, **options), {})
+
+        hits = [to_json_safe(hit) for hit in output.get('hits', [])]
+        total_is_approximate = False
+        if precounted_total is not None:
+            total = precounted_total
+        else:
+            total = output['total'][0]['count'] if len(output.get('total', [])) > 0 else 0
+            self.set_cached_total(total)
+            count_limit = self.get_count_limit()
+            if count_limit is not None and total > count_limit:
+                total, total_is_approximate = count_limit, True
+
+        facets = []
+        for number, field in enumerate(facet_fields):
+            facet_output = output.get(f"facet_{number}", [])
+            choices = field.get_choices_list()
+            if field.field_type == NdrCoreSearchField.FieldType.BOOLEAN_LIST:
+                group = facet_output[0] if len(facet_output) > 0 else {}
+                counts = {str(choice['key']): group.get(f"c{choice_number}", 0)
+                          for choice_number, choice in enumerate(choices)}
+            else:
+                counts = {str(count['_id']): count['count'] for count in facet_output}
+
+            values = []
+            for choice, (form_value, label) in zip(choices, field.get_choices()):
+                count = counts.get(str(choice['key']), 0)
+                if count > 0:
+                    values.append({'value': form_value, 'label': str(label), 'count': count})
+            facets.append({'field_name': field.field_name,
+                           'label': field.field_label,
+                           'is_multi': field.is_multi_field(),
+                           'values': values})
+        return hits, total, total_is_approximate, facets
+
+    def create_facet_links(self, facets):
+        """Adds a link to each facet value which refines the current search with the value. """
+        linked_facets = []
+        for facet in facets:
+            parameter = f"{self.search_configuration.conf_name}_{facet['field_name']}"
+            selected_values = self.request.GET.getlist(parameter)
+            values = []
+            for value in facet['values']:
+                params = self.request.GET.copy()
+                for excluded_param in self.get_pagination_excluded_params():
+                    params.pop(excluded_param, None)
+                if facet['is_multi']:
+                    if value['value'] not in selected_values:
+                        params.appendlist(parameter, value['value'])
+                else:
+                    params[parameter] = value['value']
+                values.append(dict(value,
+                                   url=f"{self.request.path}?{params.urlencode()}",
+                                   selected=value['value'] in selected_values))
+            linked_facets.append(dict(facet, values=values))
+        return linked_facets
+
+    def get_logged_query(self):
+        """Returns the query as it is logged in the search statistics. Only the filter and the sort are logged,
+        the projection and the cursor would exceed the length of the field."""
+        return self.truncate_logged_query({key: self.query[key] for key in ('filter', 'sort') if key in self.query})
+
+    def get_cache_key(self):
+        """Full records are cached separately from the projected records of the result list. """
+        if self.full_records and self.query.get('projection') is not None:
+            return get_result_cache_key(self.search_configuration, dict(self.query, projection=None), self.page_size)
+        return super().get_cache_key()
+
+    def get_keyset_query(self, cursor):
+        """Returns the filter, sort and limit to retrieve the page of a cursor.
+        An 'after' cursor selects the documents which sort after its values. A 'before' cursor selects the documents
+        which sort before its values (or the last documents if it has no values) in reverse order.
+
+        :param cursor: The decoded cursor.
+        :return: Tuple of (filter, sort, limit)"""
+        sort = self.query['sort']
+        if cursor['direction'] == 'before':
+            sort = [(field, -direction) for field, direction in sort]
+
+        if cursor['values'] is None:
+            limit = cursor.get('limit')
+            if not isinstance(limit, int) or not 0 < limit <= self.page_size:
+                limit = self.page_size
+            return self.query['filter'], sort, limit
+
+        # The values are stored as extended JSON and need to be converted back to BSON types
+        values = json_util.loads(json.dumps(cursor['values']))
+        range_filter = []
+        equal_filter = {}
+        for (field, direction), value in zip(sort, values):
+            operator = '$gt' if direction == 1 else '$lt'
+            range_filter.append({**equal_filter, field: {operator: value}})
+            equal_filter[field] = value
+
+        return {'$and': [self.query['filter'], {'$or': range_filter}]}, sort, self.page_size
+
+    def uses_keyset_pagination(self):
+        """Returns True if the next and previous pages are selected with cursors. This needs a list query which is
+        sorted by plain fields only (text searches are sorted by relevance)."""
+        return self.search_configuration.use_keyset_pagination and isinstance(self.query, dict) and \
+            'sort' in self.query and all(direction in (1, -1) for _field, direction in self.query['sort'])
+
+    def get_pagination_excluded_params(self):
+        """The cursor of the current page is not copied to the pagination links. """
+        return super().get_pagination_excluded_params() + ['cursor']
+
+    def get_page_link_params(self, page):
+        """With keyset pagination, the links to the next, previous and last page carry a cursor.
+        Links to other pages skip documents."""
+        params = super().get_page_link_params(page)
+        if not self.uses_keyset_pagination() or len(self.results) == 0 or not page.isdigit():
+            return params
+
+        page = int(page)
+        cursor = None
+        if page == self.page + 1:
+            cursor = self.create_cursor(page, 'after', self.results[-1])
+        elif page == self.page - 1:
+            cursor = self.create_cursor(page, 'before', self.results[0])
+        elif page == self.num_pages and page > 1 and not self.total_is_approximate:
+            cursor = {'page': page, 'direction': 'before', 'values': None,
+                      'limit': self.total - (self.num_pages - 1) * self.page_size}
+
+        if cursor is None:
+            return params
+        return f"{params}&cursor={self.encode_cursor(cursor)}"
+
+    def create_cursor(self, page, direction, hit):
+        """Creates a cursor from the sort values of a hit. Returns None if a sort value of the hit is missing or
+        not a single value, in which case the page is retrieved by skipping documents."""
+        values = []
+        for field, _direction in self.query['sort']:
+            try:
+                value = compile_path(field).resolve(hit)
+            except (KeyError, IndexError, TypeError):
+                return None
+            if value is None or not self.is_cursor_value(value):
+                return None
+            values.append(value)
+        return {'page': page, 'direction': direction, 'values': values}
+
+    @staticmethod
+    def is_cursor_value(value):
+        """Returns True if a value can be part of a cursor: a plain scalar or an ObjectId or date in extended
+        JSON. Anything else could inject query operators into the keyset filter."""
+        if isinstance(value, (str, int, float)):
+            return True
+        if not isinstance(value, dict) or len(value) != 1:
+            return False
+        if isinstance(value.get('$oid'), str):
+            return True
+        date = value.get('$date')
+        return isinstance(date, (str, int)) or \
+            (isinstance(date, dict) and list(date) == ['$numberLong'] and isinstance(date['$numberLong'], str))
+
+    @staticmethod
+    def encode_cursor(cursor):
+        """Encodes a cursor to an URL safe token."""
+        cursor_json = json.dumps(cursor, separators=(',', ':'))
+        return base64.urlsafe_b64encode(cursor_json.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(token):
+        """Decodes a cursor token. Returns None if the token is missing or invalid."""
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        except (ValueError, binascii.Error):
+            return None
+
+        if not isinstance(cursor, dict) or cursor.get('direction') not in ('after', 'before') or \
+                not isinstance(cursor.get('page'), int) or \
+                not (cursor.get('values') is None or isinstance(cursor.get('values'), list)):
+            return None
+
+        if cursor['values'] is not None:
+            if not all(value is not None and MongoDBResult.is_cursor_value(value) for value in cursor['values']):
+                return None
+            # The extended JSON must convert to BSON values (e.g. an ObjectId needs 24 hex digits)
+            try:
+                json_util.loads(json.dumps(cursor['values']))
+            except (ValueError, TypeError, BSONError):
+                return None
+        return cursor
 
     def get_id_value(self, result):
         """ Overwrite the default get_id_value method to get the id from the result. """
@@ -14,17 +14,20 @@ class FieldConfiguration:
     user_condition = None
     """The user defined condition of a list field. (and/or)"""
 
-    def __init__(self, field_name, value):
+    def __init__(self, field_name, value, field=None):
         """Loads the corresponding field configuration from the search configuration and sets the value
         with al its manipulations.
 
         :param field_name: The name of the field.
-        :param value: The value of the field."""
-        try:
-            self.field = NdrCoreSearchField.objects.get(field_name=field_name)
-            self.set_value(value)
-        except NdrCoreSearchField.DoesNotExist:
-            raise ValueError(f"Field {field_name} does not exist.")
+        :param value: The value of the field.
+        :param field: The already loaded NdrCoreSearchField. It is loaded by its name if omitted."""
+        if field is None:
+            try:
+                field = NdrCoreSearchField.objects.get(field_name=field_name)
+            except NdrCoreSearchField.DoesNotExist:
+                raise ValueError(f"Field {field_name} does not exist.")
+        self.field = field
+        self.set_value(value)
 
     def set_value(self, value):
         """Sets the value of the field and applies the specified type.
@@ -7,6 +7,8 @@ class NdrCoreQuery(BaseQuery):
 
     def __init__(self, search_configuration, page=1):
         super().__init__(search_configuration, page)
+        self.list_name = None
+        self.tags = None
 
     def get_simple_query(self, search_term, add_page_and_size=True, and_or='and'):
         self.search_term = search_term
@@ -24,14 +26,19 @@ class NdrCoreQuery(BaseQuery):
         else:
             param_divider = '?'
 
+        search_fields = self.get_search_fields()
         for field_name in self.values:
-            field = NdrCoreSearchField.objects.get(field_name=field_name)
+            field = search_fields[field_name]
+            if field is None:
+                raise NdrCoreSearchField.DoesNotExist(f"Field {field_name} does not exist.")
             query += f"{param_divider}{field.api_parameter}={self.values[field_name]}"
             param_divider = '&'
         return query
 
     def get_list_query(self, list_name, add_page_and_size=True, search_term=None, tags=None):
         self.search_term = search_term
+        self.list_name = list_name
+        self.tags = tags
         query = self.get_ndr_base_string("list", add_page_and_size=add_page_and_size)
 
         if add_page_and_size:
@@ -55,14 +62,15 @@ class NdrCoreQuery(BaseQuery):
 
     def get_explain_query(self, search_type):
         if search_type == BaseQuery.Q_SIMPLE:
-            query = self.get_simple_query(self.search_term, add_page_and_size=False)
-            query.replace('query/basic', 'query/basic_explain')
+            query = self.get_simple_query(self.search_term, add_page_and_size=False, and_or=self.and_or)
+            query = query.replace('query/basic', 'query/basic_explain')
         elif search_type == BaseQuery.Q_ADVANCED:
             query = self.get_advanced_query(add_page_and_size=False)
-            query.replace('query/advanced', 'query/advanced_explain')
+            query = query.replace('query/advanced', 'query/advanced_explain')
         elif search_type == BaseQuery.Q_LIST:
-            query = self.get_advanced_query(add_page_and_size=False)
-            query.replace('query/list', 'query/list_explain')
+            query = self.get_list_query(self.list_name, add_page_and_size=False,
+                                        search_term=self.search_term, tags=self.tags)
+            query = query.replace('query/list', 'query/list_explain')
         else:
             raise ValueError('search_type must be one of SIMPLE, ADVANCED, LIST')
         return query
@@ -0,0 +1,110 @@
+"""Cache for downloaded search results. Identical searches (same search configuration, query, page size and
+language) are answered from the cache instead of the API. The cache has two tiers: a size-bounded LRU cache
+in the memory of each process and the django cache (see NdrSettings.get_cache()) which can be shared
+between processes."""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+from ndr_core.ndr_settings import NdrSettings
+
+
+def get_result_cache_key(search_configuration, query, page_size):
+    """Returns a canonical cache key for a query. Query strings and query dicts are both supported.
+    Dict keys are sorted, so two filter dicts with the same content produce the same key.
+
+    :param search_configuration: The search configuration the query is sent with.
+    :param query: The query as string (URL) or dict (MongoDB filter).
+    :param page_size: The page size of the result.
+    :return: A string to be used as cache key."""
+    canonical_query = json.dumps({'query': query,
+                                  'page_size': page_size,
+                                  'language': get_language()},
+                                 sort_keys=True, separators=(',', ':'), default=str)
+    query_hash = hashlib.sha256(canonical_query.encode('utf-8')).hexdigest()
+    return f"ndr_core:result:{search_configuration.conf_name}:{query_hash}"
+
+
+class ResultCache:
+    """Two-tier cache for raw search results. Values are stored in a local LRU cache and in the django cache.
+    Cached raw results are shared between result objects and must be treated as read-only."""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns a cached value or None if the key is not cached or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.local_hits += 1
+                    return value
+                del self._entries[key]
+
+        shared_entry = NdrSettings.get_cache().get(key)
+        if shared_entry is not None:
+            expires, value = shared_entry
+            remaining = expires - time.time()
+            if remaining > 0:
+                self._set_local(key, value, remaining)
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, ttl):
+        """Caches a value for ttl seconds in both tiers."""
+        if ttl <= 0:
+            return
+        self._set_local(key, value, ttl)
+        NdrSettings.get_cache().set(key, (time.time() + ttl, value), timeout=ttl)
+
+    def _set_local(self, key, value, ttl):
+        """Stores a value in the local tier and evicts the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Empties the local tier and resets the counters. The django cache is not touched."""
+        with self._lock:
+            self._entries.clear()
+            self.local_hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+    def get_statistics(self):
+        """Returns the hit and miss counters of this process."""
+        with self._lock:
+            hits = self.local_hits + self.shared_hits
+            total = hits + self.misses
+            return {'local_hits': self.local_hits,
+                    'shared_hits': self.shared_hits,
+                    'hits': hits,
+                    'misses': self.misses,
+                    'hit_rate': hits / total if total > 0 else 0,
+                    'size': len(self._entries),
+                    'max_size': self.max_size}
+
+
+result_cache = ResultCache(max_size=getattr(settings, 'NDR_CORE_RESULT_CACHE_SIZE', 128))
+"""The result cache of this process."""
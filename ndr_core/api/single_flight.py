@@ -0,0 +1,121 @@
+"""Coalescing of identical concurrent backend queries. If many requests issue the same query at the same time,
+only one of them (the leader) sends it to the backend; the others wait for its outcome. Within a process this is
+done with a registry of in-flight queries. Across processes, a short-lived lock in the django cache elects a
+leader and the others poll the cache for its result. Followers get the outcome of the leader even if it is a
+failure, so a struggling backend isn't hit again by every waiting request at once."""
+import threading
+import time
+
+from django.conf import settings
+
+from ndr_core.ndr_settings import NdrSettings
+
+
+class _Flight:
+    """An in-flight call. Followers wait for its event to be set."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.outcome = None
+        self.error = None
+
+
+class SingleFlight:
+    """Makes sure only one call per key is in flight at any time. """
+
+    POLL_INTERVAL = 0.1
+    """Seconds between two polls of the django cache while another process runs the call."""
+
+    OUTCOME_TIMEOUT = 1
+    """Seconds the outcome of a call stays in the django cache. Long enough for the polling followers to pick
+    it up. Only followers which wait for the lock read it, and a new leader deletes it."""
+
+    def __init__(self, timeout=10, cross_process=True):
+        """:param timeout: Maximum number of seconds a follower waits for the leader.
+        :param cross_process: If True, a lock in the django cache coalesces calls across processes."""
+        self.timeout = timeout
+        self.cross_process = cross_process
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, function, cross_process=None):
+        """Runs function() unless a call with the same key is already in flight, in which case its outcome is
+        returned, whether it is a result or an error. If the leader raises an exception, it is raised in the
+        followers of this process as well. Followers only run the function themselves if the leader times out
+        (or, across processes, if it raised an exception).
+
+        :param key: The canonical key of the call.
+        :param function: Callable without arguments. Its return value is the outcome.
+        :param cross_process: Overrides the cross_process setting of the instance for this call.
+        :return: The outcome of the call."""
+        if cross_process is None:
+            cross_process = self.cross_process
+
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            if not flight.event.wait(self.timeout):
+                return function()
+            if flight.error is not None:
+                raise flight.error
+            return flight.outcome
+
+        try:
+            if cross_process:
+                flight.outcome = self._do_cross_process(key, function)
+            else:
+                flight.outcome = function()
+            return flight.outcome
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+    def _do_cross_process(self, key, function):
+        """Runs function() if this process gets the lock for the key. Otherwise, waits for the process holding
+        the lock to put the outcome into the django cache."""
+        shared_cache = NdrSettings.get_cache()
+        lock_key = f"{key}:flight_lock"
+        outcome_key = f"{key}:flight_outcome"
+
+        if shared_cache.add(lock_key, 1, timeout=self.timeout):
+            try:
+                # The outcome of a previous call must not reach the followers of this one.
+                shared_cache.delete(outcome_key)
+                outcome = function()
+                shared_cache.set(outcome_key, outcome, timeout=self.OUTCOME_TIMEOUT)
+                return outcome
+            finally:
+                shared_cache.delete(lock_key)
+
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+            outcome = shared_cache.get(outcome_key)
+            if outcome is not None:
+                with self._lock:
+                    self.coalesced += 1
+                return outcome
+            if shared_cache.get(lock_key) is None:
+                # The other process finished. Its outcome is either there now or it raised an exception.
+                outcome = shared_cache.get(outcome_key)
+                if outcome is not None:
+                    return outcome
+                break
+        return function()
+
+
+single_flight = SingleFlight(timeout=getattr(settings, 'NDR_CORE_COALESCING_TIMEOUT', 10),
+                             cross_process=getattr(settings, 'NDR_CORE_CROSS_PROCESS_COALESCING', True))
+"""The query coalescing registry of this process."""
@@ -6,3 +6,8 @@ class NdrCoreConfig(AppConfig):
     """NDR Core app configuration."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ndr_core'
+
+    def ready(self):
+        """Connects the signals which invalidate the compiled search plans. """
+        from ndr_core.search_plan import connect_signals   # pylint: disable=import-outside-toplevel
+        connect_signals()
@@ -0,0 +1,82 @@
+"""Cache for the contents of rendered result cards. Rendering a card runs the template strings and filters of all
+its fields, which is repeated for every search a popular record appears in. If NDR_CORE_CARD_CACHE_TIMEOUT is set
+to a number of seconds, the rendered field contents and the citation of each card are stored in the django cache
+(see NdrSettings.get_cache()). The key contains the search configuration, its generation (see search_plan), the
+card group (normal or compact), the language and a hash of the record, so a card is rendered again whenever the
+record or the configuration changes. The header and footer of a card (result number, options) are not cached."""
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+
+from ndr_core.ndr_settings import NdrSettings
+
+
+def get_card_cache_timeout():
+    """Returns the seconds a rendered card is cached. 0 disables the cache."""
+    return getattr(settings, 'NDR_CORE_CARD_CACHE_TIMEOUT', 0)
+
+
+class CardCache:
+    """Cache for the contents of rendered result cards. Counts hits and misses in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(search_plan, card_group, result):
+        """Returns the cache key of the contents of a card or None if the cache is disabled. Only the record
+        (its id and data) is hashed, so a record has the same key in all searches.
+
+        :param search_plan: The SearchPlan of the search configuration.
+        :param card_group: 'normal' or 'compact'.
+        :param result: The result which is rendered into the card.
+        :return: A string to be used as cache key or None."""
+        if get_card_cache_timeout() <= 0:
+            return None
+        record_json = json.dumps([result.get('id'), result['data']], sort_keys=True, separators=(',', ':'),
+                                 default=str)
+        record_hash = hashlib.sha256(record_json.encode('utf-8')).hexdigest()
+        return (f"ndr_core:card:{search_plan.conf_name}:{search_plan.generation}:{card_group}:"
+                f"{search_plan.language}:{record_hash}")
+
+    def get_many(self, keys):
+        """Returns the cached contents of the cards with the given keys as dict. Keys which are None
+        (cache disabled) are ignored. The contents of all cards are retrieved with one cache request."""
+        keys = [key for key in keys if key is not None]
+        if len(keys) == 0:
+            return {}
+        contents = NdrSettings.get_cache().get_many(keys)
+        with self._lock:
+            self.hits += len(contents)
+            self.misses += len(set(keys)) - len(contents)
+        return contents
+
+    @staticmethod
+    def set_many(contents):
+        """Caches the contents of cards, given as dict of key and contents."""
+        if len(contents) == 0:
+            return
+        NdrSettings.get_cache().set_many(contents, timeout=get_card_cache_timeout())
+
+    def clear(self):
+        """Resets the counters. The django cache is not touched."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def get_statistics(self):
+        """Returns the hit and miss counters of this process."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {'enabled': get_card_cache_timeout() > 0,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_rate': self.hits / total if total > 0 else 0}
+
+
+card_cache = CardCache()
+"""The card cache of this process."""
@@ -52,3 +52,17 @@ class NumberRangeField(forms.CharField):
 
         if value is None:
             raise forms.ValidationError(_('Invalid value'))
+
+
+class RemoteMultipleChoiceField(forms.MultipleChoiceField):
+    """Multiple choice field for fields with many choices. The choices are not part of the field (and the page),
+    values are validated against the choice index of the search field."""
+
+    def __init__(self, *args, **kwargs):
+        self.choice_index = kwargs.pop('choice_index')
+        super().__init__(*args, **kwargs)
+        self.widget.choice_index = self.choice_index
+
+    def valid_value(self, value):
+        """Check if value is a choice of the index."""
+        return self.choice_index.get_label(str(value)) is not None
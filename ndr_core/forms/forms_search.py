@@ -1,22 +1,27 @@
 """Form classes for the search."""
+import copy
+import threading
+
 from bootstrap_daterangepicker.fields import DateRangeField
 from bootstrap_daterangepicker.widgets import DateRangeWidget
 from crispy_forms.bootstrap import TabHolder, Tab
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Field, Div, HTML
 from django import forms
-from django.db.models import Max
+from django.conf import settings
+from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _, get_language
 
-from ndr_core.models import NdrCoreTranslation
-from ndr_core.forms.fields import NumberRangeField
+from ndr_core.forms.fields import NumberRangeField, RemoteMultipleChoiceField
 from ndr_core.forms.forms_base import _NdrCoreForm
 from ndr_core.forms.widgets import (
     BootstrapSwitchWidget,
     NdrCoreFormSubmit,
-    FilteredListWidget
+    FilteredListWidget,
+    RemoteFilteredListWidget
 )
+from ndr_core.search_plan import get_search_plan, get_generation, get_choice_index
 
 
 class AdvancedSearchForm(_NdrCoreForm):
@@ -24,6 +29,7 @@ class AdvancedSearchForm(_NdrCoreForm):
     Needs a search config and then creates and configures the form from it."""
 
     search_configs = None
+    blueprint = None
 
     def __init__(self, *args, **kwargs):
         """Initializes all needed form fields for the configured search based on
@@ -32,11 +38,8 @@ class AdvancedSearchForm(_NdrCoreForm):
         if "ndr_page" in kwargs:
             self.ndr_page = kwargs.pop("ndr_page")
 
-        if self.ndr_page is not None:
-            self.search_configs = self.ndr_page.search_configs.all()
-        elif "search_config" in kwargs:
-            self.search_configs = [kwargs.pop("search_config")]
-        else:
+        search_config = kwargs.pop("search_config", None)
+        if self.ndr_page is None and search_config is None:
             raise AttributeError("No Search Config Found")
 
         super().__init__(*args, **kwargs)
@@ -45,22 +48,33 @@ class AdvancedSearchForm(_NdrCoreForm):
         if len(args) > 0:
             self.query_dict = self.query_dict_to_dict(args[0])
 
+        # The fields are copied from the blueprint of the page (or search configuration). Each form
+        # gets its own copies, as form fields are altered when a form is bound and rendered.
+        self.blueprint = get_search_form_blueprint(self.ndr_page, search_config)
+        self.search_configs = self.blueprint.search_configs
+        for field_name, form_field in self.blueprint.fields.items():
+            self.fields[field_name] = copy.deepcopy(form_field)
+
+    @classmethod
+    def create_fields(cls, search_configs):
+        """Creates the form fields of the search configurations. Returns a dict of field name: form field."""
+        fields = {}
+
         # Search Form is composed of different search configurations. Each of them has its own tab.
         # A search configuration may have a simple search tab as well.
-        for search_config in self.search_configs:
+        for search_config in search_configs:
             # If the search configuration has a simple search tab, add the fields to the form.
             if search_config.has_simple_search:
-                self.init_simple_search_fields(search_config)
+                fields.update(cls.get_simple_search_fields(search_config))
 
             # If the search configuration has an advanced search tab, add the fields to the form.
             if search_config.search_has_compact_result:
-                self.fields[
+                fields[
                     f"compact_view_{search_config.conf_name}"
-                ] = self.get_compact_view_field()
+                ] = cls.get_compact_view_field()
 
             # Add the fields of the search configuration to the form.
-            for field in search_config.search_form_fields.all():
-                search_field = field.search_field
+            for search_field in get_search_plan(search_config).form_fields:
                 form_field = None
                 condition_form_field = None
                 help_text = mark_safe(
@@ -171,16 +185,32 @@ class AdvancedSearchForm(_NdrCoreForm):
                     )
                 # Multi list field (multiple select with Select2)
                 if search_field.field_type == search_field.FieldType.MULTI_LIST:
-                    form_field = forms.MultipleChoiceField(
-                        label=search_field.field_label,
-                        choices=search_field.get_choices(),
-                        widget=FilteredListWidget(
-                            attrs={"data-minimum-input-length": 0}
-                        ),
-                        required=search_field.field_required,
-                        help_text=help_text,
-                        initial=search_field.get_initial_value(),
-                    )
+                    if len(search_field.choices) > cls.get_remote_choices_threshold():
+                        # Too many choices to put them in the page. They are loaded while typing.
+                        form_field = RemoteMultipleChoiceField(
+                            label=search_field.field_label,
+                            choice_index=get_choice_index(search_config, search_field.field_name),
+                            widget=RemoteFilteredListWidget(
+                                reverse("ndr_core:search_field_choices",
+                                        kwargs={"search_config": search_config.conf_name,
+                                                "field_name": search_field.field_name}),
+                                attrs={"data-minimum-input-length": 0}
+                            ),
+                            required=search_field.field_required,
+                            help_text=help_text,
+                            initial=search_field.get_initial_value(),
+                        )
+                    else:
+                        form_field = forms.MultipleChoiceField(
+                            label=search_field.field_label,
+                            choices=search_field.get_choices(),
+                            widget=FilteredListWidget(
+                                attrs={"data-minimum-input-length": 0}
+                            ),
+                            required=search_field.field_required,
+                            help_text=help_text,
+                            initial=search_field.get_initial_value(),
+                        )
                     if search_field.list_condition == 'CHOOSE':
                         condition_form_field = forms.ChoiceField(label=mark_safe('&nbsp;'),
                                                                  choices=[('AND', _('AND')),
@@ -195,15 +225,23 @@ class AdvancedSearchForm(_NdrCoreForm):
 
                 # Add the field to the form if it was created.
                 if form_field is not None:
-                    self.fields[
+                    fields[
                         f"{search_config.conf_name}_{search_field.field_name}"
                     ] = form_field
                     # Add the condition field to the form if it was created.
                     if condition_form_field is not None:
-                        self.fields[
+                        fields[
                             f"{search_config.conf_name}_{search_field.field_name}_condition"
                         ] = condition_form_field
 
+        return fields
+
+    @staticmethod
+    def get_remote_choices_threshold():
+        """Returns the number of choices above which the choices of a multi list field are loaded while typing
+        instead of being part of the page. Set with the NDR_CORE_REMOTE_CHOICES_THRESHOLD setting."""
+        return getattr(settings, 'NDR_CORE_REMOTE_CHOICES_THRESHOLD', 1000)
+
     @staticmethod
     def get_compact_view_field():
         """Returns the compact view field for the given search configuration."""
@@ -213,26 +251,30 @@ class AdvancedSearchForm(_NdrCoreForm):
             label="",
         )
 
-    def init_simple_search_fields(self, search_config):
-        """Create form fields for simple search."""
+    @classmethod
+    def get_simple_search_fields(cls, search_config):
+        """Create and return form fields for simple search."""
+        fields = {}
 
-        self.fields[f"search_term_{search_config.conf_name}"] = forms.CharField(
+        fields[f"search_term_{search_config.conf_name}"] = forms.CharField(
             label=search_config.simple_query_label,
             required=False,
             max_length=100,
             help_text=search_config.simple_query_help_text,
         )
 
-        self.fields[f"and_or_field_{search_config.conf_name}"] = forms.ChoiceField(
+        fields[f"and_or_field_{search_config.conf_name}"] = forms.ChoiceField(
             label=_("And or Or Search"),
             choices=[("and", _("AND search")), ("or", _("OR search"))],
             required=False,
         )
 
         if search_config.search_has_compact_result:
-            self.fields[
+            fields[
                 f"compact_view_{search_config.conf_name}_simple"
-            ] = self.get_compact_view_field()
+            ] = cls.get_compact_view_field()
+
+        return fields
 
     @staticmethod
     def get_simple_search_layout_fields(search_config):
@@ -277,17 +319,27 @@ class AdvancedSearchForm(_NdrCoreForm):
 
     @property
     def helper(self):
-        """Creates and returns the form helper class with the layout-ed form fields."""
+        """Creates and returns the form helper class with the layout-ed form fields. The layout is copied
+        from the blueprint, as crispy forms marks the active tab in the layout while rendering."""
 
         helper = FormHelper()
         helper.form_method = "GET"
-        layout = helper.layout = Layout()
+        helper.layout = copy.deepcopy(self.blueprint.get_layout())
+        helper.form_show_labels = True
+
+        return helper
+
+    @classmethod
+    def create_layout(cls, search_configs, form_fields):
+        """Creates the layout of the form fields of the search configurations. """
+
+        layout = Layout()
 
         # There can be multiple search configurations for one page. Each of them gets its own tab.
         tabs = TabHolder(css_id="id_tabs")
 
         # For each search configuration, create a tab and add the form fields to it.
-        for search_config in self.search_configs:
+        for search_config in search_configs:
             # Each search configuration can have a simple search tab.
             tab_simple = None
             if search_config.has_simple_search:
@@ -295,11 +347,11 @@ class AdvancedSearchForm(_NdrCoreForm):
                     search_config.simple_search_tab_title,
                     css_id=f"{search_config.conf_name}_simple",
                 )
-                fields = self.get_simple_search_layout_fields(search_config)
+                fields = cls.get_simple_search_layout_fields(search_config)
                 tab_simple.append(Div(fields[0], css_class="form-row"))
                 tab_simple.append(Div(*fields[1:], css_class="form-row"))
 
-                tab_simple.append(self.get_search_button(search_config, simple=True))
+                tab_simple.append(cls.get_search_button(search_config, simple=True))
                 if search_config.simple_search_first:
                     tabs.append(tab_simple)
 
@@ -307,36 +359,20 @@ class AdvancedSearchForm(_NdrCoreForm):
             tab = Tab(search_config.conf_label, css_id=search_config.conf_name)
 
             # The form fields are grouped by row and column. The row is the outer loop.
-            max_row = search_config.search_form_fields.all().aggregate(Max("field_row"))
-            field_range = max_row["field_row__max"]
-            if field_range is None:
-                field_range = 0
-
-            for row in range(field_range):
-                row += 1  # The row starts with 1, not 0.
+            search_plan = get_search_plan(search_config)
+            for row in search_plan.form_rows:
                 form_row = Div(css_class="form-row")
                 # The column is the inner loop.
-                for column in search_config.search_form_fields.filter(field_row=row).order_by("field_column"):
+                for column in row:
                     # Type is INFO_TEXT, so we create a div with the text.
-                    if column.search_field.field_type == column.search_field.FieldType.INFO_TEXT:
-                        try:
-                            info_text_translation = NdrCoreTranslation.objects.get(
-                                object_id=column.search_field.field_name,
-                                language=get_language(),
-                                field_name="list_choices",
-                                table_name="ndrcoresearchfield",
-                            )
-                            info_text = info_text_translation.translation
-                        except NdrCoreTranslation.DoesNotExist:
-                            info_text = column.search_field.list_choices
-
+                    if column.field_type == column.FieldType.INFO_TEXT:
                         form_field = Div(
                             HTML(
                                 mark_safe(
                                     f'<div class="alert alert-info small" role="alert">'
                                     f'<i class="fa-regular fa-circle-info"></i>&nbsp;'
-                                    f"<strong>{column.search_field.field_label}</strong><br/>"
-                                    f"{info_text}"
+                                    f"<strong>{column.field_label}</strong><br/>"
+                                    f"{column.info_text}"
                                     f"</div>"
                                 )
                             ),
@@ -344,16 +380,15 @@ class AdvancedSearchForm(_NdrCoreForm):
                         )
                     else:
                         # If the field is a list and set to CHOOSE, we create a select field.
-                        if f"{search_config.conf_name}_{column.search_field.field_name}_condition" in self.fields:
-                            print("Adding condition field for ", column.search_field.field_name)
+                        if f"{search_config.conf_name}_{column.field_name}_condition" in form_fields:
                             form_field = Div(
                                 Div(
                                     Field(
-                                        f"{search_config.conf_name}_{column.search_field.field_name}",
+                                        f"{search_config.conf_name}_{column.field_name}",
                                         wrapper_class="col-9 m-0 pr-0",
                                     ),
                                     Field(
-                                        f"{search_config.conf_name}_{column.search_field.field_name}_condition",
+                                        f"{search_config.conf_name}_{column.field_name}_condition",
                                         css_class="",
                                         wrapper_class="col-3 m-0 pl-0",
                                     ),
@@ -364,7 +399,7 @@ class AdvancedSearchForm(_NdrCoreForm):
                         # Otherwise, we create a normal field.
                         else:
                             form_field = Field(
-                                f"{search_config.conf_name}_{column.search_field.field_name}",
+                                f"{search_config.conf_name}_{column.field_name}",
                                 # placeholder=column.search_field.translated_field_label(),
                                 wrapper_class=f"col-md-{column.field_size}",
                             )
@@ -374,8 +409,8 @@ class AdvancedSearchForm(_NdrCoreForm):
                 tab.append(form_row)
 
             # Only add the tab if there are fields in it.
-            if search_config.search_form_fields.all().count() > 0:
-                tab.append(self.get_search_button(search_config))
+            if len(search_plan.form_fields) > 0:
+                tab.append(cls.get_search_button(search_config))
                 tabs.append(tab)
 
             if (
@@ -386,6 +421,49 @@ class AdvancedSearchForm(_NdrCoreForm):
 
         layout.append(tabs)
 
-        helper.form_show_labels = True
+        return layout
 
-        return helper
+
+class SearchFormBlueprint:
+    """The prepared fields and layout of a search form. Search forms copy the fields and the layout of their
+    blueprint instead of creating them from the configuration. Blueprints are shared and must not be altered."""
+
+    def __init__(self, search_configs, fields, generation):
+        self.search_configs = search_configs
+        self.fields = fields
+        self.generation = generation
+        self._layout = None
+
+    def get_layout(self):
+        """Returns the crispy layout of the form. It is created when the form is rendered for the first time. """
+        if self._layout is None:
+            self._layout = AdvancedSearchForm.create_layout(self.search_configs, self.fields)
+        return self._layout
+
+
+_blueprints = {}
+"""Prepared blueprints. The key is composed of the page, the search configuration and the language."""
+
+_blueprints_lock = threading.Lock()
+
+
+def get_search_form_blueprint(ndr_page, search_config=None):
+    """Returns the blueprint of the search form of a page or, if no page is given, of a single search
+    configuration. Blueprints are prepared once per language and configuration generation.
+
+    :param ndr_page: The NdrCorePage with the search configurations or None.
+    :param search_config: The NdrCoreSearchConfiguration, if no page is given.
+    :return: A SearchFormBlueprint"""
+    generation = get_generation()
+    if ndr_page is not None:
+        key = ('page', ndr_page.pk, get_language())
+    else:
+        key = ('search_config', search_config.pk, get_language())
+
+    blueprint = _blueprints.get(key)
+    if blueprint is None or blueprint.generation != generation:
+        search_configs = list(ndr_page.search_configs.all()) if ndr_page is not None else [search_config]
+        blueprint = SearchFormBlueprint(search_configs, AdvancedSearchForm.create_fields(search_configs), generation)
+        with _blueprints_lock:
+            _blueprints[key] = blueprint
+    return blueprint
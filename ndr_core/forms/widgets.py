@@ -177,3 +177,29 @@ class FilteredListWidget(s2forms.Select2MultipleWidget):
     search_fields = [
         'list_name__icontains'
     ]
+
+
+class RemoteFilteredListWidget(FilteredListWidget):
+    """Widget to display a multi select2 dropdown for list configurations with many choices. Only the selected
+    choices are part of the page, the others are loaded from the choices endpoint while typing. """
+
+    choice_index = None
+
+    def __init__(self, data_url, attrs=None):
+        self.data_url = data_url
+        super().__init__(attrs=attrs)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        """Adds the select2 AJAX options. """
+        attrs = super().build_attrs(base_attrs, extra_attrs=extra_attrs)
+        attrs.update({"data-ajax--url": self.data_url,
+                      "data-ajax--cache": "true",
+                      "data-ajax--type": "GET"})
+        attrs["class"] += " django-select2-heavy"
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        """Only the selected choices are rendered. """
+        self.choices = [(selected, self.choice_index.get_label(selected)) for selected in value
+                        if self.choice_index.get_label(selected) is not None]
+        return super().optgroups(name, value, attrs=attrs)
@@ -0,0 +1,45 @@
+""" This file holds the ndr_create_text_index management command class."""
+import pymongo
+import pymongo.errors
+from django.core.management.base import BaseCommand, CommandError
+
+from ndr_core.api.mongodb.mongodb_client import get_mongo_collection
+from ndr_core.models import NdrCoreSearchConfiguration
+
+
+class Command(BaseCommand):
+    help = ('Creates the text index on the simple query main field of MongoDB search configurations '
+            'which use the text index simple query mode.')
+
+    def add_arguments(self, parser):
+        parser.add_argument("conf_names", nargs="*", type=str,
+                            help="Names of the search configurations. All text index configurations if omitted.")
+        parser.add_argument("--language", type=str, default="none",
+                            help="Default language of the text index (used for stemming and stop words). "
+                                 "Default: none")
+
+    def handle(self, *args, **options):
+        search_configs = NdrCoreSearchConfiguration.objects.filter(api_type__name='mongodb')
+        if options["conf_names"]:
+            search_configs = search_configs.filter(conf_name__in=options["conf_names"])
+        else:
+            search_configs = search_configs.filter(simple_query_mode=NdrCoreSearchConfiguration.SimpleQueryMode.TEXT)
+
+        if not search_configs.exists():
+            raise CommandError("No MongoDB search configuration found.")
+
+        for search_config in search_configs:
+            field = search_config.simple_query_main_field
+            collection = get_mongo_collection(search_config)
+            try:
+                index_name = collection.create_index([(field, pymongo.TEXT)],
+                                                     name=f"ndr_core_text_{field}",
+                                                     default_language=options["language"])
+                self.stdout.write(self.style.SUCCESS(f"{search_config.conf_name}: Text index '{index_name}' "
+                                                     f"created on '{field}'."))
+            except pymongo.errors.OperationFailure as e:
+                # A collection can only have one text index.
+                self.stderr.write(self.style.ERROR(f"{search_config.conf_name}: Text index could not be created: "
+                                                   f"{e.details.get('errmsg', e) if e.details else e}"))
+            except pymongo.errors.ServerSelectionTimeoutError:
+                self.stderr.write(self.style.ERROR(f"{search_config.conf_name}: Could not connect to the MongoDB."))
@@ -0,0 +1,70 @@
+""" This file holds the ndr_mongo_indexes management command class."""
+import pymongo.errors
+from django.core.management.base import BaseCommand, CommandError
+
+from ndr_core.api.mongodb.mongodb_indexes import IndexAdvisor
+from ndr_core.models import NdrCoreSearchConfiguration, NdrCoreSearchStatisticEntry
+
+
+class Command(BaseCommand):
+    help = ('Recommends indexes for MongoDB search configurations, compares them with the existing indexes and '
+            'reports logged searches which scan the whole collection.')
+
+    def add_arguments(self, parser):
+        parser.add_argument("conf_names", nargs="*", type=str,
+                            help="Names of the search configurations. All MongoDB configurations if omitted.")
+        parser.add_argument("--create", action="store_true",
+                            help="Create the missing indexes.")
+        parser.add_argument("--statistics", type=int, default=100,
+                            help="Number of the most recent logged searches to explain. 0 skips this. Default: 100")
+
+    def handle(self, *args, **options):
+        search_configs = NdrCoreSearchConfiguration.objects.filter(api_type__name='mongodb')
+        if options["conf_names"]:
+            search_configs = search_configs.filter(conf_name__in=options["conf_names"])
+        if not search_configs.exists():
+            raise CommandError("No MongoDB search configuration found.")
+
+        for search_config in search_configs:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{search_config.conf_name}"))
+            advisor = IndexAdvisor(search_config)
+            try:
+                self.advise(advisor, search_config, options)
+            except pymongo.errors.ServerSelectionTimeoutError:
+                self.stderr.write(self.style.ERROR("  Could not connect to the MongoDB."))
+            except pymongo.errors.OperationFailure as e:
+                self.stderr.write(self.style.ERROR(f"  MongoDB error: {e}"))
+
+    def advise(self, advisor, search_config, options):
+        """Prints the index advice for one search configuration. """
+        missing_indexes = advisor.get_missing_indexes()
+        for index in advisor.get_recommended_indexes():
+            status = "missing" if index in missing_indexes else "ok"
+            self.stdout.write(f"  [{status}] {self.format_index(index)}")
+
+        for parameter in advisor.get_unindexable_fields():
+            self.stdout.write(self.style.WARNING(f"  '{parameter}' is searched with regular expressions. "
+                                                 f"An index can't speed up these searches."))
+
+        if options["create"]:
+            for index in missing_indexes:
+                name = advisor.create_index(index)
+                self.stdout.write(self.style.SUCCESS(f"  Created index '{name}'"))
+        elif missing_indexes:
+            self.stdout.write("  Run with --create to create the missing indexes.")
+
+        if options["statistics"] > 0:
+            entries = NdrCoreSearchStatisticEntry.objects.filter(
+                search_config=search_config).order_by('-search_time')[:options["statistics"]]
+            scans = advisor.get_collection_scans(entries)
+            if scans:
+                self.stdout.write(self.style.WARNING(f"  {len(scans)} logged queries scan the whole collection:"))
+                for query_filter, count in sorted(scans, key=lambda scan: -scan[1]):
+                    self.stdout.write(f"    {count}x {query_filter}")
+            else:
+                self.stdout.write("  No logged query scans the whole collection.")
+
+    @staticmethod
+    def format_index(index):
+        """Returns an index in the notation of the mongo shell. """
+        return "{" + ", ".join(f"{key}: {direction}" for key, direction in index) + "}"
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:25
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0020_alter_ndrcorecolorscheme_accent_color_1_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='connection_keep_alive',
+            field=models.BooleanField(default=True, help_text='Reuse open connections to the API host between searches.', verbose_name='Keep Connections Alive'),
+        ),
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='connection_pool_size',
+            field=models.IntegerField(default=10, help_text='Maximum number of open connections to the API host.', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)], verbose_name='Connection Pool Size'),
+        ),
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='connection_retries',
+            field=models.IntegerField(default=1, help_text="Number of retries if a connection to the API host can't be established.", validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)], verbose_name='Connection Retries'),
+        ),
+    ]
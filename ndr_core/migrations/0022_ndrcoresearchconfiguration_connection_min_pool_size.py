@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:25
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0021_ndrcoresearchconfiguration_connection_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='connection_min_pool_size',
+            field=models.IntegerField(default=0, help_text='Number of connections which are kept open even if they are idle (MongoDB only).', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Minimum Pool Size'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:26
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0022_ndrcoresearchconfiguration_connection_min_pool_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='result_cache_ttl',
+            field=models.IntegerField(default=0, help_text='Number of seconds a search result is cached. Identical searches are answered from the cache. 0 disables the cache.', validators=[django.core.validators.MinValueValidator(0)], verbose_name='Result Cache TTL'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:28
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0023_ndrcoresearchconfiguration_result_cache_ttl'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='circuit_cool_down',
+            field=models.IntegerField(default=30, help_text='Number of seconds searches fail immediately before the API is tried again.', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Circuit Cool-Down'),
+        ),
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='circuit_failure_threshold',
+            field=models.IntegerField(default=5, help_text='Number of consecutive failed requests after which searches fail immediately. 0 disables this.', validators=[django.core.validators.MinValueValidator(0)], verbose_name='Circuit Failure Threshold'),
+        ),
+    ]
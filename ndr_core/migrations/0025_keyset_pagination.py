@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0024_circuit_breaker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='use_keyset_pagination',
+            field=models.BooleanField(default=False, help_text='Page through MongoDB results by the sort field and the id field instead of skipping documents. Makes deep pages as fast as the first page.', verbose_name='Use Keyset Pagination'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:33
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0025_keyset_pagination'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='count_cache_ttl',
+            field=models.IntegerField(default=300, help_text="Number of seconds a count is cached if the count strategy is 'Cached'.", validators=[django.core.validators.MinValueValidator(1)], verbose_name='Count Cache TTL'),
+        ),
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='count_limit',
+            field=models.IntegerField(default=10000, help_text="Results are counted up to this number if the count strategy is 'Capped'.", validators=[django.core.validators.MinValueValidator(1)], verbose_name='Count Limit'),
+        ),
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='count_strategy',
+            field=models.CharField(choices=[('exact', 'Exact'), ('capped', 'Capped (count up to a limit)'), ('cached', 'Cached'), ('estimated', 'Estimated (for searches without filter)')], default='exact', help_text='How the total number of results is counted (MongoDB only).', max_length=20, verbose_name='Count Strategy'),
+        ),
+    ]
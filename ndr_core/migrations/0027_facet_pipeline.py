@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0026_count_strategy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='use_facet_pipeline',
+            field=models.BooleanField(default=False, help_text='Retrieve the result page, the total and the number of results per choice of the list fields with one aggregation (MongoDB only).', verbose_name='Use Facet Pipeline'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ndr_core', '0027_facet_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ndrcoresearchconfiguration',
+            name='simple_query_mode',
+            field=models.CharField(choices=[('regex', 'Regular Expression'), ('text', 'Text Index')], default='regex', help_text="How the main field is searched (MongoDB only). 'Text Index' needs a text index on the main field (see manage.py ndr_create_text_index).", max_length=20, verbose_name='Simple Query Mode'),
+        ),
+    ]
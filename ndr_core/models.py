@@ -453,6 +453,18 @@ class NdrCoreApiImplementation(models.Model):
 class NdrCoreSearchConfiguration(TranslatableMixin, models.Model):
     """ A search configuration describes a configured search. """
 
+    class CountStrategy(models.TextChoices):
+        """Determines how the total number of results of a MongoDB search is counted. """
+        EXACT = "exact", "Exact"
+        CAPPED = "capped", "Capped (count up to a limit)"
+        CACHED = "cached", "Cached"
+        ESTIMATED = "estimated", "Estimated (for searches without filter)"
+
+    class SimpleQueryMode(models.TextChoices):
+        """Determines how a simple search queries the main field of a MongoDB collection. """
+        REGEX = "regex", "Regular Expression"
+        TEXT = "text", "Text Index"
+
     # NAMES
 
     conf_name = models.CharField(verbose_name="Configuration Name",
@@ -496,6 +508,50 @@ class NdrCoreSearchConfiguration(TranslatableMixin, models.Model):
                                               "key")
     """An API might need an authentication key to function. """
 
+    connection_pool_size = models.IntegerField(default=10,
+                                               validators=[MinValueValidator(1), MaxValueValidator(100)],
+                                               verbose_name="Connection Pool Size",
+                                               help_text="Maximum number of open connections to the API host.")
+    """Connections to the API host are pooled and shared between searches. This is the maximum number of
+    connections kept open per host. """
+
+    connection_min_pool_size = models.IntegerField(default=0,
+                                                   validators=[MinValueValidator(0), MaxValueValidator(100)],
+                                                   verbose_name="Minimum Pool Size",
+                                                   help_text="Number of connections which are kept open even if "
+                                                             "they are idle (MongoDB only).")
+    """Number of connections the MongoDB client keeps open even if they are idle. """
+
+    connection_keep_alive = models.BooleanField(default=True,
+                                                verbose_name="Keep Connections Alive",
+                                                help_text="Reuse open connections to the API host between "
+                                                          "searches.")
+    """If True, connections to the API host are kept open and reused. Otherwise, they are closed after each
+    request. """
+
+    connection_retries = models.IntegerField(default=1,
+                                             validators=[MinValueValidator(0), MaxValueValidator(10)],
+                                             verbose_name="Connection Retries",
+                                             help_text="Number of retries if a connection to the API host "
+                                                       "can't be established.")
+    """Number of retries if a connection to the API host can't be established. Requests which reached the host
+    are never retried. """
+
+    circuit_failure_threshold = models.IntegerField(default=5,
+                                                    validators=[MinValueValidator(0)],
+                                                    verbose_name="Circuit Failure Threshold",
+                                                    help_text="Number of consecutive failed requests after which "
+                                                              "searches fail immediately. 0 disables this.")
+    """Number of consecutive failed requests after which the circuit opens and searches fail immediately.
+    0 disables the circuit breaker. """
+
+    circuit_cool_down = models.IntegerField(default=30,
+                                            validators=[MinValueValidator(1)],
+                                            verbose_name="Circuit Cool-Down",
+                                            help_text="Number of seconds searches fail immediately before "
+                                                      "the API is tried again.")
+    """Number of seconds an open circuit waits before a trial request is sent to the API. """
+
     # SEARCH
 
     search_form_fields = models.ManyToManyField(NdrCoreSearchFieldFormConfiguration,
@@ -515,6 +571,14 @@ class NdrCoreSearchConfiguration(TranslatableMixin, models.Model):
                                   help_text="The order to sort the result by.")
     """The order to sort the result by. """
 
+    use_keyset_pagination = models.BooleanField(default=False,
+                                                verbose_name="Use Keyset Pagination",
+                                                help_text="Page through MongoDB results by the sort field and "
+                                                          "the id field instead of skipping documents. "
+                                                          "Makes deep pages as fast as the first page.")
+    """If True, the next and previous page of a MongoDB result are retrieved with a range query on the sort field
+    and the id field (as tie-breaker) instead of skipping documents. Jumps to other pages still skip documents. """
+
     has_simple_search = models.BooleanField(default=True,
                                             help_text="Should this configuration feature a simple search?")
     """Should this configuration feature a simple search? """
@@ -527,6 +591,16 @@ class NdrCoreSearchConfiguration(TranslatableMixin, models.Model):
                                                help_text="The main field to query for a simple search.")
     """The main field to query for a simple search. """
 
+    simple_query_mode = models.CharField(max_length=20,
+                                         choices=SimpleQueryMode.choices,
+                                         default=SimpleQueryMode.REGEX,
+                                         verbose_name="Simple Query Mode",
+                                         help_text="How the main field is searched (MongoDB only). 'Text Index' "
+                                                   "needs a text index on the main field "
+                                                   "(see manage.py ndr_create_text_index).")
+    """How a simple search queries the main field of a MongoDB collection. Regular expressions match substrings but
+    can't use an index. A text index matches words and sorts the results by relevance."""
+
     simple_search_tab_title = models.CharField(max_length=100, blank=False, default='Simple Search',
                                                help_text="The title for the simple search tab.")
     """The title for the simple search tab. This value is translatable."""
@@ -567,6 +641,46 @@ class NdrCoreSearchConfiguration(TranslatableMixin, models.Model):
                                     help_text="Size of the result page (e.g. 'How many results at once')")
     """The query results will return a page of the results. You can define the page size"""
 
+    result_cache_ttl = models.IntegerField(default=0,
+                                           validators=[MinValueValidator(0)],
+                                           verbose_name="Result Cache TTL",
+                                           help_text="Number of seconds a search result is cached. "
+                                                     "Identical searches are answered from the cache. "
+                                                     "0 disables the cache.")
+    """Results of identical searches are cached for this number of seconds. 0 disables the cache."""
+
+    count_strategy = models.CharField(max_length=20,
+                                      choices=CountStrategy.choices,
+                                      default=CountStrategy.EXACT,
+                                      verbose_name="Count Strategy",
+                                      help_text="How the total number of results is counted (MongoDB only).")
+    """How the total number of results of a MongoDB search is counted. Exact counts all results. Capped counts up to
+    the count limit and displays 'N+' if there are more. Cached counts exactly and caches the count for the count
+    cache TTL. Estimated uses the collection metadata for searches without a filter and counts exactly otherwise."""
+
+    count_limit = models.IntegerField(default=10000,
+                                      validators=[MinValueValidator(1)],
+                                      verbose_name="Count Limit",
+                                      help_text="Results are counted up to this number if the count strategy "
+                                                "is 'Capped'.")
+    """Results are counted up to this number if the count strategy is 'capped'."""
+
+    count_cache_ttl = models.IntegerField(default=300,
+                                          validators=[MinValueValidator(1)],
+                                          verbose_name="Count Cache TTL",
+                                          help_text="Number of seconds a count is cached if the count strategy "
+                                                    "is 'Cached'.")
+    """Number of seconds a count is cached if the count strategy is 'cached'."""
+
+    use_facet_pipeline = models.BooleanField(default=False,
+                                             verbose_name="Use Facet Pipeline",
+                                             help_text="Retrieve the result page, the total and the number of "
+                                                       "results per choice of the list fields with one "
+                                                       "aggregation (MongoDB only).")
+    """If True, a MongoDB search runs one aggregation with a $facet stage. It returns the result page, the total and
+    the number of results per choice of every list, multi list and boolean list search field of the configuration.
+    The counts can be used for faceted navigation."""
+
     compact_page_size = models.IntegerField(default=10,
                                             verbose_name="Compact Page Size",
                                             help_text="Size of the compact result page (e.g. 'How many results at "
@@ -2,6 +2,9 @@
 import os.path
 from pathlib import Path
 from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.urls import path, include, re_path
 from django.views.static import serve
 
@@ -32,6 +35,26 @@ class NdrSettings:
     """NDR Core uses many third party modules which need to be in the INSTALLED_APPS list in the django settings. 
     To make things easier for users, this list is joined with the installed apps list."""
 
+    CACHE_ALIAS = 'default'
+    """NDR Core caches search results and other shared data in this django cache. It can be changed with the
+    NDR_CORE_CACHE_ALIAS setting. Use a shared backend (e.g. redis or memcached) if you run multiple workers.
+    With a process-local backend (the default local memory cache), each worker caches on its own and the
+    configuration generation (see search_plan.get_generation) is read from the database on every use."""
+
+    @staticmethod
+    def get_cache():
+        """Returns the django cache used by NDR Core. """
+        return caches[getattr(settings, 'NDR_CORE_CACHE_ALIAS', NdrSettings.CACHE_ALIAS)]
+
+    @staticmethod
+    def cache_is_shared():
+        """Returns True if the cache used by NDR Core is shared between processes. The local memory and the
+        dummy cache are not. The NDR_CORE_SHARED_CACHE setting (True or False) overrides the detection."""
+        shared = getattr(settings, 'NDR_CORE_SHARED_CACHE', None)
+        if shared is not None:
+            return shared
+        return not isinstance(NdrSettings.get_cache(), (LocMemCache, DummyCache))
+
     @staticmethod
     def get_version():
         """Returns the version of the NDR Core app. """
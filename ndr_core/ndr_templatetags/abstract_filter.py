@@ -1,7 +1,24 @@
+import copy
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
+from django.conf import settings
 from django.utils.translation import get_language
 
+_MISSING = object()
+
+_outputs = OrderedDict()
+"""Rendered values of filters. The key is composed of the filter, its configuration, the value, the language
+and, for filters which read search fields, the configuration generation (see search_plan)."""
+
+_outputs_lock = threading.Lock()
+
+
+def get_output_memo_size():
+    """Returns the maximum number of rendered values kept in memory."""
+    return getattr(settings, 'NDR_CORE_FILTER_MEMO_SIZE', 10000)
+
 
 class AbstractFilter(ABC):
     """A class to represent a filter."""
@@ -9,14 +26,67 @@ class AbstractFilter(ABC):
     filter_name = ""
     value = ""
     filter_configurations = {}
+    generation = None
+    """The configuration generation the value is rendered with. Only set for filters which read search fields."""
 
     def __init__(self, filter_name, value, filter_configurations):
         self.filter_name = filter_name
         self.value = value
         self.filter_configurations = filter_configurations
+        self.configuration_key = tuple(sorted(filter_configurations.items()))
 
         self.check_configuration()
 
+    def render(self, value, generation=None):
+        """Returns the rendered value of a filter bound to its configuration (see filters.get_filter()).
+        The filter itself is not changed, so it can be shared. Outputs of hashable values are memoized.
+
+        :param value: The value to render.
+        :param generation: The configuration generation, if the caller knows it. Filters which read search
+                           fields read it from the cache otherwise, so callers rendering many values should pass it.
+        :return: The rendered value."""
+        if not self.reads_search_fields():
+            generation = None
+        elif generation is None:
+            generation = self.get_generation()
+
+        try:
+            key = (self.filter_name, self.configuration_key, type(value), value, get_language(), generation)
+            hash(key)
+        except TypeError:
+            key = None
+
+        if key is not None:
+            with _outputs_lock:
+                output = _outputs.get(key, _MISSING)
+                if output is not _MISSING:
+                    _outputs.move_to_end(key)
+                    return output
+
+        value_filter = copy.copy(self)
+        value_filter.value = value
+        value_filter.generation = generation
+        output = value_filter.get_rendered_value()
+
+        if key is not None:
+            with _outputs_lock:
+                _outputs[key] = output
+                while len(_outputs) > get_output_memo_size():
+                    _outputs.popitem(last=False)
+        return output
+
+    def reads_search_fields(self):
+        """Returns True if the output depends on the search fields in the database besides the value and the
+        configuration. Memoized outputs of another configuration generation are not used for these filters."""
+        return False
+
+    @staticmethod
+    def get_generation():
+        """Returns the current configuration generation."""
+        # search_plan imports the template strings which import the filters.
+        from ndr_core.search_plan import get_generation   # pylint: disable=import-outside-toplevel
+        return get_generation()
+
     @abstractmethod
     def get_rendered_value(self):
         pass
@@ -1,9 +1,7 @@
-import json
-from abc import ABC, abstractmethod
+import functools
+import threading
 from datetime import datetime
 
-from django.utils.translation import get_language
-
 from ndr_core.models import NdrCoreSearchField
 from ndr_core.ndr_templatetags.abstract_filter import AbstractFilter
 from ndr_core.ndr_templatetags.html_element import HTMLElement
@@ -11,22 +9,43 @@ from ndr_core.ndr_templatetags.html_element import HTMLElement
 
 def get_get_filter_class(filter_name):
     """Returns the filter class."""
-    if filter_name in ["lower", "upper", "title", "capitalize"]:
-        return StringFilter
-    if filter_name == "bool":
-        return BoolFilter
-    if filter_name == "fieldify":
-        return FieldTemplateFilter
-    if filter_name in ["badge", "pill"]:
-        return BadgeTemplateFilter
-    if filter_name == "img":
-        return ImageTemplateFilter
-    if filter_name == "date":
-        return DateFilter
-    if filter_name == "format":
-        return NumberFilter
-
-    raise ValueError(f"Filter {filter_name} not found.")
+    try:
+        return FILTER_CLASSES[filter_name]
+    except KeyError:
+        raise ValueError(f"Filter {filter_name} not found.") from None
+
+
+def get_filter(filter_name, filter_configurations):
+    """Returns the filter bound to a configuration. The configuration is checked once and the filter is shared
+    by all variables which use the same filter and configuration. Raises a ValueError if the filter doesn't
+    exist or if the configuration is invalid."""
+    return _get_bound_filter(filter_name, tuple(sorted(filter_configurations.items())))
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_bound_filter(filter_name, configuration_key):
+    return get_get_filter_class(filter_name)(filter_name, None, dict(configuration_key))
+
+
+_field_choices = {}
+"""Choices of the search fields used by filters. The key is the field name."""
+
+_field_choices_lock = threading.Lock()
+
+
+def get_field_choices(field_name, generation):
+    """Returns the choices of a search field as dictionary (see NdrCoreSearchField.get_choices_list_dict()) or
+    None if there is no field with this name. The choices are loaded once per configuration generation."""
+    entry = _field_choices.get(field_name)
+    if entry is None or entry[0] != generation:
+        try:
+            choices = NdrCoreSearchField.objects.get(field_name=field_name).get_choices_list_dict()
+        except NdrCoreSearchField.DoesNotExist:
+            choices = None
+        entry = (generation, choices)
+        with _field_choices_lock:
+            _field_choices[field_name] = entry
+    return entry[1]
 
 
 class StringFilter(AbstractFilter):
@@ -89,25 +108,6 @@ class BoolFilter(AbstractFilter):
 class FieldTemplateFilter(AbstractFilter):
     """A class to represent a template filter."""
 
-    field_value = ""
-    search_field = None
-
-    def __init__(self, filter_name, value, filter_configurations):
-        super().__init__(filter_name, value, filter_configurations)
-        try:
-            self.search_field = NdrCoreSearchField.objects.get(
-                field_name=self.get_configuration("o0")
-            )
-            try:
-                self.field_value = self.search_field.get_list_choices_as_dict()[
-                    self.value
-                ][self.get_language_value_field_name()]
-            except KeyError:
-                self.field_value = self.value
-
-        except NdrCoreSearchField.DoesNotExist:
-            self.search_field = None
-
     def needed_attributes(self):
         return []
 
@@ -117,12 +117,19 @@ class FieldTemplateFilter(AbstractFilter):
     def needed_options(self):
         return ["o0"]
 
+    def reads_search_fields(self):
+        return True
+
     def get_rendered_value(self):
         """Returns the formatted string."""
-        if not self.search_field:
+        field_choices = get_field_choices(self.get_configuration("o0"), self.generation)
+        if field_choices is None:
             return self.get_value()
 
-        return self.field_value
+        try:
+            return field_choices[self.value][self.get_language_value_field_name()]
+        except (KeyError, TypeError):
+            return self.value
 
 
 class BadgeTemplateFilter(AbstractFilter):
@@ -137,6 +144,9 @@ class BadgeTemplateFilter(AbstractFilter):
     def needed_options(self):
         return []
 
+    def reads_search_fields(self):
+        return bool(self.get_configuration("field"))
+
     def get_rendered_value(self):
         """Returns the formatted string."""
 
@@ -152,11 +162,10 @@ class BadgeTemplateFilter(AbstractFilter):
         field_options = None
         if self.get_configuration("field"):
             # The 'field' option is set. Try to get a translated value from the NDRCoreSearchField
-            try:
-                field = NdrCoreSearchField.objects.get(
-                    field_name=self.get_configuration("field")
-                )
-                all_field_options = field.get_choices_list_dict()
+            all_field_options = get_field_choices(self.get_configuration("field"), self.generation)
+            if all_field_options is None:
+                badge_element.add_content("Field not found")  # TODO: internationalize
+            else:
                 field_options = all_field_options[self.value]
                 if not field_options['is_printable']:
                     return None
@@ -171,8 +180,6 @@ class BadgeTemplateFilter(AbstractFilter):
                     else:
                         tt_text = tt_content
                     badge_element.add_attribute("title", tt_text)
-            except NdrCoreSearchField.DoesNotExist:
-                badge_element.add_content("Field not found")  # TODO: internationalize
         else:
             badge_element.add_content(self.value)
 
@@ -262,3 +269,19 @@ class NumberFilter(AbstractFilter):
     def get_value(self):
         """Returns the formatted string."""
         return self.value
+
+
+FILTER_CLASSES = {
+    "lower": StringFilter,
+    "upper": StringFilter,
+    "title": StringFilter,
+    "capitalize": StringFilter,
+    "bool": BoolFilter,
+    "fieldify": FieldTemplateFilter,
+    "badge": BadgeTemplateFilter,
+    "pill": BadgeTemplateFilter,
+    "img": ImageTemplateFilter,
+    "date": DateFilter,
+    "format": NumberFilter,
+}
+"""The filters of the template language by name."""
@@ -1,11 +1,14 @@
 """Module for the TemplateString class."""
+import functools
 import json
 import re
 from string import Formatter
 
 from django.utils.safestring import mark_safe
 
-from ndr_core.ndr_templatetags.filters import get_get_filter_class
+from ndr_core.ndr_templatetags.abstract_filter import AbstractFilter
+from ndr_core.ndr_templatetags.filters import get_filter
+from ndr_core.utils import compile_path
 
 
 class TemplateStringVariable:
@@ -44,6 +47,9 @@ class TemplateStringVariable:
     value_filters = []
     """ A list of filters. """
 
+    filters = []
+    """ The filters bound to their configurations, or the ValueError if a filter can't be bound. """
+
     filter_configurations = []
 
     def __init__(self, variable):
@@ -54,6 +60,11 @@ class TemplateStringVariable:
         self.raw_variable = variable
         self.parse_variable(variable)
         self.keys = self.get_keys()
+        self.path = compile_path(tuple(self.keys))
+        self.filters = [self.bind_filter(my_filter, self.filter_configurations[i])
+                        for i, my_filter in enumerate(self.value_filters)]
+        self.reads_search_fields = any(isinstance(bound_filter, AbstractFilter) and
+                                       bound_filter.reads_search_fields() for bound_filter in self.filters)
 
     def parse_variable(self, variable):
         """Parses the variable and extracts the variable name, the filters and the options."""
@@ -91,19 +102,20 @@ class TemplateStringVariable:
         except KeyError as e:
             raise KeyError(f"Key not found in data: {e}") from e
 
-    def get_value(self, data):
-        """Returns the value of the variable with the filter applied."""
+    def get_value(self, data, generation=None):
+        """Returns the value of the variable with the filter applied. The configuration generation is passed
+        to the filters (see AbstractFilter.render())."""
         try:
             raw_value = self.get_raw_value(data)
             if len(self.value_filters) > 0:
                 if isinstance(raw_value, list):
                     filtered_values = []
                     for value in raw_value:
-                        applied = self.apply_filters(value)
+                        applied = self.apply_filters(value, generation)
                         if applied is not None:
                             filtered_values.append(applied)
                     return filtered_values
-                return self.apply_filters(self.get_raw_value(data))
+                return self.apply_filters(self.get_raw_value(data), generation)
             return raw_value
         except IndexError as e:
             raise IndexError(f"Key not found in list: {e}") from e
@@ -114,31 +126,31 @@ class TemplateStringVariable:
 
     def _get_nested_value(self, data):
         """Returns the value of the variable."""
-        keys = self.get_keys()
-        value = data
-        for key in keys:
-            try:
-                value = value[key]
-            except TypeError as e:
-                if key.isdigit():
-                    try:
-                        value = value[int(key)]
-                    except IndexError:
-                        raise IndexError(f"Nested key not found: {e}") from e
-            except KeyError as e:
-                raise KeyError(f"Nested key not found: {e}") from e
-        return value
+        try:
+            return self.path.resolve(data)
+        except IndexError as e:
+            raise IndexError(f"Nested key not found: {e}") from e
+        except (KeyError, TypeError) as e:
+            raise KeyError(f"Nested key not found: {e}") from e
 
-    def apply_filters(self, value):
+    def apply_filters(self, value, generation=None):
         """Returns the value of the variable with the filter applied."""
-        for i, my_filter in enumerate(self.value_filters):
-            filter_class = get_get_filter_class(my_filter)
-            if filter_class is None:
-                raise ValueError(f"Filter {my_filter} not found.")
-            value = filter_class(my_filter, value, self.filter_configurations[i]).get_rendered_value()
+        for bound_filter in self.filters:
+            if isinstance(bound_filter, ValueError):
+                raise ValueError(str(bound_filter))
+            value = bound_filter.render(value, generation)
 
         return value
 
+    @staticmethod
+    def bind_filter(filter_name, filter_configuration):
+        """Returns the filter bound to its configuration. Errors are returned instead of raised, so they are
+        shown when the variable is rendered."""
+        try:
+            return get_filter(filter_name, filter_configuration)
+        except ValueError as e:
+            return e
+
     def is_nested(self):
         """Returns True if the variable is nested."""
         return len(self.keys) > 1
@@ -172,6 +184,51 @@ class TemplateStringVariable:
         raise ValueError(f"Could not parse variable: {self.variable}")
 
 
+class CompiledTemplateString:
+    """ A template string compiled into segments. The segments alternate between literal text (even positions)
+    and variables (odd positions). Compiled template strings are cached (see compile_template_string) and shared
+    between all TemplateString objects with the same string, so they must not be altered. """
+
+    def __init__(self, string):
+        """Parses the string. Raises a ValueError if a variable is malformed."""
+        self.string = string
+        self.variables = tuple(self.parse_variables(string))
+        self.reads_search_fields = any(variable.reads_search_fields for variable in self.variables)
+
+        variables_by_raw = {variable.raw_variable: variable for variable in self.variables}
+        if len(variables_by_raw) == 0:
+            self.segments = (string,)
+        else:
+            # Each occurrence of a variable in curly brackets is replaced, like with str.replace.
+            pattern = '|'.join(re.escape(f"{{{raw_variable}}}") for raw_variable in variables_by_raw)
+            parts = re.split(f"({pattern})", string)
+            self.segments = tuple(part if position % 2 == 0 else variables_by_raw[part[1:-1]]
+                                  for position, part in enumerate(parts))
+
+    @staticmethod
+    def parse_variables(string):
+        """Returns all variables in a string."""
+        try:
+            variables = []
+            for var in Formatter().parse(string):
+                if var[1] is not None and var[1] != '':
+                    raw_variable_string = var[1]
+                    if var[2] is not None and var[2] != '':
+                        raw_variable_string += ':' + var[2]
+                    variable = TemplateStringVariable(raw_variable_string)
+                    variables.append(variable)
+            return variables
+        except ValueError as e:
+            raise ValueError(f"Could not parse string: {e}") from e
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_template_string(string):
+    """Returns the compiled template string of a string. Each distinct string is parsed once; the least recently
+    used strings are dropped, so strings of changed configurations don't pile up."""
+    return CompiledTemplateString(string)
+
+
 class TemplateString:
     """ A class to represent a template string. A template string is a string formatted in the NDR COre template
     language. It is derived from the python format-string functionality. A string can have variables, marked with
@@ -182,32 +239,25 @@ class TemplateString:
     data = {}
     variables = []
 
-    def __init__(self, string, data, show_errors=False):
+    def __init__(self, string, data, show_errors=False, generation=None):
+        """:param generation: The configuration generation (see search_plan). If None, it is read from the cache
+                              when a filter needs it. Pass it when many strings are rendered."""
         self.string = string
         self.data = data
-        self.variables = self.get_variables()
+        self.generation = generation
+        self.compiled = compile_template_string(string)
+        self.variables = list(self.compiled.variables)
         self.show_errors = show_errors
 
     def get_variables(self, flatten=False):
         """Returns all variables in a string."""
-        try:
-            variables = []
-            for var in Formatter().parse(self.string):
-                if var[1] is not None and var[1] != '':
-                    raw_variable_string = var[1]
-                    if var[2] is not None and var[2] != '':
-                        raw_variable_string += ':' + var[2]
-                    variable = TemplateStringVariable(raw_variable_string)
-                    variables.append(variable)
-
-            if flatten:
-                flat_variables = []
-                for variable in variables:
-                    flat_variables.append(variable.variable)
-                return flat_variables
-            return variables
-        except ValueError as e:
-            raise ValueError(f"Could not parse string: {e}") from e
+        variables = list(compile_template_string(self.string).variables)
+        if flatten:
+            flat_variables = []
+            for variable in variables:
+                flat_variables.append(variable.variable)
+            return flat_variables
+        return variables
 
     def get_string(self):
         """Returns the string.
@@ -218,21 +268,36 @@ class TemplateString:
     def get_formatted_string(self):
         """Returns the formatted string. All variables are replaced with their values. All filters are applied.
         Example: "I want to see the {key|upper}" -> "I want to see the CAT"""
-        formatted_string = self.string
-        for variable in self.variables:
-            try:
-                data = variable.get_value(self.data)
-                if isinstance(data, list):
-                    data = self.join_list(variable, data)
-                formatted_string = formatted_string.replace(f"{{{variable.raw_variable}}}", str(data))
-            except IndexError as e:
-                formatted_string = formatted_string.replace(f"{{{variable.raw_variable}}}", self.get_error(e))
-            except KeyError as e:
-                formatted_string = formatted_string.replace(f"{{{variable.raw_variable}}}", self.get_error(e))
-            except ValueError as e:
-                formatted_string = formatted_string.replace(f"{{{variable.raw_variable}}}", self.get_error(e))
-
-        return mark_safe(formatted_string)
+        generation = self.generation
+        if generation is None and self.compiled.reads_search_fields:
+            generation = AbstractFilter.get_generation()
+
+        parts = []
+        values = {}
+        for position, segment in enumerate(self.compiled.segments):
+            if position % 2 == 0:
+                parts.append(segment)
+                continue
+            # A variable which occurs more than once is only evaluated once.
+            if segment.raw_variable not in values:
+                values[segment.raw_variable] = self.get_variable_string(segment, generation)
+            parts.append(values[segment.raw_variable])
+
+        return mark_safe(''.join(parts))
+
+    def get_variable_string(self, variable, generation=None):
+        """Returns the value of a variable as string or the error message if it can't be retrieved."""
+        try:
+            data = variable.get_value(self.data, generation)
+            if isinstance(data, list):
+                data = self.join_list(variable, data)
+            return str(data)
+        except IndexError as e:
+            return self.get_error(e)
+        except KeyError as e:
+            return self.get_error(e)
+        except ValueError as e:
+            return self.get_error(e)
 
     @staticmethod
     def join_list(variable, data):
@@ -0,0 +1,391 @@
+"""Compiled search plans. A search plan holds what a search needs from the configuration in the database: the
+fields of the search form with their parsed choices, the grid of the result cards and the variables of the
+result expressions. A plan is built once per search configuration, language and configuration generation and
+is shared between requests. The generation is changed whenever one of the models a plan is built from is changed,
+and all processes must see the change. It is a counter in the django cache (see NdrSettings.get_cache()) if that
+cache is shared between processes. Otherwise, it is a timestamp stored in the database as a NdrCoreValue, which
+costs one query per lookup. Other data prepared from the configuration (e.g. the search form blueprints and the
+choice indexes) is versioned with the same generation."""
+import bisect
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.utils.translation import gettext_lazy as _, get_language
+
+from ndr_core.models import (NdrCorePage,
+                             NdrCoreSearchConfiguration,
+                             NdrCoreSearchField,
+                             NdrCoreSearchFieldFormConfiguration,
+                             NdrCoreResultField,
+                             NdrCoreResultFieldCardConfiguration,
+                             NdrCoreTranslation,
+                             NdrCoreValue)
+from ndr_core.ndr_settings import NdrSettings
+from ndr_core.ndr_templatetags.template_string import TemplateString
+
+GENERATION_CACHE_KEY = 'ndr_core:search_plan:generation'
+"""Key of the configuration generation in the django cache."""
+
+GENERATION_VALUE_NAME = 'search_plan_generation'
+"""Name of the NdrCoreValue which holds the configuration generation if the django cache is process-local."""
+
+PLAN_MODELS = [NdrCoreSearchConfiguration,
+               NdrCoreSearchField,
+               NdrCoreSearchFieldFormConfiguration,
+               NdrCoreResultField,
+               NdrCoreResultFieldCardConfiguration,
+               NdrCoreTranslation]
+"""Models the search plans are built from. Changes to them invalidate all plans. The available languages
+(a NdrCoreValue) determine the options of the choices and are handled separately."""
+
+
+@dataclass(frozen=True)
+class CompiledSearchField:
+    """A search field placed in the search form of a configuration. It provides the attributes and methods of
+    NdrCoreSearchField which are used by the form and the query builders, with translated labels and
+    parsed choices."""
+
+    FieldType = NdrCoreSearchField.FieldType
+
+    field_name: str
+    field_type: int
+    field_label: str
+    help_text: str
+    api_parameter: str
+    list_condition: str
+    data_field_type: str
+    input_transformation_regex: str
+    field_required: bool
+    lower_value: str
+    upper_value: str
+    initial_value: object
+    choices_list: tuple
+    choices: tuple
+    info_text: str
+    field_row: int
+    field_column: int
+    field_size: int
+
+    @classmethod
+    def from_form_field(cls, form_field):
+        """Compiles a NdrCoreSearchFieldFormConfiguration in the active language. """
+        search_field = form_field.search_field
+        info_text = None
+        if search_field.field_type == NdrCoreSearchField.FieldType.INFO_TEXT:
+            info_text = search_field.translated_field(search_field.list_choices, 'list_choices',
+                                                      search_field.field_name)
+
+        return cls(field_name=search_field.field_name,
+                   field_type=search_field.field_type,
+                   field_label=search_field.field_label,
+                   help_text=search_field.help_text,
+                   api_parameter=search_field.api_parameter,
+                   list_condition=search_field.list_condition,
+                   data_field_type=search_field.data_field_type,
+                   input_transformation_regex=search_field.input_transformation_regex,
+                   field_required=search_field.field_required,
+                   lower_value=search_field.lower_value,
+                   upper_value=search_field.upper_value,
+                   initial_value=search_field.get_initial_value(),
+                   choices_list=tuple(search_field.get_choices_list()),
+                   choices=tuple(search_field.get_choices()),
+                   info_text=info_text,
+                   field_row=form_field.field_row,
+                   field_column=form_field.field_column,
+                   field_size=form_field.field_size)
+
+    def is_choice_field(self):
+        """Returns True if the field is a choice field. """
+        return self.field_type in [self.FieldType.LIST, self.FieldType.MULTI_LIST, self.FieldType.BOOLEAN_LIST]
+
+    def is_multi_field(self):
+        """Returns True if the field can have multiple values. """
+        return self.field_type in [self.FieldType.MULTI_LIST, self.FieldType.BOOLEAN_LIST]
+
+    def get_choices_list(self):
+        """Returns the searchable choices of a choice field with all their options. """
+        return list(self.choices_list)
+
+    def get_choices_list_dict(self):
+        """Returns the searchable choices of a choice field as a dictionary with all their options. """
+        return {choice['key']: choice for choice in self.choices_list}
+
+    def get_choices(self, null_choice=False):
+        """Returns the choices of a choice field as a list of tuples. """
+        if null_choice:
+            return [('', _("Please Choose"))] + list(self.choices)
+        return list(self.choices)
+
+    def get_initial_value(self):
+        """Returns the initial value of the field. Lists are copied, so forms can't alter the plan. """
+        if isinstance(self.initial_value, list):
+            return list(self.initial_value)
+        return self.initial_value
+
+
+@dataclass(frozen=True)
+class CompiledResultCardField:
+    """A result field placed in the result card of a configuration. """
+
+    result_field_id: int
+    rich_expression: str
+    field_classes: str
+    field_row: int
+    field_column: int
+    field_size: int
+    result_card_group: str
+
+
+@dataclass(frozen=True)
+class SearchPlan:
+    """The compiled configuration of a search in one language. Plans are shared and must not be altered. """
+
+    conf_name: str
+    language: str
+    generation: int
+    form_fields: tuple
+    """The fields of the search form in the order of the configuration."""
+
+    form_rows: tuple
+    """The fields of the search form by row (starting with row 1), each row ordered by column."""
+
+    card_rows: dict
+    """The fields of the result card by row for each result card group ('normal' and 'compact')."""
+
+    expression_variables: tuple
+    """The key lists of all variables of the result card, citation and manifest expressions. None if one of the
+    expressions can't be parsed."""
+
+    @property
+    def has_card_fields(self):
+        """True if a result card is configured. """
+        return any(len(rows) > 0 for rows in self.card_rows.values())
+
+    def get_field(self, field_name):
+        """Returns the compiled search field with a name or None if it is not part of the search form. """
+        for form_field in self.form_fields:
+            if form_field.field_name == field_name:
+                return form_field
+        return None
+
+    def get_card_rows(self, result_card_group):
+        """Returns the rows of a result card group. """
+        return self.card_rows.get(result_card_group, ())
+
+
+def get_rows(fields):
+    """Groups placed fields by row. Rows without fields in between are kept empty, fields without row are
+    left out."""
+    rows = [placed_field for placed_field in fields if placed_field.field_row is not None]
+    max_row = max([placed_field.field_row for placed_field in rows], default=0)
+    return tuple(tuple(sorted([placed_field for placed_field in rows if placed_field.field_row == row],
+                              key=lambda placed_field: placed_field.field_column or 0))
+                 for row in range(1, max_row + 1))
+
+
+def get_expression_variables(expressions):
+    """Returns the key lists of the variables of the expressions or None if an expression can't be parsed. """
+    variables = []
+    for expression in expressions:
+        if expression is None or expression == '':
+            continue
+        try:
+            variables += [tuple(variable.keys) for variable in TemplateString(expression, {}).get_variables()]
+        except ValueError:
+            return None
+    return tuple(variables)
+
+
+def compile_search_plan(search_configuration, generation=0):
+    """Builds the search plan of a search configuration in the active language. """
+    form_fields = tuple(CompiledSearchField.from_form_field(form_field)
+                        for form_field in search_configuration.search_form_fields.select_related('search_field'))
+
+    card_fields = [CompiledResultCardField(result_field_id=card_field.result_field.pk,
+                                           rich_expression=card_field.result_field.rich_expression,
+                                           field_classes=card_field.result_field.field_classes,
+                                           field_row=card_field.field_row,
+                                           field_column=card_field.field_column,
+                                           field_size=card_field.field_size,
+                                           result_card_group=card_field.result_card_group)
+                   for card_field in search_configuration.result_card_fields.select_related('result_field')]
+    card_rows = {group: get_rows([card_field for card_field in card_fields
+                                  if card_field.result_card_group == group])
+                 for group in sorted({card_field.result_card_group for card_field in card_fields})}
+
+    expressions = [card_field.rich_expression for card_field in card_fields]
+    if len(expressions) > 0:
+        expressions += [search_configuration.citation_expression,
+                        search_configuration.manifest_relation_expression,
+                        search_configuration.manifest_page_expression]
+
+    return SearchPlan(conf_name=search_configuration.conf_name,
+                      language=get_language(),
+                      generation=generation,
+                      form_fields=form_fields,
+                      form_rows=get_rows(form_fields),
+                      card_rows=card_rows,
+                      expression_variables=get_expression_variables(expressions))
+
+
+_plans = {}
+"""Compiled plans. The key is composed of the primary key of the configuration and the language."""
+
+_plans_lock = threading.Lock()
+
+
+def get_generation():
+    """Returns the current configuration generation. If the counter is missing in the cache (e.g. it has been
+    evicted), it is restarted with the current time, so it can't match the generation of an old plan."""
+    if not NdrSettings.cache_is_shared():
+        return get_stored_generation()
+
+    shared_cache = NdrSettings.get_cache()
+    generation = shared_cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        shared_cache.add(GENERATION_CACHE_KEY, time.time_ns(), timeout=None)
+        generation = shared_cache.get(GENERATION_CACHE_KEY)
+    return generation
+
+
+def get_stored_generation():
+    """Returns the configuration generation stored in the database. It is initialized on first use. """
+    generation = NdrCoreValue.objects.filter(value_name=GENERATION_VALUE_NAME).values_list('value_value',
+                                                                                         flat=True).first()
+    if generation is None:
+        generation = NdrCoreValue.get_or_initialize(GENERATION_VALUE_NAME,
+                                                    init_value=str(time.time_ns()),
+                                                    init_label='Search Plan Generation').value_value
+    return int(generation)
+
+
+def invalidate_search_plans():
+    """Changes the configuration generation. All plans are rebuilt on their next use. """
+    if not NdrSettings.cache_is_shared():
+        # The value is updated without saving the object, which would send a signal.
+        if NdrCoreValue.objects.filter(value_name=GENERATION_VALUE_NAME).update(
+                value_value=str(time.time_ns())) == 0:
+            get_stored_generation()
+        return
+
+    shared_cache = NdrSettings.get_cache()
+    try:
+        shared_cache.incr(GENERATION_CACHE_KEY)
+    except ValueError:
+        shared_cache.set(GENERATION_CACHE_KEY, time.time_ns(), timeout=None)
+
+
+def get_search_plan(search_configuration):
+    """Returns the search plan of a search configuration in the active language. The plan is compiled on first
+    use and whenever the configuration has changed since.
+
+    :param search_configuration: A NdrCoreSearchConfiguration object.
+    :return: A SearchPlan"""
+    generation = get_generation()
+    key = (search_configuration.pk, get_language())
+
+    plan = _plans.get(key)
+    if plan is None or plan.generation != generation:
+        plan = compile_search_plan(search_configuration, generation)
+        with _plans_lock:
+            _plans[key] = plan
+    return plan
+
+
+class ChoiceIndex:
+    """A searchable index of the choices of a search field in one language. Choices whose label starts with
+    the search term are found with a binary search in the sorted labels and come first. Choices which contain
+    the search term elsewhere follow in the order of the configuration."""
+
+    def __init__(self, choices):
+        self.choices = tuple((str(value), str(label)) for value, label in choices)
+        self.labels = dict(self.choices)
+        self._folded_labels = tuple(label.casefold() for _value, label in self.choices)
+        self._sorted_labels = sorted((label, position) for position, label in enumerate(self._folded_labels))
+        self._sorted_keys = [label for label, _position in self._sorted_labels]
+
+    def __len__(self):
+        return len(self.choices)
+
+    def get_label(self, value):
+        """Returns the label of a choice value or None if the value is not a choice. """
+        return self.labels.get(value)
+
+    def _find_positions(self, term):
+        """Yields the positions of the matching choices: prefix matches first, then substring matches. """
+        if term == '':
+            yield from range(len(self.choices))
+            return
+
+        prefix_positions = set()
+        for label, position in self._sorted_labels[bisect.bisect_left(self._sorted_keys, term):]:
+            if not label.startswith(term):
+                break
+            prefix_positions.add(position)
+            yield position
+
+        for position, label in enumerate(self._folded_labels):
+            if position not in prefix_positions and term in label:
+                yield position
+
+    def search(self, term, offset=0, limit=50):
+        """Returns a page of the choices matching a search term (case-insensitive).
+
+        :param term: The search term.
+        :param offset: Number of matching choices to skip.
+        :param limit: Maximum number of choices to return.
+        :return: Tuple of (list of (value, label) tuples, True if there are more matching choices)"""
+        positions = list(itertools.islice(self._find_positions(term.strip().casefold()), offset, offset + limit + 1))
+        return [self.choices[position] for position in positions[:limit]], len(positions) > limit
+
+
+_choice_indexes = {}
+"""Choice indexes. The key is composed of the primary key of the configuration, the field name and the language."""
+
+
+def get_choice_index(search_configuration, field_name):
+    """Returns the choice index of a search field of a configuration in the active language or None if the
+    field is not part of the search form. The index is built on first use and whenever the configuration has
+    changed since."""
+    search_plan = get_search_plan(search_configuration)
+    key = (search_configuration.pk, field_name, search_plan.language)
+
+    entry = _choice_indexes.get(key)
+    if entry is None or entry[0] != search_plan.generation:
+        search_field = search_plan.get_field(field_name)
+        if search_field is None:
+            return None
+        entry = (search_plan.generation, ChoiceIndex(search_field.choices))
+        with _plans_lock:
+            _choice_indexes[key] = entry
+    return entry[1]
+
+
+def _configuration_changed(sender, **kwargs):
+    """Signal receiver which invalidates the plans when a model they are built from is changed. """
+    invalidate_search_plans()
+
+
+def _value_changed(sender, instance, created=False, **kwargs):
+    """Signal receiver which invalidates the plans when the available languages are changed. The value is
+    initialized (created) while a plan is compiled, which must not invalidate the plan."""
+    if instance.value_name == 'available_languages' and not created:
+        invalidate_search_plans()
+
+
+def connect_signals():
+    """Connects the signals which invalidate the search plans. Called when the app is ready. """
+    for model in PLAN_MODELS:
+        post_save.connect(_configuration_changed, sender=model, dispatch_uid=f'ndr_core_plan_save_{model.__name__}')
+        post_delete.connect(_configuration_changed, sender=model,
+                            dispatch_uid=f'ndr_core_plan_delete_{model.__name__}')
+    post_save.connect(_value_changed, sender=NdrCoreValue, dispatch_uid='ndr_core_plan_save_NdrCoreValue')
+    post_delete.connect(_value_changed, sender=NdrCoreValue, dispatch_uid='ndr_core_plan_delete_NdrCoreValue')
+    for through in [NdrCoreSearchConfiguration.search_form_fields.through,
+                    NdrCoreSearchConfiguration.result_card_fields.through,
+                    NdrCorePage.search_configs.through]:
+        m2m_changed.connect(_configuration_changed, sender=through,
+                            dispatch_uid=f'ndr_core_plan_m2m_{through.__name__}')
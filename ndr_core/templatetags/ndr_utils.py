@@ -3,10 +3,11 @@ import json
 import re
 
 from django import template
-from django.db.models import Max
 from django.template.loader import get_template
 from django.utils.safestring import mark_safe
+from ndr_core.card_cache import card_cache
 from ndr_core.ndr_templatetags.template_string import TemplateString
+from ndr_core.search_plan import get_search_plan
 
 register = template.Library()
 
@@ -26,70 +27,71 @@ class RenderResultNode(template.Node):
         self.result = template.Variable(result)
         self.search_config = template.Variable(search_config)
 
-    def create_card(self, context, result, compact_view):
-        """Creates a result card."""
+    def create_card(self, card_template, card_rows, result, card_contents):
+        """Creates a result card from the rendered contents of its fields and its citation
+        (see create_card_contents). Card templates from before card_rows can still use card_content,
+        which is only rendered if the template uses it."""
+        grid = self.create_grid(card_rows, card_contents["fields"])
         card_context = {
             "result": result,
-            "card_content": self.create_grid(context, result["data"], compact_view),
-            "citation": self.create_citation(context, result["data"]),
+            "card_rows": grid,
+            "card_content": lambda: self.create_card_content(grid),
+            "citation": mark_safe(card_contents["citation"]),
         }
-        card_template = "ndr_core/result_renderers/configured_fields_template.html"
-
-        card_template_str = get_template(card_template).render(card_context)
+        card_template_str = card_template.render(card_context)
         return mark_safe(card_template_str)
 
-    def create_citation(self, context, result):
+    def create_card_contents(self, search_config, card_rows, data, generation=None):
+        """Renders the contents of a card which depend on the record data only: the contents of
+        the fields (as lists per row) and the citation. The contents can be cached."""
+        return {
+            "fields": [[str(self.create_field(field, data, generation)) for field in row] for row in card_rows],
+            "citation": str(self.create_citation(search_config, data, generation)),
+        }
+
+    @staticmethod
+    def create_citation(search_config, result, generation=None):
         """Creates a citation."""
-        exp = self.search_config.resolve(context).citation_expression
-        template_string = TemplateString(exp, result, show_errors=False)
+        exp = search_config.citation_expression
+        template_string = TemplateString(exp, result, show_errors=False, generation=generation)
         citation = template_string.get_formatted_string()
         citation = template_string.sanitize_html(citation)
         return mark_safe(citation)
 
-    def create_grid(self, context, data, compact_view):
-        """Creates a grid of result fields."""
-        row_template = "ndr_core/result_renderers/elements/result_row.html"
-        result_card_fields = self.search_config.resolve(
-            context
-        ).result_card_fields.filter(result_card_group=compact_view)
-        max_row = result_card_fields.aggregate(Max("field_row"))
+    @staticmethod
+    def create_grid(card_rows, field_contents):
+        """Creates a grid of result fields. Returns the rows of the card as lists of
+        (card field, rendered field content) tuples."""
+        return [[(field, mark_safe(content)) for field, content in zip(row, row_contents)]
+                for row, row_contents in zip(card_rows, field_contents)]
 
-        card_grid_str = ""
-        for row in range(max_row["field_row__max"]):
-            row += 1
-            fields = []
-            for column in result_card_fields.filter(field_row=row).order_by(
-                "field_column"
-            ):
-                field_html = self.create_field(column, data)
-                fields.append(field_html)
-            row_context = {"fields": fields}
-            row_template_str = get_template(row_template).render(row_context)
-            card_grid_str += row_template_str
+    @staticmethod
+    def create_card_content(grid):
+        """Renders a grid (see create_grid) as HTML with the row and field element templates."""
+        row_template = get_template("ndr_core/result_renderers/elements/result_row.html")
+        field_template = get_template("ndr_core/result_renderers/elements/result_field.html")
 
+        card_grid_str = ""
+        for row in grid:
+            fields = [mark_safe(field_template.render({"size": field.field_size,
+                                                       "classes": field.field_classes,
+                                                       "field_content": field_content}))
+                      for field, field_content in row]
+            card_grid_str += row_template.render({"fields": fields})
         return mark_safe(card_grid_str)
 
     @staticmethod
-    def create_field(field, data):
-        """Creates a result field."""
-        field_template = "ndr_core/result_renderers/elements/result_field.html"
-        result_field = field.result_field
+    def create_field(field, data, generation=None):
+        """Creates the content of a result field."""
         template_string = TemplateString(
-            result_field.rich_expression, data, show_errors=True
+            field.rich_expression, data, show_errors=True, generation=generation
         )
         field_content = template_string.get_formatted_string()
-        field_content = template_string.sanitize_html(field_content)
-
-        field_context = {
-            "size": field.field_size,
-            "classes": result_field.field_classes,
-            "field_content": field_content,
-        }
-        field_template_str = get_template(field_template).render(field_context)
-        return mark_safe(field_template_str)
+        return template_string.sanitize_html(field_content)
 
     def render(self, context):
-        """Renders a result object."""
+        """Renders a result object. The card layout and the template are resolved once and
+        used for all results."""
         result_object = self.result.resolve(context)
         conf = self.search_config.resolve(context)
 
@@ -100,20 +102,32 @@ class RenderResultNode(template.Node):
         ):
             compact_view = "compact"
 
-        num_result_fields = (
-            self.search_config.resolve(context).result_card_fields.all().count()
-        )
+        search_plan = get_search_plan(conf)
 
-        html_string = ""
-        for result in result_object.results:
-            if num_result_fields > 0:
-                html_string += self.create_card(context, result, compact_view)
-            else:
-                # No result card fields configured, so we render the result as pretty json
-                card_context = {"result": result}
-                card_template = "ndr_core/result_renderers/default_template.html"
-                html_string += get_template(card_template).render(card_context)
+        if not search_plan.has_card_fields:
+            # No result card fields configured, so we render the result as pretty json
+            card_template = get_template("ndr_core/result_renderers/default_template.html")
+            return mark_safe("".join(card_template.render({"result": result})
+                                     for result in result_object.results))
+
+        card_template = get_template("ndr_core/result_renderers/configured_fields_template.html")
+        card_rows = search_plan.get_card_rows(compact_view)
+        # The contents of the cards are looked up in the card cache with one request for the whole page.
+        # The header and footer of a card (result number, options) are rendered for each search.
+        card_keys = [card_cache.get_key(search_plan, compact_view, result) for result in result_object.results]
+        cached_contents = card_cache.get_many(card_keys)
+        new_contents = {}
 
+        html_string = ""
+        for card_key, result in zip(card_keys, result_object.results):
+            card_contents = cached_contents.get(card_key)
+            if card_contents is None:
+                card_contents = self.create_card_contents(conf, card_rows, result["data"], search_plan.generation)
+                if card_key is not None:
+                    new_contents[card_key] = card_contents
+            html_string += self.create_card(card_template, card_rows, result, card_contents)
+
+        card_cache.set_many(new_contents)
         return mark_safe(html_string)
 
 
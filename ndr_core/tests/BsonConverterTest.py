@@ -0,0 +1,41 @@
+import datetime
+import json
+import uuid
+
+from bson import json_util, ObjectId, Decimal128, Binary, Regex, DBRef
+from bson.int64 import Int64
+from django.test import SimpleTestCase
+
+from ndr_core.api.mongodb.bson_converter import to_json_safe
+
+
+class BsonConverterTest(SimpleTestCase):
+
+    def test_same_as_json_util(self):
+        document = {
+            '_id': ObjectId(),
+            'title': 'Letter',
+            'year': 1900,
+            'count': Int64(2 ** 40),
+            'ratio': 0.5,
+            'missing': float('nan'),
+            'verified': True,
+            'empty': None,
+            'date': datetime.datetime(1900, 1, 2, 3, 4, 5, 6000),
+            'recent': datetime.datetime(2020, 1, 2),
+            'price': Decimal128('1.10'),
+            'blob': Binary(b'\x00\x01'),
+            'uuid': Binary.from_uuid(uuid.UUID(int=1)),
+            'pattern': Regex('^a', 'i'),
+            'reference': DBRef('persons', ObjectId()),
+            'persons': [{'name': 'A', 'born': datetime.datetime(1850, 5, 5)}, ['nested', Int64(1)]],
+        }
+        self.assertEqual(to_json_safe(document), json.loads(json_util.dumps(document)))
+
+    def test_result_is_json_safe(self):
+        converted = to_json_safe({'_id': ObjectId(), 'values': [Int64(1), datetime.datetime(2000, 1, 1)]})
+        self.assertEqual(json.loads(json.dumps(converted)), converted)
+        self.assertIs(type(converted['values'][0]), int)
+
+    def test_none(self):
+        self.assertIsNone(to_json_safe(None))
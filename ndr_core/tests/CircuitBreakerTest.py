@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pymongo.errors
+from django.test import TestCase, RequestFactory
+
+from ndr_core.api import base_result
+from ndr_core.api.base_result import BaseResult
+from ndr_core.api.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from ndr_core.api.mongodb.mongodb_result import MongoDBResult
+from ndr_core.models import NdrCoreSearchConfiguration
+
+
+class CircuitBreakerTest(TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker('http://localhost', failure_threshold=2, cool_down=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+    def test_half_open_after_cool_down(self):
+        breaker = CircuitBreaker('http://localhost', failure_threshold=1, cool_down=30)
+        with mock.patch('ndr_core.api.circuit_breaker.time.monotonic', return_value=100):
+            breaker.record_failure()
+        with mock.patch('ndr_core.api.circuit_breaker.time.monotonic', return_value=131):
+            # Only one trial request is let through
+            self.assertTrue(breaker.allow_request())
+            self.assertFalse(breaker.allow_request())
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+            # A failed trial opens the circuit again
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            self.assertFalse(breaker.allow_request())
+
+        with mock.patch('ndr_core.api.circuit_breaker.time.monotonic', return_value=200):
+            self.assertTrue(breaker.allow_request())
+            breaker.record_success()
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+            self.assertEqual(breaker.failures, 0)
+
+    def test_disabled(self):
+        breaker = CircuitBreaker('http://localhost', failure_threshold=0, cool_down=30)
+        for _ in range(10):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+
+    def test_shared_outcome_frees_trial(self):
+        search_config = SimpleNamespace(conf_name='test_conf', page_size=10, use_keyset_pagination=False,
+                                        api_connection_url='mongodb://shared-outcome/db/collection',
+                                        circuit_failure_threshold=1, circuit_cool_down=0, result_cache_ttl=0)
+        breaker = get_circuit_breaker(search_config)
+        breaker.record_failure()
+
+        for outcome, state in [((None, 'Timed out', -100), CircuitBreaker.HALF_OPEN),
+                               (({'total': 0, 'hits': []}, None, None), CircuitBreaker.CLOSED)]:
+            result = MongoDBResult(search_config, {'filter': {}, 'sort': [('id', 1)], 'page': 1},
+                                   RequestFactory().get('/search'))
+            # The outcome is shared by another search, so this search doesn't download anything
+            with mock.patch.object(base_result.single_flight, 'do', return_value=outcome):
+                result.load_raw_result()
+            self.assertEqual(breaker.state, state)
+            self.assertTrue(breaker.allow_request())
+            breaker.release_trial()
+
+    def test_slow_searches_dont_open_circuit(self):
+        search_config = SimpleNamespace(conf_name='test_conf', page_size=10, use_keyset_pagination=False,
+                                        use_facet_pipeline=False,
+                                        count_strategy=NdrCoreSearchConfiguration.CountStrategy.EXACT,
+                                        api_connection_url='mongodb://slow-searches/db/collection',
+                                        circuit_failure_threshold=1, circuit_cool_down=30, result_cache_ttl=0)
+        breaker = get_circuit_breaker(search_config)
+
+        for error, error_code, state in [(pymongo.errors.ExecutionTimeout('slow'), BaseResult.QUERY_TIMEOUT,
+                                          CircuitBreaker.CLOSED),
+                                         (pymongo.errors.AutoReconnect('lost'), BaseResult.REQUEST,
+                                          CircuitBreaker.OPEN)]:
+            collection = mock.Mock()
+            collection.find.side_effect = error
+            collection.count_documents.side_effect = error
+            result = MongoDBResult(search_config, {'filter': {}, 'sort': [('id', 1)], 'page': 1},
+                                   RequestFactory().get('/search'))
+            with mock.patch('ndr_core.api.mongodb.mongodb_result.get_mongo_collection', return_value=collection):
+                result.load_raw_result()
+            self.assertEqual(result.error_code, error_code)
+            self.assertEqual(breaker.state, state)
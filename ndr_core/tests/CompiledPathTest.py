@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from ndr_core.api.base_result import BaseResult
+from ndr_core.ndr_templatetags.template_string import TemplateString
+from ndr_core.utils import compile_path, create_csv_export_string, get_nested_value
+
+
+class CompiledPathTest(SimpleTestCase):
+    record = {'id': 'r1', 'persons': [{'name': 'Anna', 'roles': ['writer']}, {'name': 'Ben', 'roles': []}],
+              'meta': {'0': 'zero', 'date': {'year': 1850}}}
+
+    def test_syntax(self):
+        for path in ['persons.1.name', 'persons[1][name]', 'persons[1].name', 'persons.1[name]']:
+            self.assertEqual(compile_path(path).resolve(self.record), 'Ben')
+        self.assertEqual(compile_path('meta.0').resolve(self.record), 'zero')
+        self.assertEqual(compile_path(('meta', 'date', 'year')).resolve(self.record), 1850)
+        self.assertIs(compile_path('meta.date.year'), compile_path('meta.date.year'))
+
+    def test_fan_out(self):
+        self.assertEqual(compile_path('persons.name').resolve(self.record), ['Anna', 'Ben'])
+        self.assertEqual(compile_path('persons.name').resolve(self.record, join=', '), 'Anna, Ben')
+
+    def test_errors(self):
+        with self.assertRaises(KeyError):
+            compile_path('meta.place').resolve(self.record)
+        with self.assertRaises(IndexError):
+            compile_path('persons.5').resolve(self.record)
+
+    def test_callers(self):
+        self.assertEqual(get_nested_value(self.record, 'persons.name'), 'Anna, Ben')
+        self.assertEqual(get_nested_value(self.record, 'meta.place'), 'Key Not found')
+        self.assertEqual(get_nested_value(self.record, 'id.value'), 'TypeError')
+        self.assertEqual(BaseResult.safe_get(self.record, ['meta', 'date', 'year']), 1850)
+        self.assertIsNone(BaseResult.safe_get(self.record, ['meta', 'place']))
+        self.assertEqual(TemplateString('{persons[0][name]} {meta.date.year} {persons.name}',
+                                        self.record).get_formatted_string(), 'Anna 1850 Anna, Ben')
+        self.assertEqual(create_csv_export_string([self.record], [{'header': 'Names', 'field': 'persons.name'}]),
+                         b'Names\r\n"Anna, Ben"\r\n')
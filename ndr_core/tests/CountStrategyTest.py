@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory
+
+from ndr_core.api.mongodb.mongodb_result import MongoDBResult
+from ndr_core.models import NdrCoreSearchConfiguration
+
+
+class FakeCollection:
+    """Counts like a collection with a fixed number of matching documents. """
+
+    def __init__(self, matching):
+        self.matching = matching
+        self.counts = 0
+
+    def count_documents(self, query_filter, limit=0):
+        self.counts += 1
+        return min(self.matching, limit) if limit else self.matching
+
+    def estimated_document_count(self):
+        return self.matching
+
+
+class CountStrategyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get_result(self, strategy, query_filter=None, page=1):
+        search_config = SimpleNamespace(conf_name='test_conf', page_size=10, use_keyset_pagination=False,
+                                        count_strategy=strategy, count_limit=100, count_cache_ttl=60)
+        query = {'filter': query_filter or {'type': 'letter'}, 'sort': [('id', 1)], 'page': page}
+        result = MongoDBResult(search_config, query, RequestFactory().get('/search'))
+        result.page = page
+        return result
+
+    def test_capped(self):
+        result = self.get_result(NdrCoreSearchConfiguration.CountStrategy.CAPPED)
+        self.assertEqual(result.count_documents(FakeCollection(50)), (50, False))
+        self.assertEqual(result.count_documents(FakeCollection(5000)), (100, True))
+
+        # Pages at and beyond the cap are counted up to the next page, so there is always a next page
+        for page, total in [(10, 110), (20, 210)]:
+            result = self.get_result(NdrCoreSearchConfiguration.CountStrategy.CAPPED, page=page)
+            self.assertEqual(result.count_documents(FakeCollection(5000)), (total, True))
+            result.raw_result = {'total': total, 'total_is_approximate': True, 'page': page, 'hits': []}
+            result.fill_search_result_meta_data()
+            self.assertEqual(result.num_pages, page + 1)
+
+        # On the last page, the count is exact and there is no next page
+        result = self.get_result(NdrCoreSearchConfiguration.CountStrategy.CAPPED, page=10)
+        self.assertEqual(result.count_documents(FakeCollection(100)), (100, False))
+
+    def test_cached(self):
+        collection = FakeCollection(50)
+        self.get_result(NdrCoreSearchConfiguration.CountStrategy.CACHED).count_documents(collection)
+        total = self.get_result(NdrCoreSearchConfiguration.CountStrategy.CACHED).count_documents(collection)
+        self.assertEqual(total, (50, False))
+        self.assertEqual(collection.counts, 1)
+
+    def test_display_total(self):
+        result = self.get_result(NdrCoreSearchConfiguration.CountStrategy.CAPPED)
+        result.raw_result = {'total': 100, 'total_is_approximate': True, 'page': 1, 'hits': []}
+        result.fill_search_result_meta_data()
+        self.assertEqual(result.get_display_total(), '100+')
+        self.assertEqual(result.num_pages, 10)
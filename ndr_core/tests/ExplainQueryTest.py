@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+
+from ndr_core.api.base_query import BaseQuery
+from ndr_core.api.mongodb.mongodb_query import MongoDBQuery
+from ndr_core.api.mongodb.mongodb_result import MongoDBResult
+from ndr_core.api.ndr_core.ndr_core_query import NdrCoreQuery
+from ndr_core.models import NdrCoreApiImplementation, NdrCoreSearchConfiguration
+
+
+class FakeCollection:
+    """Returns fixed query plans and remembers what was explained. """
+    name = 'collection'
+
+    def __init__(self):
+        self.database = mock.Mock()
+        self.database.command.return_value = {'stages': [{'$cursor': {
+            'queryPlanner': {'winningPlan': {'stage': 'IXSCAN', 'indexName': 'type_1'}},
+            'executionStats': {'nReturned': 40, 'totalDocsExamined': 40}}}, {'$facet': {}}]}
+        self.find_filter = None
+
+    def find(self, **kwargs):
+        self.find_filter = kwargs['filter']
+        return SimpleNamespace(explain=lambda: {'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}}})
+
+
+class ExplainQueryTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_config = NdrCoreSearchConfiguration.objects.create(
+            conf_name='test_conf', conf_label='Test', api_type=api_type,
+            api_connection_url='mongodb://localhost:27017/db/collection')
+
+    def test_ndr_core_explain_query(self):
+        search_config = SimpleNamespace(api_connection_url='https://api.ndr.ch/', page_size=10)
+        query = NdrCoreQuery(search_config)
+        query.get_list_query('persons', search_term='anna')
+        self.assertEqual(query.get_explain_query(BaseQuery.Q_LIST),
+                         'https://api.ndr.ch/query/list_explain?l=persons&t=anna')
+        query.search_term = 'anna'
+        self.assertEqual(query.get_explain_query(BaseQuery.Q_SIMPLE),
+                         'https://api.ndr.ch/query/basic_explain?t=anna')
+
+    def test_mongodb_explain_query(self):
+        query = MongoDBQuery(self.search_config)
+        query.search_term = 'letter'
+        self.assertEqual(query.get_explain_query(BaseQuery.Q_SIMPLE)['type'], 'explain')
+        self.assertIsNone(query.get_explain_query(BaseQuery.Q_LIST))
+
+    def test_and_or_is_explained(self):
+        query = MongoDBQuery(self.search_config)
+        query.search_term = 'letter anna'
+        query.and_or = 'or'
+        self.assertEqual(query.get_explain_query(BaseQuery.Q_SIMPLE)['filter']['transcription.original']['$regex'],
+                         '(letter|anna)')
+
+    def test_explain_facet_pipeline(self):
+        self.search_config.use_facet_pipeline = True
+        collection = FakeCollection()
+        query = {'filter': {'type': 'letter'}, 'sort': [('id', 1)], 'page': 1, 'type': 'explain'}
+        result = MongoDBResult(self.search_config, query, RequestFactory().get('/'))
+        with mock.patch('ndr_core.api.mongodb.mongodb_result.get_mongo_collection', return_value=collection):
+            result.download_result()
+
+        self.assertIsNone(collection.find_filter)
+        command, explained = collection.database.command.call_args.args
+        self.assertEqual(command, 'explain')
+        self.assertEqual(explained['aggregate'], 'collection')
+        self.assertEqual(explained['pipeline'], result.get_facet_pipeline(query['filter'], [('id', 1)], 0, 10,
+                                                                          None, result.get_facet_fields()))
+        summary = result.get_explain_summary()
+        self.assertEqual(summary['winning_plan'], '$facet > IXSCAN')
+        self.assertEqual(summary['index_names'], ['type_1'])
+        self.assertEqual(summary['docs_returned'], 40)
+
+    def test_explain_summary(self):
+        result = MongoDBResult(self.search_config, {'filter': {}}, RequestFactory().get('/'))
+        result.raw_result = {
+            'queryPlanner': {'winningPlan': {'stage': 'LIMIT', 'inputStage': {
+                'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'year_1'}}}},
+            'executionStats': {'nReturned': 10, 'totalDocsExamined': 10, 'totalKeysExamined': 12,
+                               'executionTimeMillis': 3}}
+        summary = result.get_explain_summary()
+        self.assertEqual(summary['winning_plan'], 'LIMIT > FETCH > IXSCAN')
+        self.assertEqual(summary['index_names'], ['year_1'])
+        self.assertFalse(summary['is_collection_scan'])
+        self.assertEqual((summary['docs_examined'], summary['docs_returned']), (10, 10))
+
+    def test_explain_view(self):
+        self.client.force_login(User.objects.create_user('admin'))
+        response = self.client.get(reverse('ndr_core:explain_search_config', kwargs={'pk': self.search_config.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Explain Searches')
+
+    def test_explain_view_and_or(self):
+        self.client.force_login(User.objects.create_user('admin'))
+        collection = FakeCollection()
+        with mock.patch('ndr_core.api.mongodb.mongodb_result.get_mongo_collection', return_value=collection):
+            response = self.client.get(reverse('ndr_core:explain_search_config', kwargs={'pk': self.search_config.pk}),
+                                       {'search_button_test_conf_simple': '', 'search_term_test_conf': 'letter anna',
+                                        'and_or_field_test_conf': 'or'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(collection.find_filter, {'transcription.original': {'$regex': '(letter|anna)',
+                                                                             '$options': 'msi'}})
+        self.assertContains(response, 'Collection Scan')
@@ -0,0 +1,100 @@
+from unittest import mock
+
+import pymongo.errors
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory
+
+from ndr_core.api.base_result import BaseResult
+from ndr_core.api.mongodb import mongodb_result
+from ndr_core.api.mongodb.mongodb_result import MongoDBResult
+from ndr_core.models import (NdrCoreApiImplementation,
+                             NdrCoreSearchConfiguration,
+                             NdrCoreSearchField,
+                             NdrCoreSearchFieldFormConfiguration)
+
+
+class FakeCollection:
+    """Returns a fixed aggregation output and remembers the pipeline. """
+
+    def __init__(self, output):
+        self.output = output
+        self.pipeline = None
+        self.options = None
+
+    def aggregate(self, pipeline, **options):
+        self.pipeline = pipeline
+        self.options = options
+        if isinstance(self.output, Exception):
+            raise self.output
+        return iter([self.output])
+
+    def estimated_document_count(self, **options):
+        return 1000
+
+
+class FacetPipelineTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_config = NdrCoreSearchConfiguration.objects.create(
+            conf_name='test_conf', conf_label='Test', api_type=api_type,
+            api_connection_url='mongodb://localhost:27017/db/collection', use_facet_pipeline=True)
+
+        list_field = NdrCoreSearchField.objects.create(
+            field_type=NdrCoreSearchField.FieldType.MULTI_LIST, field_name='tags', field_label='Tags',
+            list_choices='[{"key": "a", "value": "A"}, {"key": "b", "value": "B"}]')
+        bool_field = NdrCoreSearchField.objects.create(
+            field_type=NdrCoreSearchField.FieldType.BOOLEAN_LIST, field_name='flags', field_label='Flags',
+            list_choices='[{"key": "is_letter", "value": "Letter"}]')
+        for field in (list_field, bool_field):
+            form_field = NdrCoreSearchFieldFormConfiguration.objects.create(search_field=field, field_row=1,
+                                                                            field_column=1, field_size=6)
+            self.search_config.search_form_fields.add(form_field)
+
+        query = {'filter': {'type': 'letter'}, 'sort': [('id', 1)], 'projection': None, 'page': 1}
+        self.result = MongoDBResult(self.search_config, query, RequestFactory().get('/search?test_conf_tags=a__true'))
+
+    def test_facets(self):
+        collection = FakeCollection({'hits': [{'id': 1}], 'total': [{'count': 42}],
+                                     'facet_0': [{'_id': 'b', 'count': 7}, {'_id': 'a', 'count': 3}],
+                                     'facet_1': [{'_id': None, 'c0': 5}]})
+        hits, total, total_is_approximate, facets = self.result.aggregate_with_facets(
+            collection, {'type': 'letter'}, [('id', 1)], 0, 10, None)
+
+        self.assertEqual(collection.pipeline[0], {'$match': {'type': 'letter'}})
+        self.assertEqual(collection.options, {'allowDiskUse': True})
+        self.assertEqual(set(collection.pipeline[1]['$facet'].keys()), {'hits', 'total', 'facet_0', 'facet_1'})
+        self.assertEqual((hits, total, total_is_approximate), ([{'id': 1}], 42, False))
+        self.assertEqual([(value['label'], value['count']) for value in facets[0]['values']], [('A', 3), ('B', 7)])
+        self.assertEqual(facets[1]['values'], [{'value': 'is_letter__true', 'label': 'Letter', 'count': 5}])
+
+        linked_facets = self.result.create_facet_links(facets)
+        self.assertTrue(linked_facets[0]['values'][0]['selected'])
+        self.assertIn('test_conf_tags=a__true&test_conf_tags=b__true', linked_facets[0]['values'][1]['url'])
+
+    def test_operation_failure(self):
+        collection = FakeCollection(pymongo.errors.OperationFailure('Sort exceeded memory limit', code=292))
+        with mock.patch.object(mongodb_result, 'get_mongo_collection', return_value=collection):
+            self.result.download_result()
+        self.assertEqual(self.result.error_code, BaseResult.SERVER)
+        self.assertIsNone(self.result.raw_result)
+
+    def test_count_strategies(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        output = {'hits': [{'id': 1}], 'total': [{'count': 42}]}
+
+        self.search_config.count_strategy = NdrCoreSearchConfiguration.CountStrategy.CACHED
+        for has_total in (True, False):
+            collection = FakeCollection(output)
+            _hits, total, _approximate, _facets = self.result.aggregate_with_facets(
+                collection, {'type': 'letter'}, [('id', 1)], 0, 10, None)
+            self.assertEqual('total' in collection.pipeline[1]['$facet'], has_total)
+            self.assertEqual(total, 42)
+
+        self.search_config.count_strategy = NdrCoreSearchConfiguration.CountStrategy.ESTIMATED
+        result = MongoDBResult(self.search_config, {'filter': {}, 'sort': [('id', 1)], 'page': 1},
+                               RequestFactory().get('/search'))
+        collection = FakeCollection(output)
+        _hits, total, _approximate, _facets = result.aggregate_with_facets(collection, {}, [('id', 1)], 0, 10, None)
+        self.assertNotIn('total', collection.pipeline[1]['$facet'])
+        self.assertEqual(total, 1000)
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from django.test import TestCase
+
+from ndr_core.api.mongodb.mongodb_query import MongoDBQuery
+from ndr_core.api.ndr_core.ndr_core_query import NdrCoreQuery
+from ndr_core.models import NdrCoreSearchField
+
+
+class FieldConfigurationTest(TestCase):
+    def setUp(self):
+        NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.STRING,
+                                          field_name='name', api_parameter='person.name')
+        NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.NUMBER,
+                                          field_name='year', api_parameter='date.year',
+                                          data_field_type='int')
+        NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.LIST,
+                                          field_name='type', list_condition='OR',
+                                          list_choices='[{"key": "letter", "value": "Letter"}]')
+
+    def test_fields_are_loaded_with_one_query(self):
+        query = MongoDBQuery(SimpleNamespace(page_size=10))
+        query.set_value('name', 'anna')
+        query.set_value('year', '1850')
+        query.set_value('type', 'letter')
+        query.set_value('type_condition', 'AND')
+        with self.assertNumQueries(1):
+            field_configs = query.get_field_configurations()
+            query.get_field_configurations()
+
+        self.assertEqual([(conf.parameter, conf.value) for conf in field_configs],
+                         [('person.name', 'anna'), ('date.year', 1850), ('type', 'letter')])
+        self.assertEqual(field_configs[2].condition, 'and')
+
+    def test_unknown_field(self):
+        query = MongoDBQuery(SimpleNamespace(page_size=10))
+        query.set_value('unknown', 'value')
+        with self.assertRaises(ValueError):
+            query.get_field_configurations()
+
+    def test_ndr_core_advanced_query(self):
+        query = NdrCoreQuery(SimpleNamespace(api_connection_url='https://api.ndr.ch/', page_size=10))
+        query.set_value('name', 'anna')
+        query.set_value('year', '1850')
+        with self.assertNumQueries(1):
+            self.assertEqual(query.get_advanced_query(add_page_and_size=False),
+                             'https://api.ndr.ch/query/advanced?person.name=anna&date.year=1850')
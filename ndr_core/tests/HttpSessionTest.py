@@ -0,0 +1,78 @@
+import http.client
+import os
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+import requests
+from requests.cookies import MockRequest, MockResponse
+from django.test import SimpleTestCase
+
+from ndr_core.api import http_session
+from ndr_core.api.http_session import get_http_session, close_http_sessions
+
+
+class HttpSessionTest(SimpleTestCase):
+    @staticmethod
+    def get_config(url='https://api.example.org/search', pool_size=10, keep_alive=True, retries=2):
+        return SimpleNamespace(api_connection_url=url,
+                               connection_pool_size=pool_size,
+                               connection_keep_alive=keep_alive,
+                               connection_retries=retries)
+
+    def tearDown(self):
+        close_http_sessions()
+
+    def test_session_is_shared_per_host(self):
+        session = get_http_session(self.get_config())
+        self.assertIs(get_http_session(self.get_config('https://api.example.org/other?q=1')), session)
+        self.assertIsNot(get_http_session(self.get_config('http://api.example.org/search')), session)
+        self.assertIsNot(get_http_session(self.get_config('https://other.example.org/search')), session)
+        self.assertIsNot(get_http_session(self.get_config(pool_size=5)), session)
+
+    def test_pool_and_retry_settings(self):
+        session = get_http_session(self.get_config(pool_size=4, retries=3))
+        for url in ('http://api.example.org/', 'https://api.example.org/'):
+            adapter = session.get_adapter(url)
+            self.assertEqual(adapter._pool_maxsize, 4)
+            retry = adapter.max_retries
+            self.assertEqual((retry.total, retry.connect, retry.read, retry.status), (3, 3, 0, 0))
+            self.assertEqual(list(retry.allowed_methods), ['GET'])
+        self.assertEqual(session.headers['Connection'], 'keep-alive')
+
+    def test_keep_alive_off(self):
+        session = get_http_session(self.get_config(pool_size=0, keep_alive=False))
+        self.assertEqual(session.headers['Connection'], 'close')
+        self.assertEqual(session.get_adapter('https://api.example.org/')._pool_maxsize, 1)
+
+    def test_cookies_are_not_kept(self):
+        headers = http.client.HTTPMessage()
+        headers['Set-Cookie'] = 'sessionid=user-1; Path=/'
+        request = requests.Request('GET', 'https://api.example.org/search').prepare()
+        for session, number_of_cookies in [(requests.Session(), 1), (get_http_session(self.get_config()), 0)]:
+            session.cookies.extract_cookies(MockResponse(headers), MockRequest(request))
+            self.assertEqual(len(session.cookies), number_of_cookies)
+
+    def test_close(self):
+        session = get_http_session(self.get_config())
+        with mock.patch.object(session, 'close') as close:
+            close_http_sessions()
+        close.assert_called_once()
+        self.assertIsNot(get_http_session(self.get_config()), session)
+
+    def test_reset_after_fork(self):
+        session = get_http_session(self.get_config())
+        with mock.patch.object(session, 'close') as close:
+            http_session._reset_after_fork()
+        close.assert_not_called()
+        self.assertIsNot(get_http_session(self.get_config()), session)
+
+    @skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_child_process_creates_own_session(self):
+        session = get_http_session(self.get_config())
+        pid = os.fork()
+        if pid == 0:
+            # pylint: disable=protected-access
+            os._exit(0 if not http_session._sessions and get_http_session(self.get_config()) is not session else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(get_http_session(self.get_config()), session)
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+from django.test import TestCase
+
+from ndr_core.api.mongodb.mongodb_indexes import IndexAdvisor
+from ndr_core.models import (NdrCoreApiImplementation,
+                             NdrCoreSearchConfiguration,
+                             NdrCoreSearchField,
+                             NdrCoreSearchFieldFormConfiguration)
+
+
+class FakeCollection:
+    """A collection with fixed indexes and query plans. """
+
+    name = 'collection'
+
+    def __init__(self, indexes, stage):
+        self.indexes = indexes
+        self.database = SimpleNamespace(command=lambda *args, **kwargs: {
+            'queryPlanner': {'winningPlan': {'stage': 'LIMIT', 'inputStage': {'stage': stage}}}})
+
+    def index_information(self):
+        return {name: info if isinstance(info, dict) else {'key': info} for name, info in self.indexes.items()}
+
+
+class IndexAdvisorTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_config = NdrCoreSearchConfiguration.objects.create(
+            conf_name='test_conf', conf_label='Test', api_type=api_type,
+            api_connection_url='mongodb://localhost:27017/db/collection', sort_field='year', sort_order='desc')
+
+        fields = [NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.LIST,
+                                                    field_name='type', api_parameter='meta.type'),
+                  NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.STRING,
+                                                    field_name='text'),
+                  NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.BOOLEAN_LIST,
+                                                    field_name='flags',
+                                                    list_choices='[{"key": "is_letter", "value": "Letter"}]')]
+        for field in fields:
+            form_field = NdrCoreSearchFieldFormConfiguration.objects.create(search_field=field, field_row=1,
+                                                                            field_column=1, field_size=4)
+            self.search_config.search_form_fields.add(form_field)
+
+    def test_recommended_indexes(self):
+        advisor = IndexAdvisor(self.search_config)
+        self.assertEqual(advisor.get_recommended_indexes(), [[('year', -1)],
+                                                             [('meta.type', 1), ('year', -1)],
+                                                             [('is_letter', 1), ('year', -1)]])
+        self.assertEqual(advisor.get_unindexable_fields(), ['text', 'transcription.original'])
+
+    def test_text_index(self):
+        self.search_config.simple_query_mode = NdrCoreSearchConfiguration.SimpleQueryMode.TEXT
+        advisor = IndexAdvisor(self.search_config)
+        self.assertEqual(advisor.get_recommended_indexes()[-1], [('transcription.original', 'text')])
+        self.assertEqual(advisor.get_unindexable_fields(), ['text'])
+        self.assertEqual(advisor.get_index_name([('transcription.original', 'text')]),
+                         'ndr_core_text_transcription.original')
+
+        advisor._collection = FakeCollection({'other_text': {'key': [('_fts', 'text'), ('_ftsx', 1)],
+                                                             'weights': {'title': 1}}}, 'IXSCAN')
+        self.assertIn([('transcription.original', 'text')], advisor.get_missing_indexes())
+        advisor._collection = FakeCollection({'text': {'key': [('_fts', 'text'), ('_ftsx', 1)],
+                                                       'weights': {'title': 1, 'transcription.original': 1}}},
+                                             'IXSCAN')
+        self.assertEqual(advisor.get_existing_indexes(),
+                         {'text': [('title', 'text'), ('transcription.original', 'text')]})
+        self.assertNotIn([('transcription.original', 'text')], advisor.get_missing_indexes())
+
+    def test_no_simple_search(self):
+        self.search_config.has_simple_search = False
+        self.search_config.simple_query_mode = NdrCoreSearchConfiguration.SimpleQueryMode.TEXT
+        advisor = IndexAdvisor(self.search_config)
+        self.assertEqual(len(advisor.get_recommended_indexes()), 3)
+        self.assertEqual(advisor.get_unindexable_fields(), ['text'])
+
+    def test_missing_indexes(self):
+        advisor = IndexAdvisor(self.search_config)
+        advisor._collection = FakeCollection({'_id_': [('_id', 1)],
+                                              'year': [('year', 1), ('id', 1)],
+                                              'type': [('meta.type', 1), ('year', -1), ('id', 1)]}, 'IXSCAN')
+        self.assertEqual(advisor.get_missing_indexes(), [[('is_letter', 1), ('year', -1)]])
+
+    def test_collection_scans(self):
+        advisor = IndexAdvisor(self.search_config)
+        advisor._collection = FakeCollection({}, 'COLLSCAN')
+        entries = [SimpleNamespace(search_query=str({'filter': {'text': 'a'}, 'sort': [('year', -1)], 'page': 1})),
+                   SimpleNamespace(search_query=str({'filter': {'text': 'a'}, 'sort': [('year', -1)], 'page': 2})),
+                   SimpleNamespace(search_query="{'filter': {'text': 'trunc")]
+        self.assertEqual(advisor.get_collection_scans(entries), [({'text': 'a'}, 2)])
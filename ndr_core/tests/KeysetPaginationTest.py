@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from django.test import TestCase, RequestFactory
+
+from ndr_core.api.mongodb.mongodb_result import MongoDBResult
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.search_config = SimpleNamespace(conf_name='test_conf', page_size=2, use_keyset_pagination=True,
+                                             sort_field='year', search_id_field='id')
+        self.query = {'filter': {'type': 'letter'}, 'sort': [('year', 1), ('id', 1)], 'page': 2}
+
+    def get_result(self, url):
+        return MongoDBResult(self.search_config, self.query, RequestFactory().get(url))
+
+    def test_cursor_is_added_to_query(self):
+        token = MongoDBResult.encode_cursor({'page': 2, 'direction': 'after', 'values': [1900, 'b']})
+        result = self.get_result(f'/search?page=2&cursor={token}')
+        self.assertEqual(result.query['cursor']['values'], [1900, 'b'])
+
+        query_filter, sort, limit = result.get_keyset_query(result.query['cursor'])
+        self.assertEqual(query_filter, {'$and': [{'type': 'letter'},
+                                                 {'$or': [{'year': {'$gt': 1900}},
+                                                          {'year': 1900, 'id': {'$gt': 'b'}}]}]})
+        self.assertEqual(sort, [('year', 1), ('id', 1)])
+        self.assertEqual(limit, 2)
+
+    def test_before_cursor_reverses_sort(self):
+        token = MongoDBResult.encode_cursor({'page': 2, 'direction': 'before', 'values': [1900, 'b']})
+        result = self.get_result(f'/search?page=2&cursor={token}')
+        query_filter, sort, _limit = result.get_keyset_query(result.query['cursor'])
+        self.assertEqual(sort, [('year', -1), ('id', -1)])
+        self.assertEqual(query_filter['$and'][1]['$or'][0], {'year': {'$lt': 1900}})
+
+    def test_invalid_cursor_is_ignored(self):
+        self.assertNotIn('cursor', self.get_result('/search?page=2&cursor=invalid').query)
+        token = MongoDBResult.encode_cursor({'page': 5, 'direction': 'after', 'values': [1900, 'b']})
+        self.assertNotIn('cursor', self.get_result(f'/search?page=2&cursor={token}').query)
+
+    def test_page_links(self):
+        result = self.get_result('/search?page=2')
+        result.page, result.total, result.num_pages = 2, 9, 5
+        result.results = [{'year': 1900, 'id': 'c'}, {'year': 1901, 'id': 'd'}]
+
+        links = result.get_pagination_links()
+        next_cursor = MongoDBResult.decode_cursor(links['next'].split('cursor=')[1])
+        prev_cursor = MongoDBResult.decode_cursor(links['prev'].split('cursor=')[1])
+        self.assertEqual(next_cursor, {'page': 3, 'direction': 'after', 'values': [1901, 'd']})
+        self.assertEqual(prev_cursor, {'page': 1, 'direction': 'before', 'values': [1900, 'c']})
+
+        page_urls = {link['page']: link['url'] for link in links['pages']}
+        self.assertNotIn('cursor', page_urls['4'])
+        last_cursor = MongoDBResult.decode_cursor(page_urls['5'].split('cursor=')[1])
+        self.assertEqual(last_cursor['limit'], 1)
+
+    def test_cursor_values_are_validated(self):
+        for values in [[{'$ne': None}, 'b'], [1900, {'$regex': '.*'}], [{'$oid': 'x'}, 'b'], [[1900], 'b'],
+                       [None, 'b']]:
+            token = MongoDBResult.encode_cursor({'page': 2, 'direction': 'after', 'values': values})
+            self.assertNotIn('cursor', self.get_result(f'/search?page=2&cursor={token}').query)
+
+        values = [{'$date': '1900-01-01T00:00:00Z'}, {'$oid': '5f0c9b3e1c9d440000a1b2c3'}]
+        token = MongoDBResult.encode_cursor({'page': 2, 'direction': 'after', 'values': values})
+        self.assertEqual(self.get_result(f'/search?page=2&cursor={token}').query['cursor']['values'], values)
+
+    def test_cursor_needs_sort_values(self):
+        result = self.get_result('/search?page=2')
+        self.assertIsNone(result.create_cursor(3, 'after', {'id': 'c'}))
+        self.assertIsNone(result.create_cursor(3, 'after', {'year': [1900, 1901], 'id': 'c'}))
+        self.assertEqual(result.create_cursor(3, 'after', {'year': 1900, 'id': 'c'})['values'], [1900, 'c'])
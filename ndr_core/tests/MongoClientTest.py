@@ -0,0 +1,75 @@
+import importlib.util
+import os
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase
+
+from ndr_core.api.mongodb import mongodb_client
+from ndr_core.api.mongodb.mongodb_client import get_mongo_client, get_mongo_collection, close_mongo_clients
+
+
+class MongoClientTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('ndr_core.api.mongodb.mongodb_client.pymongo.MongoClient',
+                             side_effect=lambda *args, **kwargs: mock.MagicMock())
+        self.mongo_client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(close_mongo_clients)
+
+    @staticmethod
+    def get_config(url='mongodb://localhost:27017/ndr/documents', pool_size=10, min_pool_size=0):
+        return SimpleNamespace(api_connection_url=url,
+                               connection_pool_size=pool_size,
+                               connection_min_pool_size=min_pool_size)
+
+    def test_client_is_shared_per_connection_string(self):
+        client = get_mongo_client('mongodb://localhost:27017/ndr')
+        self.assertIs(get_mongo_client('mongodb://localhost:27017/ndr'), client)
+        self.assertIsNot(get_mongo_client('mongodb://otherhost:27017/ndr'), client)
+        self.assertIsNot(get_mongo_client('mongodb://localhost:27017/ndr', max_pool_size=5), client)
+        self.assertEqual(self.mongo_client.call_count, 3)
+
+    def test_collections_share_client(self):
+        get_mongo_collection(self.get_config())
+        get_mongo_collection(self.get_config('mongodb://localhost:27017/ndr/letters'))
+        self.mongo_client.assert_called_once_with('mongodb://localhost:27017/ndr',
+                                                  serverSelectionTimeoutMS=2000,
+                                                  maxPoolSize=10,
+                                                  minPoolSize=0,
+                                                  connect=False)
+
+    def test_min_pool_size_is_bounded(self):
+        get_mongo_collection(self.get_config(pool_size=4, min_pool_size=8))
+        self.assertEqual(self.mongo_client.call_args.kwargs['minPoolSize'], 4)
+
+    def test_close(self):
+        client = get_mongo_client('mongodb://localhost:27017/ndr')
+        close_mongo_clients()
+        client.close.assert_called_once()
+        self.assertIsNot(get_mongo_client('mongodb://localhost:27017/ndr'), client)
+
+    def test_close_at_exit(self):
+        # The module is executed as a separate copy, so the shared module and its clients stay untouched.
+        spec = importlib.util.find_spec(mongodb_client.__name__)
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch('atexit.register') as register, mock.patch('os.register_at_fork') as register_at_fork:
+            spec.loader.exec_module(module)
+        register.assert_called_once_with(module.close_mongo_clients)
+        register_at_fork.assert_called_once_with(after_in_child=module._reset_after_fork)
+
+    def test_reset_after_fork(self):
+        client = get_mongo_client('mongodb://localhost:27017/ndr')
+        mongodb_client._reset_after_fork()
+        client.close.assert_not_called()
+        self.assertIsNot(get_mongo_client('mongodb://localhost:27017/ndr'), client)
+
+    @skipUnless(hasattr(os, 'fork'), 'requires os.fork')
+    def test_child_process_creates_own_client(self):
+        client = get_mongo_client('mongodb://localhost:27017/ndr')
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if get_mongo_client('mongodb://localhost:27017/ndr') is not client else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(get_mongo_client('mongodb://localhost:27017/ndr'), client)
@@ -0,0 +1,67 @@
+import ast
+from unittest import mock
+
+from django.test import TestCase, RequestFactory
+
+from ndr_core.api.mongodb.mongodb_query import MongoDBQuery
+from ndr_core.api.mongodb.mongodb_result import MongoDBResult
+from ndr_core.models import (NdrCoreApiImplementation,
+                             NdrCoreSearchConfiguration,
+                             NdrCoreSearchStatisticEntry,
+                             NdrCoreResultField,
+                             NdrCoreResultFieldCardConfiguration,
+                             NdrCoreValue)
+
+
+class MongoDBQueryTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_config = NdrCoreSearchConfiguration.objects.create(
+            conf_name='test_conf', conf_label='Test', api_type=api_type,
+            api_connection_url='mongodb://localhost:27017/db/collection',
+            search_id_field='id', sort_field='date.year',
+            citation_expression='{title}, {persons.0.name}')
+
+    def add_result_field(self, rich_expression):
+        result_field = NdrCoreResultField.objects.create(rich_expression=rich_expression)
+        card_field = NdrCoreResultFieldCardConfiguration.objects.create(result_field=result_field, field_row=1,
+                                                                        field_column=1, field_size=12)
+        self.search_config.result_card_fields.add(card_field)
+
+    def test_no_card_fields(self):
+        self.assertIsNone(MongoDBQuery(self.search_config).get_projection())
+
+    def test_projection(self):
+        self.add_result_field('<p>{date|date}</p><p>{persons.1.name|upper} {place[name]}</p>')
+        projection = MongoDBQuery(self.search_config).get_projection()
+        self.assertEqual(projection, {'date': 1, 'id': 1, 'persons': 1, 'place.name': 1, 'title': 1})
+
+    def test_record_query_has_no_projection(self):
+        self.add_result_field('{title}')
+        self.assertIn('projection', MongoDBQuery(self.search_config).get_advanced_query())
+        self.assertNotIn('projection', MongoDBQuery(self.search_config).get_record_query('1'))
+
+    def test_text_query(self):
+        self.search_config.simple_query_mode = NdrCoreSearchConfiguration.SimpleQueryMode.TEXT
+        query = MongoDBQuery(self.search_config).get_simple_query('"old -letter')
+        self.assertEqual(query['filter'], {'$text': {'$search': '"old" "letter"'}})
+        self.assertEqual(query['sort'][0], ('score', {'$meta': 'textScore'}))
+
+    def test_regex_query_is_escaped(self):
+        query = MongoDBQuery(self.search_config).get_simple_query('a.b (c', and_or='or')
+        self.assertEqual(query['filter']['transcription.original']['$regex'], r'(a\.b|\(c)')
+
+    def test_logged_query(self):
+        self.add_result_field(' '.join(f'{{field_{number}.value}}' for number in range(8)))
+        query = MongoDBQuery(self.search_config).get_simple_query('letter from anna')
+        query['cursor'] = {'direction': 'after', 'values': ['1850', '42']}
+        self.assertGreater(len(str(query)), 255)
+
+        NdrCoreValue.objects.create(value_name='statistics_feature', value_value='true',
+                                    value_type=NdrCoreValue.ValueType.BOOLEAN)
+        result = MongoDBResult(self.search_config, query, RequestFactory().get('/search'))
+        with mock.patch('ndr_core.api.base_result.get_geolocation', return_value=None):
+            result.log_search()
+        logged_query = ast.literal_eval(NdrCoreSearchStatisticEntry.objects.get().search_query)
+        self.assertEqual(logged_query, {'filter': query['filter'], 'sort': query['sort']})
+        self.assertEqual(len(result.truncate_logged_query('x' * 300)), 255)
@@ -0,0 +1,92 @@
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, RequestFactory, override_settings
+
+from ndr_core.api.base_result import BaseResult
+from ndr_core.api.mongodb import mongodb_client
+from ndr_core.api.mongodb.mongodb_result import MongoDBResult
+from ndr_core.models import NdrCoreSearchConfiguration
+
+
+class FakeCollection:
+    """Finds and counts only when both queries run at the same time. """
+
+    def __init__(self):
+        self.barrier = threading.Barrier(2, timeout=2)
+        self.release = threading.Event()
+        self.options = {}
+
+    def find(self, **kwargs):
+        self.options['find'] = kwargs['max_time_ms']
+        self.barrier.wait()
+        return [{'id': 1}, {'id': 2}]
+
+    def count_documents(self, query_filter, **kwargs):
+        self.options['count'] = kwargs['maxTimeMS']
+        self.barrier.wait()
+        return 2
+
+
+class SlowCollection(FakeCollection):
+    """Counts until it is released. """
+
+    def find(self, **kwargs):
+        return [{'id': 1}]
+
+    def count_documents(self, query_filter, **kwargs):
+        self.release.wait(timeout=2)
+        return 1
+
+
+class ParallelQueryTest(SimpleTestCase):
+    def get_result(self):
+        search_config = SimpleNamespace(conf_name='test_conf', page_size=10, use_keyset_pagination=False,
+                                        use_facet_pipeline=False,
+                                        count_strategy=NdrCoreSearchConfiguration.CountStrategy.EXACT)
+        query = {'filter': {}, 'sort': [('id', 1)], 'page': 1}
+        return MongoDBResult(search_config, query, RequestFactory().get('/search'))
+
+    @override_settings(NDR_CORE_MONGO_QUERY_TIMEOUT=5)
+    def test_find_and_count_run_concurrently(self):
+        collection = FakeCollection()
+        result = self.get_result()
+        with mock.patch('ndr_core.api.mongodb.mongodb_result.get_mongo_collection', return_value=collection):
+            result.download_result()
+        self.assertIsNone(result.error)
+        self.assertEqual(result.raw_result['total'], 2)
+        self.assertEqual(len(result.raw_result['hits']), 2)
+        self.assertEqual(collection.options, {'find': 5000, 'count': 5000})
+
+    @override_settings(NDR_CORE_MONGO_QUERY_TIMEOUT=0.1)
+    def test_timeout(self):
+        collection = SlowCollection()
+        result = self.get_result()
+        with mock.patch('ndr_core.api.mongodb.mongodb_result.get_mongo_collection', return_value=collection):
+            result.download_result()
+        collection.release.set()
+        self.assertEqual(result.error_code, BaseResult.QUERY_TIMEOUT)
+        self.assertFalse(result.is_connection_failure())
+
+    @override_settings(NDR_CORE_MONGO_QUERY_WORKERS=3)
+    def test_executor_is_shared(self):
+        mongodb_client.close_mongo_clients()
+        self.addCleanup(mongodb_client.close_mongo_clients)
+        executor = mongodb_client.get_query_executor()
+        self.assertIs(mongodb_client.get_query_executor(), executor)
+        self.assertEqual(executor._max_workers, 3)
+
+        mongodb_client.close_mongo_clients()
+        self.assertIsNot(mongodb_client.get_query_executor(), executor)
+
+    def test_executor_is_reset_after_fork(self):
+        self.addCleanup(mongodb_client.close_mongo_clients)
+        executor = mongodb_client.get_query_executor()
+        with mock.patch.object(executor, 'shutdown') as shutdown:
+            mongodb_client._reset_after_fork()
+        # The threads of the pool don't exist in a forked child, so the pool is replaced, not shut down.
+        shutdown.assert_not_called()
+        self.assertIsNone(mongodb_client._executor)
+        self.assertIsNot(mongodb_client.get_query_executor(), executor)
+        executor.shutdown(wait=False)
@@ -0,0 +1,58 @@
+import json
+
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ndr_core.forms.fields import RemoteMultipleChoiceField
+from ndr_core.forms.forms_search import AdvancedSearchForm
+from ndr_core.models import (NdrCoreApiImplementation,
+                             NdrCoreSearchConfiguration,
+                             NdrCoreSearchField,
+                             NdrCoreSearchFieldFormConfiguration)
+from ndr_core.search_plan import ChoiceIndex
+
+
+class RemoteChoicesTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_config = NdrCoreSearchConfiguration.objects.create(
+            conf_name='letters', conf_label='Letters', api_type=api_type,
+            api_connection_url='mongodb://localhost:27017/db/collection')
+        choices = [{"key": "bern", "value": "Bern"}, {"key": "basel", "value": "Basel"},
+                   {"key": "oberbern", "value": "Oberbern"}, {"key": "zurich", "value": "Zürich"}]
+        search_field = NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.MULTI_LIST,
+                                                         field_name='place', list_choices=json.dumps(choices))
+        form_field = NdrCoreSearchFieldFormConfiguration.objects.create(search_field=search_field, field_row=1,
+                                                                        field_column=1, field_size=6)
+        self.search_config.search_form_fields.add(form_field)
+
+    def test_choice_index(self):
+        index = ChoiceIndex([('1', 'Bern'), ('2', 'Basel'), ('3', 'Oberbern'), ('4', 'Bernina')])
+        self.assertEqual(index.search('bern'), ([('1', 'Bern'), ('4', 'Bernina'), ('3', 'Oberbern')], False))
+        self.assertEqual(index.search('', offset=1, limit=2), ([('2', 'Basel'), ('3', 'Oberbern')], True))
+        self.assertEqual(index.search('BERN', offset=2, limit=2), ([('3', 'Oberbern')], False))
+
+    def test_choices_view(self):
+        url = reverse('ndr_core:search_field_choices', kwargs={'search_config': 'letters', 'field_name': 'place'})
+        response = self.client.get(url, {'term': 'bern'})
+        self.assertEqual(response.json(), {'results': [{'id': 'bern__true', 'text': 'Bern'},
+                                                       {'id': 'oberbern__true', 'text': 'Oberbern'}],
+                                           'more': False})
+
+        url = reverse('ndr_core:search_field_choices', kwargs={'search_config': 'letters', 'field_name': 'year'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(NDR_CORE_REMOTE_CHOICES_THRESHOLD=2)
+    def test_remote_field(self):
+        form = AdvancedSearchForm(QueryDict('letters_place=basel__true'), search_config=self.search_config)
+        self.assertIsInstance(form.fields['letters_place'], RemoteMultipleChoiceField)
+        self.assertTrue(form.is_valid())
+
+        html = str(form['letters_place'])
+        self.assertIn('data-ajax--url="/ndr_core/search/choices/letters/place/"', html)
+        self.assertIn('Basel', html)
+        self.assertNotIn('Bern', html)
+
+        form = AdvancedSearchForm(QueryDict('letters_place=geneva__true'), search_config=self.search_config)
+        self.assertFalse(form.is_valid())
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ndr_core.api.result_cache import ResultCache, get_result_cache_key
+
+
+class ResultCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.search_config = SimpleNamespace(conf_name='test_conf')
+
+    def test_canonical_key(self):
+        key_1 = get_result_cache_key(self.search_config, {'filter': {'a': 1, 'b': 2}, 'page': 1}, 10)
+        key_2 = get_result_cache_key(self.search_config, {'page': 1, 'filter': {'b': 2, 'a': 1}}, 10)
+        key_3 = get_result_cache_key(self.search_config, {'filter': {'a': 1, 'b': 2}, 'page': 2}, 10)
+        key_4 = get_result_cache_key(self.search_config, {'filter': {'a': 1, 'b': 2}, 'page': 1}, 20)
+        self.assertEqual(key_1, key_2)
+        self.assertNotEqual(key_1, key_3)
+        self.assertNotEqual(key_1, key_4)
+
+    def test_hits_and_misses(self):
+        result_cache = ResultCache(max_size=10)
+        self.assertIsNone(result_cache.get('key'))
+        result_cache.set('key', {'total': 1}, 60)
+        self.assertEqual(result_cache.get('key'), {'total': 1})
+
+        # A new process only sees the shared tier
+        other_process_cache = ResultCache(max_size=10)
+        self.assertEqual(other_process_cache.get('key'), {'total': 1})
+
+        statistics = result_cache.get_statistics()
+        self.assertEqual(statistics['local_hits'], 1)
+        self.assertEqual(statistics['misses'], 1)
+        self.assertEqual(other_process_cache.get_statistics()['shared_hits'], 1)
+
+    def test_lru_eviction(self):
+        result_cache = ResultCache(max_size=2)
+        result_cache.set('a', 1, 60)
+        result_cache.set('b', 2, 60)
+        result_cache.get('a')
+        result_cache.set('c', 3, 60)
+        self.assertEqual(list(result_cache._entries.keys()), ['a', 'c'])
+
+    def test_disabled(self):
+        result_cache = ResultCache(max_size=2)
+        result_cache.set('a', 1, 0)
+        self.assertIsNone(result_cache.get('a'))
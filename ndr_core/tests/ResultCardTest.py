@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.template import Context, Template, engines
+from django.test import TestCase, RequestFactory, override_settings
+
+from ndr_core.card_cache import card_cache
+from ndr_core.models import (NdrCoreApiImplementation,
+                             NdrCoreResultField,
+                             NdrCoreResultFieldCardConfiguration,
+                             NdrCoreSearchConfiguration)
+from ndr_core.templatetags import ndr_utils
+
+
+class ResultCardTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_config = NdrCoreSearchConfiguration.objects.create(
+            conf_name='letters', conf_label='Letters', api_type=api_type,
+            api_connection_url='mongodb://localhost:27017/db/collection', citation_expression='Letter {id}')
+        for number, (row, column) in enumerate([(1, 1), (1, 2), (2, 1), (3, 1)]):
+            result_field = NdrCoreResultField.objects.create(rich_expression=f'<b>{{field_{number}}}</b>',
+                                                             field_classes=f'field-{number}')
+            card_field = NdrCoreResultFieldCardConfiguration.objects.create(result_field=result_field,
+                                                                            field_row=row, field_column=column,
+                                                                            field_size=6)
+            self.search_config.result_card_fields.add(card_field)
+
+    def render(self, number_of_results, version='', result_meta=None):
+        results = []
+        for number in range(number_of_results):
+            data = {f'field_{field}': f'value {number}.{field}{version}' for field in range(4)}
+            results.append({'id': str(number), 'data': {'id': str(number), **data}, 'result_meta': result_meta or {}})
+        result = SimpleNamespace(request=RequestFactory().get('/search'), results=results)
+        return Template('{% load ndr_utils %}{% render_result result search_config %}').render(
+            Context({'result': result, 'search_config': self.search_config}))
+
+    def test_cards(self):
+        html = self.render(2)
+        self.assertEqual(html.count('class="row pt-2"'), 6)
+        self.assertIn('<div class="col col-md-6 field-3">', html)
+        self.assertIn('<b>value 1.3</b>', html)
+        self.assertIn('Letter 1', html)
+
+    @override_settings(NDR_CORE_SHARED_CACHE=True)
+    def test_layout_is_resolved_once(self):
+        self.render(1)
+        with self.assertNumQueries(0), mock.patch.object(ndr_utils, 'get_template',
+                                                         wraps=ndr_utils.get_template) as get_template:
+            html = self.render(50)
+        self.assertEqual(get_template.call_count, 1)
+        self.assertEqual(html.count('class="card mb-2 box-shadow"'), 50)
+
+    def test_card_content_of_old_templates(self):
+        get_template = ndr_utils.get_template
+
+        def get_old_template(template_name):
+            if template_name.endswith('configured_fields_template.html'):
+                return engines['django'].from_string('<div class="card">{{ card_content }}</div>')
+            return get_template(template_name)
+
+        with mock.patch.object(ndr_utils, 'get_template', side_effect=get_old_template):
+            html = self.render(2)
+        self.assertEqual(html.count('class="row pt-2"'), 6)
+        self.assertIn('<div class="col col-md-6 field-3">', html)
+        self.assertIn('<b>value 1.3</b>', html)
+
+    @override_settings(NDR_CORE_CARD_CACHE_TIMEOUT=300)
+    def test_cards_are_cached(self):
+        card_cache.clear()
+        self.addCleanup(card_cache.clear)
+        html = self.render(5)
+        with mock.patch.object(ndr_utils.RenderResultNode, 'create_card_contents') as create_card_contents, \
+                mock.patch.object(ndr_utils.card_cache, 'set_many', wraps=card_cache.set_many) as set_many:
+            self.assertEqual(self.render(5), html)
+        create_card_contents.assert_not_called()
+        set_many.assert_called_once_with({})
+        self.assertEqual(card_cache.get_statistics()['hits'], 5)
+
+        self.assertIn('value 0.1 changed', self.render(1, version=' changed'))
+        self.search_config.citation_expression = 'Cite {id}'
+        self.search_config.save()
+        self.assertIn('Cite 0', self.render(1))
+        self.assertEqual(card_cache.get_statistics()['misses'], 7)
+
+    @override_settings(NDR_CORE_CARD_CACHE_TIMEOUT=300)
+    def test_cards_are_shared_between_searches(self):
+        card_cache.clear()
+        self.addCleanup(card_cache.clear)
+        self.render(1)
+        html = self.render(1, result_meta={'result_number': 7, 'total_results': 90})
+        self.assertEqual(card_cache.get_statistics()['hits'], 1)
+        self.assertIn('Result 7 of 90', ' '.join(html.split()))
+
+    def test_card_cache_is_disabled_by_default(self):
+        card_cache.clear()
+        self.render(2)
+        self.render(2)
+        self.assertEqual(card_cache.get_statistics(), {'enabled': False, 'hits': 0, 'misses': 0, 'hit_rate': 0})
@@ -0,0 +1,74 @@
+from django.http import QueryDict
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from ndr_core.forms.forms_search import AdvancedSearchForm
+from ndr_core.models import (NdrCoreApiImplementation,
+                             NdrCorePage,
+                             NdrCoreSearchConfiguration,
+                             NdrCoreSearchField,
+                             NdrCoreSearchFieldFormConfiguration)
+from ndr_core.views import SearchView
+
+
+class SearchFormTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_configs = []
+        for conf_name in ['letters', 'persons']:
+            search_config = NdrCoreSearchConfiguration.objects.create(
+                conf_name=conf_name, conf_label=conf_name, api_type=api_type,
+                api_connection_url='mongodb://localhost:27017/db/collection')
+            search_field = NdrCoreSearchField.objects.create(
+                field_type=NdrCoreSearchField.FieldType.MULTI_LIST, field_name=f'{conf_name}_type',
+                list_choices='[{"key": "a", "value": "A"}, {"key": "b", "value": "B"}]')
+            form_field = NdrCoreSearchFieldFormConfiguration.objects.create(search_field=search_field, field_row=1,
+                                                                            field_column=1, field_size=6)
+            search_config.search_form_fields.add(form_field)
+            self.search_configs.append(search_config)
+
+        self.page = NdrCorePage.objects.create(view_name='search', page_type=NdrCorePage.PageType.SEARCH,
+                                               name='Search', label='Search')
+        self.page.search_configs.add(self.search_configs[0])
+
+    @override_settings(NDR_CORE_SHARED_CACHE=True)
+    def test_form_is_built_from_blueprint(self):
+        AdvancedSearchForm(ndr_page=self.page)
+        with self.assertNumQueries(0):
+            form = AdvancedSearchForm(QueryDict('letters_letters_type=a__true'), ndr_page=self.page)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['letters_letters_type'], ['a__true'])
+
+    def test_forms_dont_share_fields(self):
+        form = AdvancedSearchForm(ndr_page=self.page)
+        other_form = AdvancedSearchForm(ndr_page=self.page)
+        self.assertIsNot(form.fields['letters_letters_type'], other_form.fields['letters_letters_type'])
+
+    def test_blueprint_is_invalidated(self):
+        AdvancedSearchForm(ndr_page=self.page)
+        self.page.search_configs.add(self.search_configs[1])
+        form = AdvancedSearchForm(ndr_page=self.page)
+        self.assertIn('persons_persons_type', form.fields)
+
+    @override_settings(NDR_CORE_SHARED_CACHE=True)
+    def test_layout_is_reused(self):
+        template = Template('{% load crispy_forms_tags %}{% crispy form %}')
+        html = template.render(Context({'form': AdvancedSearchForm(ndr_page=self.page)}))
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render(Context({'form': AdvancedSearchForm(ndr_page=self.page)})), html)
+        self.assertIn('name="letters_letters_type"', html)
+
+    @override_settings(NDR_CORE_SEARCH_FORM_CACHE_TIMEOUT=300, NDR_CORE_SHARED_CACHE=True)
+    def test_unbound_form_html_is_cached(self):
+        view = SearchView(ndr_page=self.page)
+        html = view.get_unbound_form_html(AdvancedSearchForm(ndr_page=self.page))
+        self.assertIn('name="letters_letters_type"', html)
+        with self.assertNumQueries(0):
+            self.assertEqual(view.get_unbound_form_html(AdvancedSearchForm(ndr_page=self.page)), html)
+
+        bound_form = AdvancedSearchForm(QueryDict('letters_letters_type=a__true'), ndr_page=self.page)
+        self.assertIsNone(view.get_unbound_form_html(bound_form))
+
+    def test_form_html_cache_disabled_by_default(self):
+        view = SearchView(ndr_page=self.page)
+        self.assertIsNone(view.get_unbound_form_html(AdvancedSearchForm(ndr_page=self.page)))
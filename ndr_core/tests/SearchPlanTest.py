@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+from django.template import Context, Template
+from django.test import TestCase, RequestFactory, override_settings
+
+from ndr_core.forms.forms_search import AdvancedSearchForm
+from ndr_core.models import (NdrCoreApiImplementation,
+                             NdrCoreResultField,
+                             NdrCoreResultFieldCardConfiguration,
+                             NdrCoreSearchConfiguration,
+                             NdrCoreSearchField,
+                             NdrCoreSearchFieldFormConfiguration,
+                             NdrCoreValue)
+from ndr_core.ndr_settings import NdrSettings
+from ndr_core.search_plan import get_search_plan, GENERATION_VALUE_NAME
+
+
+class SearchPlanTest(TestCase):
+    def setUp(self):
+        api_type = NdrCoreApiImplementation.objects.create(name='mongodb', label='MongoDB')
+        self.search_config = NdrCoreSearchConfiguration.objects.create(
+            conf_name='test_conf', conf_label='Test', api_type=api_type,
+            api_connection_url='mongodb://localhost:27017/db/collection', citation_expression='{person.name}')
+
+        self.name_field = NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.STRING,
+                                                            field_name='name', field_label='Name')
+        type_field = NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.LIST,
+                                                       field_name='type', field_label='Type',
+                                                       list_choices='[{"key": "letter", "value": "Letter"}]')
+        for search_field, row, column in [(type_field, 1, 2), (self.name_field, 1, 1)]:
+            form_field = NdrCoreSearchFieldFormConfiguration.objects.create(search_field=search_field, field_row=row,
+                                                                            field_column=column, field_size=6)
+            self.search_config.search_form_fields.add(form_field)
+
+        result_field = NdrCoreResultField.objects.create(rich_expression='{person.name} ({year})')
+        card_field = NdrCoreResultFieldCardConfiguration.objects.create(result_field=result_field, field_row=2,
+                                                                        field_column=1, field_size=12)
+        self.search_config.result_card_fields.add(card_field)
+
+    def test_plan(self):
+        search_plan = get_search_plan(self.search_config)
+        self.assertEqual([[field.field_name for field in row] for row in search_plan.form_rows], [['name', 'type']])
+        self.assertEqual(search_plan.get_field('type').get_choices(), [('letter__true', 'Letter')])
+        self.assertEqual(len(search_plan.get_card_rows('normal')), 2)
+        self.assertEqual(search_plan.get_card_rows('compact'), ())
+        self.assertEqual(search_plan.expression_variables, (('person', 'name'), ('year',), ('person', 'name')))
+
+    def test_plan_is_reused(self):
+        search_plan = get_search_plan(self.search_config)
+        # The local memory cache is not shared between processes: only the generation is read from the database.
+        with self.assertNumQueries(1):
+            self.assertIs(get_search_plan(self.search_config), search_plan)
+
+    @override_settings(NDR_CORE_SHARED_CACHE=True)
+    def test_plan_is_reused_with_shared_cache(self):
+        search_plan = get_search_plan(self.search_config)
+        with self.assertNumQueries(0):
+            self.assertIs(get_search_plan(self.search_config), search_plan)
+
+    def test_cache_is_shared(self):
+        self.assertFalse(NdrSettings.cache_is_shared())
+        with self.settings(NDR_CORE_SHARED_CACHE=True):
+            self.assertTrue(NdrSettings.cache_is_shared())
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                               'LOCATION': '/tmp/ndr_core_test_cache'}}):
+            self.assertTrue(NdrSettings.cache_is_shared())
+
+    def test_changes_of_other_processes_are_seen(self):
+        search_plan = get_search_plan(self.search_config)
+        # Another process saved the configuration: the stored generation changed, no signal was received.
+        NdrCoreSearchField.objects.filter(pk=self.name_field.pk).update(field_label='Person')
+        NdrCoreValue.objects.filter(value_name=GENERATION_VALUE_NAME).update(value_value='1')
+        new_plan = get_search_plan(self.search_config)
+        self.assertIsNot(new_plan, search_plan)
+        self.assertEqual(new_plan.get_field('name').field_label, 'Person')
+
+    def test_plan_is_invalidated(self):
+        get_search_plan(self.search_config)
+
+        self.name_field.field_label = 'Person'
+        self.name_field.save()
+        self.assertEqual(get_search_plan(self.search_config).get_field('name').field_label, 'Person')
+
+        self.search_config.search_form_fields.remove(self.search_config.search_form_fields.get(field_column=2))
+        self.assertIsNone(get_search_plan(self.search_config).get_field('type'))
+
+    def test_form_uses_plan(self):
+        form = AdvancedSearchForm(search_config=self.search_config)
+        self.assertIn('test_conf_name', form.fields)
+        self.assertEqual(list(form.fields['test_conf_type'].choices)[1:], [('letter__true', 'Letter')])
+
+    def test_result_card_uses_plan(self):
+        result = SimpleNamespace(request=RequestFactory().get('/search'),
+                                 results=[{'id': '1', 'data': {'person': {'name': 'Anna'}, 'year': 1850}}])
+        html = Template('{% load ndr_utils %}{% render_result result search_config %}').render(
+            Context({'result': result, 'search_config': self.search_config}))
+        self.assertIn('Anna (1850)', html)
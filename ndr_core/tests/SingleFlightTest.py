@@ -0,0 +1,118 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ndr_core.api.single_flight import SingleFlight
+
+
+class SingleFlightTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_calls_are_coalesced(self):
+        single_flight = SingleFlight(timeout=5)
+        calls = []
+
+        def backend_query():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'total': 42}
+
+        outcomes = []
+        threads = [threading.Thread(target=lambda: outcomes.append(single_flight.do('key', backend_query)))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, [{'total': 42}] * 10)
+        self.assertEqual(single_flight.coalesced, 9)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        single_flight = SingleFlight(timeout=5)
+        self.assertEqual(single_flight.do('key', lambda: 1), 1)
+        self.assertEqual(single_flight.do('key', lambda: 2), 2)
+
+    def test_waits_for_other_process(self):
+        single_flight = SingleFlight(timeout=5)
+        # Another process holds the lock and publishes its outcome later
+        cache.add('key:flight_lock', 1)
+        threading.Timer(0.2, lambda: cache.set('key:flight_outcome', 'other process')).start()
+
+        self.assertEqual(single_flight.do('key', lambda: 'this process'), 'other process')
+
+    def test_other_process_fails(self):
+        single_flight = SingleFlight(timeout=5)
+        cache.add('key:flight_lock', 1)
+        threading.Timer(0.2, lambda: cache.delete('key:flight_lock')).start()
+
+        self.assertEqual(single_flight.do('key', lambda: 'this process'), 'this process')
+
+    def run_concurrently(self, single_flight, backend_query, number_of_calls=3):
+        """Starts the calls one after the other, so the first one is the leader. """
+        outcomes = []
+
+        def call():
+            try:
+                outcomes.append(single_flight.do('key', backend_query))
+            except ValueError as e:
+                outcomes.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(number_of_calls)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_failure_is_shared_with_waiting_followers(self):
+        single_flight = SingleFlight(timeout=5, cross_process=False)
+        calls = []
+
+        def backend_query():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'error' if len(calls) == 1 else 'result'
+
+        self.assertEqual(self.run_concurrently(single_flight, backend_query), ['error'] * 3)
+        self.assertEqual(len(calls), 1)
+        # Later calls don't get the failure
+        self.assertEqual(single_flight.do('key', backend_query), 'result')
+
+    def test_exception_is_raised_in_waiting_followers(self):
+        single_flight = SingleFlight(timeout=5, cross_process=False)
+        calls = []
+
+        def backend_query():
+            calls.append(1)
+            time.sleep(0.2)
+            raise ValueError('backend failed')
+
+        self.assertEqual(self.run_concurrently(single_flight, backend_query), ['backend failed'] * 3)
+        self.assertEqual(len(calls), 1)
+
+    def test_old_outcome_is_not_used_by_other_process(self):
+        single_flight = SingleFlight(timeout=5)
+        single_flight.do('key', lambda: 'old outcome')
+        self.assertEqual(cache.get('key:flight_outcome'), 'old outcome')
+
+        # A new leader removes the outcome of the previous call before it runs
+        def backend_query():
+            self.assertIsNone(cache.get('key:flight_outcome'))
+            return 'new outcome'
+        self.assertEqual(single_flight.do('key', backend_query), 'new outcome')
+
+    def test_outcome_is_kept_briefly(self):
+        single_flight = SingleFlight(timeout=5)
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            single_flight.do('key', lambda: 'outcome')
+        cache_set.assert_called_once_with('key:flight_outcome', 'outcome', timeout=SingleFlight.OUTCOME_TIMEOUT)
+
+        single_flight.do('other_key', lambda: 'outcome', cross_process=False)
+        self.assertIsNone(cache.get('other_key:flight_outcome'))
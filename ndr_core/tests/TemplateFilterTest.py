@@ -0,0 +1,63 @@
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import translation
+
+from ndr_core import search_plan
+from ndr_core.models import NdrCoreSearchField
+from ndr_core.ndr_templatetags.filters import get_filter
+from ndr_core.ndr_templatetags.template_string import TemplateString
+
+
+class TemplateFilterTest(TestCase):
+    def setUp(self):
+        translation.activate('en')
+        self.addCleanup(translation.deactivate)
+        choices = [{"key": "letter", "value": "Letter", "value_de": "Brief"},
+                   {"key": "draft", "value": "Draft", "is_printable": False}]
+        self.search_field = NdrCoreSearchField.objects.create(field_type=NdrCoreSearchField.FieldType.LIST,
+                                                              field_name='type', list_choices=json.dumps(choices))
+
+    def test_filters_are_shared(self):
+        self.assertIs(get_filter('badge', {'field': 'type', 'bg': 'primary'}),
+                      get_filter('badge', {'bg': 'primary', 'field': 'type'}))
+        with self.assertRaises(ValueError):
+            get_filter('unknown', {})
+        with self.assertRaises(ValueError):
+            get_filter('date', {})
+
+    @override_settings(NDR_CORE_SHARED_CACHE=True)
+    def test_badges_dont_query_per_value(self):
+        records = [{'type': 'letter' if number % 2 else 'draft'} for number in range(500)]
+        TemplateString('{type|badge:field=type}', records[0]).get_formatted_string()
+        with self.assertNumQueries(0):
+            rendered = [TemplateString('{type|badge:field=type} {type|fieldify:type}', record).get_formatted_string()
+                        for record in records]
+        self.assertIn('>Letter</span> Letter', rendered[1])
+        self.assertEqual(rendered[0], 'None Draft')
+
+    def test_changed_choices_are_used(self):
+        self.assertEqual(TemplateString('{type|fieldify:type}', {'type': 'letter'}).get_formatted_string(), 'Letter')
+        self.search_field.list_choices = json.dumps([{"key": "letter", "value": "Letters"}])
+        self.search_field.save()
+        self.assertEqual(TemplateString('{type|fieldify:type}', {'type': 'letter'}).get_formatted_string(),
+                         'Letters')
+
+    def test_filter_errors_are_rendered(self):
+        string = TemplateString('{type|unknown} {type|date}', {'type': 'letter'}, show_errors=True)
+        formatted_string = string.get_formatted_string()
+        self.assertIn('Filter unknown not found.', formatted_string)
+        self.assertIn('Filter date requires option o0.', formatted_string)
+
+    def test_generation_is_read_once(self):
+        records = [{'type': ['letter', 'letter', 'draft']} for _ in range(100)]
+        generation = search_plan.get_generation()
+        with mock.patch.object(search_plan, 'get_generation', wraps=search_plan.get_generation) as get_generation:
+            for record in records:
+                TemplateString('{type|badge:field=type}', record, generation=generation).get_formatted_string()
+            self.assertEqual(get_generation.call_count, 0)
+
+            # Without a given generation, it is read once per template string
+            TemplateString('{type|badge:field=type} {type|fieldify:type}', records[0]).get_formatted_string()
+            self.assertEqual(get_generation.call_count, 1)
@@ -0,0 +1,27 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ndr_core.ndr_templatetags.template_string import TemplateString, TemplateStringVariable
+
+
+class TemplateStringTest(SimpleTestCase):
+    data = {'person': {'name': 'anna'}, 'year': 1850, 'places': ['Bern', 'Basel']}
+
+    def test_formatted_string(self):
+        string = 'Letter of {person.name|upper} ({year}), {person.name}, {places}, {{year}}, {missing}'
+        self.assertEqual(TemplateString(string, self.data).get_formatted_string(),
+                         'Letter of ANNA (1850), anna, Bern, Basel, {1850}, ')
+        self.assertEqual(TemplateString('No variables', self.data).get_formatted_string(), 'No variables')
+
+    def test_string_is_parsed_once(self):
+        string = '{person.name|upper} - {year} - {person.name|upper}'
+        with mock.patch.object(TemplateStringVariable, 'parse_variable',
+                               autospec=True, side_effect=TemplateStringVariable.parse_variable) as parse_variable:
+            for _ in range(50):
+                self.assertEqual(TemplateString(string, self.data).get_formatted_string(), 'ANNA - 1850 - ANNA')
+        self.assertEqual(parse_variable.call_count, 3)
+
+    def test_malformed_string(self):
+        with self.assertRaises(ValueError):
+            TemplateString('{person.name', self.data)
@@ -63,7 +63,8 @@ from ndr_core.admin_views.search_views import (
     SearchConfigurationEditView,
     SearchConfigurationDeleteView,
     SearchConfigurationFormEditView,
-    SearchConfigurationCopyView
+    SearchConfigurationCopyView,
+    SearchConfigurationExplainView
 )
 from ndr_core.admin_views.color_views import (
     ConfigureColorPalettes,
@@ -127,7 +128,8 @@ from ndr_core.views import (
     NdrMarkForCorrectionView,
     NdrListDownloadView,
     NdrCSVListDownloadView,
-    set_language_view, manifest_url_view
+    set_language_view, manifest_url_view,
+    search_field_choices_view
 )
 
 app_name = 'ndr_core'
@@ -270,6 +272,8 @@ urlpatterns = [
 
     path('configure/search/copy/config/<str:pk>/', SearchConfigurationCopyView.as_view(),
          name='copy_search_config'),
+    path('configure/search/explain/config/<str:pk>/', SearchConfigurationExplainView.as_view(),
+         name='explain_search_config'),
     path('configure/search/form/preview/<str:img_config>/', preview_search_form_image,
          name='preview_search_form_image'),
     path('configure/search/result/preview/<str:img_config>/', preview_result_card_image,
@@ -304,6 +308,10 @@ urlpatterns = [
     path('bulk-download/json/<str:search_config>/', NdrListDownloadView.as_view(), name='download_list'),
     path('bulk-download/csv/<str:search_config>/', NdrCSVListDownloadView.as_view(), name='download_csv'),
 
+    # Choices of search fields with many choices
+    path('search/choices/<str:search_config>/<str:field_name>/', search_field_choices_view,
+         name='search_field_choices'),
+
     # Mark an entry for correction
     path('mark/to/correct/<str:search_config>/<str:record_id>/', NdrMarkForCorrectionView.as_view(),
          name='mark_record'),
@@ -1,24 +1,88 @@
 """Utility functions for the ndr_core app."""
 import csv
+import functools
+import re
 from io import StringIO
 
 
-def get_nested_value(obj, path):
-    """Get a nested value from an object."""
-    try:
-        for key in path.split("."):
-            if isinstance(obj, list) and len(obj) > 0:
-                sublist = []
-                for item in obj:
-                    sublist.append(item[key])
-                obj = ", ".join(sublist)
+class CompiledPath:
+    """A path to a nested value, parsed once. Paths use dots ("persons.0.name"), brackets ("persons[0][name]")
+    or both. Numeric keys index lists, other keys applied to a list are applied to each of its items."""
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self.indexes = tuple(self.get_index(key) for key in self.keys)
+        self.remaining_keys = tuple(self.keys[position:] for position in range(len(self.keys)))
+        steps = tuple(zip(range(len(self.keys)), self.keys, self.indexes))
+        self.remaining_steps = tuple(steps[position:] for position in range(len(self.keys)))
+
+    @staticmethod
+    def get_index(key):
+        """Returns the list index of a key or None if the key can't index a list."""
+        if isinstance(key, int):
+            return key
+        if isinstance(key, str) and key.isdigit():
+            return int(key)
+        return None
+
+    def resolve(self, obj, join=None):
+        """Returns the nested value. Raises a KeyError, IndexError or TypeError if the path doesn't exist in obj.
+        If join is set, the values collected from the items of a list are joined with it."""
+        if join is not None:
+            return self.resolve_lists(obj, join, 0) if self.keys else obj
+        value = obj
+        try:
+            for key in self.keys:
+                value = value[key]
+            return value
+        except TypeError:
+            # There is a list on the way, which needs an index or a fan-out.
+            return self.resolve_lists(obj, join, 0)
+
+    def resolve_lists(self, obj, join, start):
+        """Resolves the path from the key at position start. Numeric keys index lists, other keys are
+        applied to each item of a list."""
+        for position, key, index in self.remaining_steps[start]:
+            if isinstance(obj, list):
+                if index is None:
+                    values = []
+                    remaining_keys = self.remaining_keys[position]
+                    for item in obj:
+                        value = item
+                        try:
+                            for remaining_key in remaining_keys:
+                                value = value[remaining_key]
+                        except TypeError:
+                            # Another list on the way
+                            value = self.resolve_lists(item, join, position)
+                        values.append(value)
+                    if join is not None:
+                        return join.join(values)
+                    return values
+                obj = obj[index]
             else:
                 obj = obj[key]
-    except KeyError:
+        return obj
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_path(path):
+    """Returns the compiled path of a path string or of a tuple of keys."""
+    if isinstance(path, str):
+        return CompiledPath(re.findall(r"[^.\[\]]+", path))
+    return CompiledPath(path)
+
+
+def get_nested_value(obj, path):
+    """Get a nested value from an object. The path is a string or a CompiledPath."""
+    if not isinstance(path, CompiledPath):
+        path = compile_path(path)
+    try:
+        return path.resolve(obj, join=", ")
+    except (KeyError, IndexError):
         return "Key Not found"
     except TypeError:
         return "TypeError"
-    return obj
 
 
 def create_csv_export_string(list_of_results, mapping):
@@ -32,10 +96,11 @@ def create_csv_export_string(list_of_results, mapping):
         title_row.append(field['header'])
     lines.append(title_row)
 
+    paths = [compile_path(field['field']) for field in mapping]
     for result in list_of_results:
         rows = []
-        for field in mapping:
-            rows.append(get_nested_value(result, field['field']))
+        for path in paths:
+            rows.append(get_nested_value(result, path))
 
         lines.append(rows)
 
@@ -2,10 +2,12 @@
 For the views for the administration interface, see admin_views/* """
 import os
 
+from crispy_forms.utils import render_crispy_form
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse, HttpResponseRedirect
+from django.http import JsonResponse, HttpResponse, HttpResponseRedirect, Http404
 from django.shortcuts import render
 from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.urls import reverse_lazy
 from django.urls import reverse
 
@@ -30,10 +32,12 @@ from ndr_core.models import (
     NdrCoreValue,
     NdrCoreManifest
 )
+from ndr_core.api.base_result import BaseResult
 from ndr_core.api_factory import ApiFactory
 from ndr_core.ndr_settings import NdrSettings
 from ndr_core.templatetags.ndr_utils import url_deparse
 from ndr_core.ndr_template_tags import TextPreRenderer
+from ndr_core.search_plan import get_search_plan, get_generation, get_choice_index
 from ndr_core.utils import create_csv_export_string
 
 
@@ -166,11 +170,12 @@ class _NdrCoreSearchView(_NdrCoreView):
         form = self.form_class(self.request.GET, ndr_page=self.ndr_page, search_config=search_config)
         form.is_valid()
 
+        field_names = {form_field.field_name for form_field in get_search_plan(search_config).form_fields}
         for field in form.fields:
             if field.startswith(requested_search):
                 # This removes the search conf name, leaving the actual field name
                 actual_key = field[len(requested_search) + 1:]
-                if search_config.search_form_fields.filter(search_field__field_name=actual_key).count() > 0:
+                if actual_key in field_names:
                     query_obj.set_value(actual_key, form.cleaned_data[field])
                 elif actual_key.endswith('condition'):
                     query_obj.set_value(actual_key, form.cleaned_data[field])
@@ -208,6 +213,7 @@ class NdrListDownloadView(_NdrCoreSearchView):
         query_string = query_obj.get_advanced_query()
         result = api_factory.get_result_instance(query_string, self.request)
         result.page_size = 250
+        result.full_records = True
         result.load_result(transform_result=False)
 
         return result
@@ -252,6 +258,33 @@ class NdrMarkForCorrectionView(View):
 class SearchView(_NdrCoreSearchView):
     """A view to search for records in the configured API. """
 
+    form_cache_timeout = None
+    """Seconds the HTML of the unbound search form is cached. If None, the NDR_CORE_SEARCH_FORM_CACHE_TIMEOUT
+    setting is used (default: 0). With 0, the form is rendered on every request. Only enable the cache if the
+    search template renders form_html (see app_init/search.html), otherwise the form is rendered twice."""
+
+    def get_form_cache_timeout(self):
+        """Returns the number of seconds the HTML of the unbound search form is cached. """
+        if self.form_cache_timeout is not None:
+            return self.form_cache_timeout
+        return getattr(settings, 'NDR_CORE_SEARCH_FORM_CACHE_TIMEOUT', 0)
+
+    def get_unbound_form_html(self, form):
+        """Returns the rendered HTML of the unbound search form. The form looks the same for every visitor, so
+        it is cached per page, language and configuration generation. Returns None for bound forms or if the
+        cache is disabled. The form is then rendered by the template."""
+        timeout = self.get_form_cache_timeout()
+        if form.is_bound or timeout <= 0:
+            return None
+
+        cache_key = f"ndr_core:search_form:{self.ndr_page.pk}:{translation.get_language()}:{get_generation()}"
+        shared_cache = NdrSettings.get_cache()
+        form_html = shared_cache.get(cache_key)
+        if form_html is None:
+            form_html = render_crispy_form(form)
+            shared_cache.set(cache_key, form_html, timeout=timeout)
+        return mark_safe(form_html)
+
     def get(self, request, *args, **kwargs):
         """A view to search for records in the configured API. """
         requested_search = None
@@ -310,7 +343,9 @@ class SearchView(_NdrCoreSearchView):
                 result = api_factory.get_result_instance(query_string, self.request)
                 result.load_result()
 
-                if result.total == 0:
+                if result.error_code == BaseResult.UNAVAILABLE:
+                    messages.error(request, result.error)
+                elif result.total == 0:
                     messages.error(request, _('No results found.'))
                 else:
                     context.update({'search_config': search_config})
@@ -323,7 +358,9 @@ class SearchView(_NdrCoreSearchView):
             if "refine" in request.GET.keys():
                 form = self.form_class(request.GET, ndr_page=self.ndr_page)
 
-        context.update({'form': form, 'requested_search': requested_search})
+        context.update({'form': form,
+                        'form_html': self.get_unbound_form_html(form),
+                        'requested_search': requested_search})
         return render(request, self.template_name, context)
 
 
@@ -382,6 +419,30 @@ class FlipBookView(_NdrCoreView):
         return context
 
 
+def search_field_choices_view(request, search_config, field_name):
+    """Returns a page of the choices of a search field which match the search term in the format of select2:
+    {"results": [{"id": ..., "text": ...}], "more": ...}. Used by fields with too many choices to put
+    them in the page."""
+    try:
+        search_config = NdrCoreSearchConfiguration.objects.get(conf_name=search_config)
+    except NdrCoreSearchConfiguration.DoesNotExist:
+        raise Http404("Search configuration not found.")
+
+    choice_index = get_choice_index(search_config, field_name)
+    if choice_index is None:
+        raise Http404("Search field not found.")
+
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    page_size = getattr(settings, 'NDR_CORE_REMOTE_CHOICES_PAGE_SIZE', 50)
+
+    choices, more = choice_index.search(request.GET.get('term', ''), offset=(page - 1) * page_size, limit=page_size)
+    return JsonResponse({'results': [{'id': value, 'text': label} for value, label in choices],
+                         'more': more})
+
+
 def set_language_view(request, new_language):
     """A view to set the language of the page. """
     translation.activate(new_language)